@@ -0,0 +1,59 @@
+from datetime import date
+from typing import Callable
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from app.api.read_routing import mark_write
+from app.repositories.table_version import drug_table_version
+
+# Clients may keep responses but must revalidate them on every use, which
+# costs a 304 with no body while nothing has changed
+CACHE_CONTROL = "no-cache"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+class DrugTableVersionedRoute(APIRoute):
+    """Route class that makes GET requests conditional on the drugs table.
+
+    The ETag is the table version plus today's date (some responses are
+    relative to it), so a matching If-None-Match is answered with 304 before
+    the endpoint, its dependencies or the database are touched. Successful
+    writes are marked for the client's next reads instead.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def conditional_handler(request: Request) -> Response:
+            if request.method != "GET":
+                response = await handler(request)
+                # Rejected writes changed nothing the client must read back
+                if 200 <= response.status_code < 300:
+                    mark_write(response)
+                return response
+
+            # Taken before the endpoint reads, so a write that lands meanwhile
+            # can only make the ETag older than the data, never newer
+            version = await drug_table_version.get()
+            etag = f'"{version}-{date.today():%Y%m%d}"'
+            headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+
+            response = await handler(request)
+            if getattr(request.state, "replica_may_lag", False):
+                # Rows from a lagging replica must not be revalidated as current
+                del headers["ETag"]
+            if response.status_code == 200:
+                response.headers.update(headers)
+            return response
+
+        return conditional_handler
@@ -0,0 +1,43 @@
+"""Read-your-writes for clients whose reads are routed to replicas.
+
+Responses to writes carry the time of the write, as an ``X-Last-Write`` header
+and a ``last_write`` cookie. A client sending either back within
+``READ_YOUR_WRITES_SECONDS`` has its reads served by the primary, so it sees
+its own writes; every other client keeps reading from the replicas.
+"""
+
+import math
+import time
+from typing import Optional
+from fastapi import Request, Response
+from app.database import READ_YOUR_WRITES_SECONDS
+
+LAST_WRITE_HEADER = "X-Last-Write"
+LAST_WRITE_COOKIE = "last_write"
+
+
+def mark_write(response: Response, now: Optional[float] = None) -> None:
+    """Tell the client when it last wrote, for its following reads"""
+    value = f"{time.time() if now is None else now:.3f}"
+    response.headers[LAST_WRITE_HEADER] = value
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        value,
+        max_age=math.ceil(READ_YOUR_WRITES_SECONDS),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def wrote_recently(
+    request: Request, window_seconds: float = READ_YOUR_WRITES_SECONDS
+) -> bool:
+    """Whether the client wrote within window_seconds, by its own account"""
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(
+        LAST_WRITE_COOKIE
+    )
+    try:
+        written_at = float(value)
+    except (TypeError, ValueError):
+        return False
+    return time.time() - written_at < window_seconds
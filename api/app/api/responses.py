@@ -0,0 +1,22 @@
+from collections.abc import Mapping
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class RowJSONResponse(JSONResponse):
+    """JSON response for database rows, serialized with orjson.
+
+    Row mappings are written as objects, dates and datetimes in ISO format
+    like the Pydantic schemas. Returning this response skips response_model
+    validation, so the content must already have the documented shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
@@ -1,6 +1,10 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import drugs
+from app.api.v1.endpoints import diagnostics, drugs, imports
 
 api_router = APIRouter()
 
 api_router.include_router(drugs.router, prefix="/drugs", tags=["drugs"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
+api_router.include_router(
+    diagnostics.router, prefix="/diagnostics", tags=["diagnostics"]
+)
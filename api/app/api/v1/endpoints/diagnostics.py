@@ -0,0 +1,107 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.database import async_engine, read_engines
+from app.monitoring.loop_lag import loop_lag_monitor
+from app.monitoring.pool import pool_stats
+from app.monitoring.profiling import (
+    ADMIN_TOKEN,
+    ProfileStore,
+    is_admin_token,
+    profile_store,
+    render_profile,
+)
+from app.repositories.drug_cache import drug_cache
+from app.schemas.diagnostics import (
+    CacheStats,
+    DatabasePoolStats,
+    LoopLagStats,
+    PoolStats,
+    ProfileFormat,
+)
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """FastAPI dependency restricting a route to holders of ADMIN_TOKEN."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Diagnostics are disabled")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def is_admin(x_admin_token: Optional[str] = Header(None)) -> bool:
+    """FastAPI dependency telling whether the caller holds ADMIN_TOKEN."""
+    return is_admin_token(x_admin_token)
+
+
+def get_profile_store() -> ProfileStore:
+    """FastAPI dependency to get the profile store."""
+    return profile_store
+
+
+@router.get("/cache", response_model=CacheStats, dependencies=[Depends(require_admin)])
+async def get_cache_stats():
+    """Get this worker's drug cache hits and misses and the backend's size"""
+    return CacheStats(**await drug_cache.stats())
+
+
+def engine_pool_stats(engine: AsyncEngine) -> PoolStats:
+    """Pool stats of an engine, naming its database without the password"""
+    url = engine.url
+    return PoolStats(
+        database=f"{url.host or ''}/{url.database or ''}",
+        **pool_stats(engine.pool),
+    )
+
+
+@router.get(
+    "/pool", response_model=DatabasePoolStats, dependencies=[Depends(require_admin)]
+)
+async def get_pool_stats():
+    """Get this worker's database pool occupancy and checkout wait times, for
+    the primary and each read replica"""
+    return DatabasePoolStats(
+        primary=engine_pool_stats(async_engine),
+        replicas=[engine_pool_stats(engine) for engine in read_engines],
+    )
+
+
+@router.get("/loop", response_model=LoopLagStats)
+async def get_loop_lag_stats(admin: bool = Depends(is_admin)):
+    """Get this worker's event loop lag and the latest requests that blocked
+    the loop; their stacks are only shown with the admin token"""
+    stats = loop_lag_monitor.stats()
+    if not admin:
+        for block in stats["blocks"]:
+            block["stack"] = []
+    return LoopLagStats(**stats)
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=Response,
+    dependencies=[Depends(require_admin)],
+)
+async def get_profile(
+    profile_id: str,
+    profile_format: ProfileFormat = Query(
+        ProfileFormat.TEXT, alias="format", description="Profile format"
+    ),
+    store: ProfileStore = Depends(get_profile_store),
+):
+    """Get a request profile named by an X-Profile-Id header, as text or as a
+    pstats file"""
+    data = await store.load(profile_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if profile_format == ProfileFormat.PSTATS:
+        return Response(
+            data,
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="{profile_id}.pstats"'
+            },
+        )
+    return Response(render_profile(data), media_type="text/plain")
@@ -1,20 +1,93 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.database import get_database_session
+from datetime import date
+from typing import Any, List, Optional, Union
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.conditional import DrugTableVersionedRoute
+from app.api.read_routing import wrote_recently
+from app.api.responses import RowJSONResponse
+from app.database import get_read_session_factory, get_session_factory
+from app.repositories.drug_cache import CachedDrugRepository
 from app.repositories.drug_repository import DrugRepository
 from app.repositories.drug_interface import DrugRepositoryInterface
-from app.services.drug_service import DrugService
-from app.schemas.drug import DrugCreate, DrugUpdate, DrugResponse
+from app.repositories.table_version import drug_table_version
+from app.services.drug_service import (
+    DEFAULT_PAGE_SIZE,
+    EXPIRING_SOON_DAYS,
+    LOW_STOCK_THRESHOLD,
+    MAX_PAGE_SIZE,
+    DrugService,
+)
+from app.services.drug_export import MEDIA_TYPES
+from app.schemas.drug import (
+    CategoryCount,
+    DrugCreate,
+    DrugFilters,
+    DrugUpdate,
+    DrugResponse,
+    DrugPage,
+    DrugSort,
+    DrugStats,
+    DrugBatchResult,
+    DrugImportResult,
+    DrugUpsertResult,
+    ExportFormat,
+    ImportMode,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=DrugTableVersionedRoute)
+
+_drug_batch = TypeAdapter(List[DrugCreate])
+
+
+async def get_routed_session_factory(
+    request: Request,
+    primary: async_sessionmaker = Depends(get_session_factory),
+    replica: async_sessionmaker = Depends(get_read_session_factory),
+) -> async_sessionmaker:
+    """FastAPI dependency to get a read replica's session factory for GET
+    requests and the primary's for everything else.
+
+    Successful writes mark the client (see DrugTableVersionedRoute), which
+    then reads from the primary until its write window has passed. A replica
+    read soon after anyone's write may not
+    have caught up with it, so it is flagged in ``request.state`` to be kept
+    out of the cache and served without an ETag.
+    """
+    if request.method != "GET" or replica is primary or wrote_recently(request):
+        return primary
+    request.state.replica_may_lag = await drug_table_version.written_recently()
+    return replica
+
+
+async def get_routed_session(
+    session_factory: async_sessionmaker = Depends(get_routed_session_factory),
+):
+    """FastAPI dependency to get a session routed by get_routed_session_factory"""
+    async with session_factory() as db:
+        yield db
 
 
 def get_drug_repository(
-    db: Session = Depends(get_database_session),
+    request: Request,
+    db: AsyncSession = Depends(get_routed_session),
 ) -> DrugRepositoryInterface:
     """FastAPI dependency to get drug repository."""
-    return DrugRepository(db)
+    return CachedDrugRepository(
+        DrugRepository(db),
+        fill=not getattr(request.state, "replica_may_lag", False),
+    )
 
 
 def get_drug_service(
@@ -24,48 +97,132 @@ def get_drug_service(
     return DrugService(repository)
 
 
-@router.get("/", response_model=List[DrugResponse])
+@router.get("/", response_model=DrugPage, response_class=RowJSONResponse)
 async def get_drugs(
     search: Optional[str] = Query(
         None, description="Search drugs by name, generic name, or manufacturer"
     ),
     category: Optional[str] = Query(None, description="Filter by category"),
+    manufacturer: Optional[str] = Query(None, description="Filter by manufacturer"),
+    min_quantity: Optional[int] = Query(
+        None, ge=0, description="Minimum quantity in stock"
+    ),
+    max_quantity: Optional[int] = Query(
+        None, ge=0, description="Maximum quantity in stock"
+    ),
+    expires_after: Optional[date] = Query(
+        None, description="Only drugs expiring on or after this date"
+    ),
+    expires_before: Optional[date] = Query(
+        None, description="Only drugs expiring on or before this date"
+    ),
+    sort: Optional[DrugSort] = Query(
+        None,
+        description="Sort field, prefixed with '-' for descending. "
+        "Defaults to relevance when searching, otherwise newest first",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from a previous page's next_cursor"
+    ),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"
+    ),
     drug_service: DrugService = Depends(get_drug_service),
 ):
-    """Get all drugs with optional search and category filtering"""
-    if search or category:
-        return drug_service.search_drugs(search or "", category)
-    return drug_service.get_all_drugs()
+    """Get drugs a page at a time, filtered and sorted in the database"""
+    filters = DrugFilters(
+        search=search or None,
+        category=category,
+        manufacturer=manufacturer,
+        min_quantity=min_quantity,
+        max_quantity=max_quantity,
+        expires_after=expires_after,
+        expires_before=expires_before,
+        sort=sort,
+    )
+    return RowJSONResponse(await drug_service.list_drugs(filters, cursor, limit))
 
 
 @router.get("/categories", response_model=List[str])
 async def get_categories(drug_service: DrugService = Depends(get_drug_service)):
     """Get all available drug categories"""
-    return drug_service.get_categories()
+    return await drug_service.get_categories()
+
+
+@router.get("/categories/counts", response_model=List[CategoryCount])
+async def get_category_counts(
+    drug_service: DrugService = Depends(get_drug_service),
+):
+    """Get each drug category with its number of drugs"""
+    return await drug_service.get_category_counts()
+
+
+@router.get("/stats", response_model=DrugStats)
+async def get_drug_stats(
+    low_stock_threshold: int = Query(
+        LOW_STOCK_THRESHOLD, ge=0, description="Stock level counted as low"
+    ),
+    expiring_within_days: int = Query(
+        EXPIRING_SOON_DAYS, ge=0, description="Days counted as expiring soon"
+    ),
+    drug_service: DrugService = Depends(get_drug_service),
+):
+    """Get inventory totals for the dashboard"""
+    return await drug_service.get_stats(low_stock_threshold, expiring_within_days)
 
 
-@router.get("/low-stock", response_model=List[DrugResponse])
+@router.get(
+    "/low-stock", response_model=List[DrugResponse], response_class=RowJSONResponse
+)
 async def get_low_stock_drugs(
-    threshold: int = Query(100, description="Stock threshold"),
+    threshold: int = Query(LOW_STOCK_THRESHOLD, description="Stock threshold"),
     drug_service: DrugService = Depends(get_drug_service),
 ):
     """Get drugs with low stock"""
-    return drug_service.get_low_stock_drugs(threshold)
+    return RowJSONResponse(await drug_service.get_low_stock_drugs(threshold))
 
 
-@router.get("/expiring-soon", response_model=List[DrugResponse])
+@router.get(
+    "/expiring-soon", response_model=List[DrugResponse], response_class=RowJSONResponse
+)
 async def get_expiring_soon_drugs(
-    days: int = Query(90, description="Days until expiration"),
+    days: int = Query(EXPIRING_SOON_DAYS, description="Days until expiration"),
     drug_service: DrugService = Depends(get_drug_service),
 ):
     """Get drugs expiring within specified days"""
-    return drug_service.get_expiring_soon_drugs(days)
+    return RowJSONResponse(await drug_service.get_expiring_soon_drugs(days))
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_drugs(
+    export_format: ExportFormat = Query(
+        ExportFormat.NDJSON, alias="format", description="Export file format"
+    ),
+    gzip: bool = Query(False, description="Compress the export with gzip"),
+    session_factory: async_sessionmaker = Depends(get_routed_session_factory),
+):
+    """Stream the whole catalog as a file download"""
+
+    # The request's session is closed before the body is sent, so the stream
+    # opens one for as long as it runs
+    async def content():
+        async with session_factory() as db:
+            drug_service = DrugService(DrugRepository(db))
+            async for chunk in drug_service.export_drugs(export_format, gzip):
+                yield chunk
+
+    filename = f"drugs.{export_format.value}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        content(),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/{drug_id}", response_model=DrugResponse)
 async def get_drug(drug_id: int, drug_service: DrugService = Depends(get_drug_service)):
     """Get a specific drug by ID"""
-    return drug_service.get_drug_by_id(drug_id)
+    return await drug_service.get_drug_by_id(drug_id)
 
 
 @router.post("/", response_model=DrugResponse, status_code=201)
@@ -73,15 +230,74 @@ async def create_drug(
     drug_data: DrugCreate, drug_service: DrugService = Depends(get_drug_service)
 ):
     """Create a new drug"""
-    return drug_service.create_drug(drug_data)
+    return await drug_service.create_drug(drug_data)
 
 
-@router.post("/batch", response_model=List[DrugResponse], status_code=201)
+@router.post(
+    "/batch",
+    response_model=Union[List[DrugResponse], DrugUpsertResult, DrugBatchResult],
+    status_code=201,
+    # The body is taken unvalidated so partial batches can report bad rows
+    # one by one; it is still documented as the list of drugs it must be
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {"items": {"$ref": "#/components/schemas/DrugCreate"}}
+                }
+            }
+        }
+    },
+)
 async def batch_create_drugs(
-    drugs_data: List[DrugCreate], drug_service: DrugService = Depends(get_drug_service)
+    rows: List[Any] = Body(
+        ..., description="Drugs to create, each as for POST /drugs/"
+    ),
+    mode: ImportMode = Query(
+        ImportMode.INSERT,
+        description="insert rejects existing SKUs; upsert updates those drugs",
+    ),
+    partial: bool = Query(
+        False,
+        description="Create the valid rows and report the others instead of "
+        "rejecting the whole batch (insert mode only)",
+    ),
+    drug_service: DrugService = Depends(get_drug_service),
 ):
     """Create multiple drugs in a batch"""
-    return drug_service.batch_create_drugs(drugs_data)
+    if partial:
+        if mode != ImportMode.INSERT:
+            raise HTTPException(
+                status_code=400, detail="partial is only supported in insert mode"
+            )
+        return await drug_service.batch_create_drugs_partial(rows)
+
+    try:
+        drugs_data = _drug_batch.validate_python(rows)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        )
+    if mode == ImportMode.UPSERT:
+        return await drug_service.upsert_drugs(drugs_data)
+    return await drug_service.batch_create_drugs(drugs_data)
+
+
+@router.post(
+    "/import.csv",
+    response_model=Union[DrugImportResult, DrugUpsertResult],
+    status_code=201,
+)
+async def import_drugs_csv(
+    file: UploadFile = File(..., description="CSV file with a header row"),
+    mode: ImportMode = Query(
+        ImportMode.INSERT,
+        description="insert rejects existing SKUs; upsert updates those drugs",
+    ),
+    drug_service: DrugService = Depends(get_drug_service),
+):
+    """Import drugs from an uploaded CSV file"""
+    return await drug_service.import_drugs_csv(file.file, mode)
 
 
 @router.put("/{drug_id}", response_model=DrugResponse)
@@ -91,7 +307,7 @@ async def update_drug(
     drug_service: DrugService = Depends(get_drug_service),
 ):
     """Update an existing drug"""
-    return drug_service.update_drug(drug_id, drug_data)
+    return await drug_service.update_drug(drug_id, drug_data)
 
 
 @router.delete("/{drug_id}")
@@ -99,4 +315,4 @@ async def delete_drug(
     drug_id: int, drug_service: DrugService = Depends(get_drug_service)
 ):
     """Delete a drug"""
-    return drug_service.delete_drug(drug_id)
+    return await drug_service.delete_drug(drug_id)
@@ -0,0 +1,32 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from app.schemas.drug import DrugCreate, ImportJobStatus
+from app.services.import_jobs import ImportJobManager, import_job_manager
+
+router = APIRouter()
+
+
+def get_import_job_manager() -> ImportJobManager:
+    """FastAPI dependency to get the import job manager."""
+    return import_job_manager
+
+
+@router.post("/", response_model=ImportJobStatus, status_code=202)
+async def submit_import(
+    drugs_data: List[DrugCreate],
+    idempotency_key: Optional[str] = Header(None),
+    manager: ImportJobManager = Depends(get_import_job_manager),
+):
+    """Queue a batch of drugs for import in the background"""
+    return await manager.submit(drugs_data, idempotency_key)
+
+
+@router.get("/{job_id}", response_model=ImportJobStatus)
+async def get_import(
+    job_id: str, manager: ImportJobManager = Depends(get_import_job_manager)
+):
+    """Get the progress of an import job"""
+    job = await manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
@@ -0,0 +1,15 @@
+from .backend import (
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    cache_backend,
+    create_cache_backend,
+)
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCacheBackend",
+    "RedisCacheBackend",
+    "cache_backend",
+    "create_cache_backend",
+]
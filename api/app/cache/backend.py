@@ -0,0 +1,197 @@
+"""Key-value backends for the API's caches.
+
+``CACHE_URL`` selects the backend: unset (or ``memory://``) keeps entries in
+this process, while a ``redis://`` URL shares them between every worker and
+container using the same Redis server.
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+CACHE_URL = os.getenv("CACHE_URL", "")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+class CacheBackend(ABC):
+    """Byte values stored under string keys, with optional expiry."""
+
+    name: str
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get the value of key, or None if it is missing or expired."""
+        pass
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Get the values of keys, in order, all read at the same moment."""
+        return [await self.get(key) for key in keys]
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: bytes, ttl_seconds: Optional[float] = None
+    ) -> None:
+        """Store value under key, replacing any previous value."""
+        pass
+
+    @abstractmethod
+    async def add(
+        self, key: str, value: bytes, ttl_seconds: Optional[float] = None
+    ) -> bool:
+        """Store value only if key is not set; returns whether it was stored."""
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove key if it is set."""
+        pass
+
+    @abstractmethod
+    async def stats(self) -> dict[str, Optional[int]]:
+        """Get the number of stored entries and of entries evicted for space."""
+        pass
+
+    async def close(self) -> None:
+        """Release connections held by the backend."""
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """LRU dictionary private to this process, bounded to max_entries."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    async def set(
+        self, key: str, value: bytes, ttl_seconds: Optional[float] = None
+    ) -> None:
+        with self._lock:
+            self._store(key, value, ttl_seconds)
+
+    async def add(
+        self, key: str, value: bytes, ttl_seconds: Optional[float] = None
+    ) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[0]:
+                return False
+            self._store(key, value, ttl_seconds)
+            return True
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def stats(self) -> dict[str, Optional[int]]:
+        return {"size": len(self._entries), "evictions": self.evictions}
+
+    def clear(self) -> None:
+        """Drop every entry and zero the eviction count"""
+        with self._lock:
+            self._entries.clear()
+            self.evictions = 0
+
+    def _store(self, key: str, value: bytes, ttl_seconds: Optional[float]) -> None:
+        expires_at = float("inf")
+        if ttl_seconds is not None:
+            expires_at = time.monotonic() + ttl_seconds
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class RedisCacheBackend(CacheBackend):
+    """Entries kept in Redis (or a server speaking its protocol).
+
+    Takes a ``redis.asyncio`` client, or anything with the same interface,
+    such as ``fakeredis.FakeAsyncRedis`` in tests.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_URL needs the redis package") from e
+        return cls(Redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self.client.mget(keys)
+
+    async def set(
+        self, key: str, value: bytes, ttl_seconds: Optional[float] = None
+    ) -> None:
+        await self.client.set(key, value, px=_milliseconds(ttl_seconds))
+
+    async def add(
+        self, key: str, value: bytes, ttl_seconds: Optional[float] = None
+    ) -> bool:
+        stored = await self.client.set(
+            key, value, px=_milliseconds(ttl_seconds), nx=True
+        )
+        return bool(stored)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def stats(self) -> dict[str, Optional[int]]:
+        size = await self.client.dbsize()
+        try:
+            info = await self.client.info("stats")
+        except Exception:
+            # Some managed servers and emulators do not allow INFO
+            info = {}
+        return {
+            "size": size,
+            "evictions": info.get("evicted_keys"),
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def _milliseconds(seconds: Optional[float]) -> Optional[int]:
+    return None if seconds is None else max(1, int(seconds * 1000))
+
+
+def create_cache_backend(url: str = CACHE_URL) -> CacheBackend:
+    """Create the backend selected by a CACHE_URL value"""
+    if not url or url.startswith("memory://"):
+        return MemoryCacheBackend()
+    if url.startswith(REDIS_SCHEMES):
+        return RedisCacheBackend.from_url(url)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+cache_backend = create_cache_backend()
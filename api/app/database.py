@@ -1,28 +1,154 @@
+from alembic import command
+from alembic.config import Config
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.monitoring.pool import InstrumentedAsyncPool
+import itertools
 import os
 
+MIGRATIONS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"
+)
+
 DATABASE_URL = os.getenv(
     "DATABASE_URL", "postgresql://pharmatrack:pharmatrack_password@db:5432/pharmatrack"
 )
 
-engine = create_engine(DATABASE_URL)
+# Read replicas for GET requests, separated by spaces. Sessions are spread
+# across them in turn; with none set, reads use DATABASE_URL.
+DATABASE_READ_URLS = os.getenv("DATABASE_READ_URL", "").split()
+
+# How long reads stay on the primary after a write. Set above the worst
+# replication lag so nothing reads a replica that has not seen the write yet.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Translate a DATABASE_URL into the equivalent async driver URL"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Unsupported database backend: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
+# Connections held per worker: up to DB_POOL_SIZE kept open plus
+# DB_MAX_OVERFLOW opened under load. Size against the server's
+# max_connections across every worker and replica.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+def get_pool_options(database_url: str) -> dict:
+    """Engine keyword arguments for the DB_POOL_* settings.
+
+    An in-memory SQLite database lives in a single connection, so it keeps
+    SQLAlchemy's static pool and takes no sizing.
+    """
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    return {
+        **options,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+def get_async_pool_options(database_url: str) -> dict:
+    """Pool options for the async engine, which times its checkouts"""
+    options = get_pool_options(database_url)
+    if "pool_size" in options:
+        options["poolclass"] = InstrumentedAsyncPool
+    return options
+
+
+engine = create_engine(DATABASE_URL, **get_pool_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **get_async_pool_options(DATABASE_URL)
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+read_engines = [
+    create_async_engine(get_async_database_url(url), **get_async_pool_options(url))
+    for url in DATABASE_READ_URLS
+]
+
+ReadSessionLocals = [
+    async_sessionmaker(
+        bind=read_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    for read_engine in read_engines
+]
+
+_read_session_factories = itertools.cycle(ReadSessionLocals or [AsyncSessionLocal])
+
 Base = declarative_base()
 
 
-def get_database_session():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_database_session():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Dependency for work that outlives the request scope, such as streaming a
+    response body, and so must open and close its own session"""
+    return AsyncSessionLocal
+
+
+def get_read_session_factory() -> async_sessionmaker:
+    """Dependency for the session factory of the next read replica, or of the
+    primary when no replica is configured"""
+    return next(_read_session_factories)
+
+
+def run_migrations(connection):
+    """Upgrade the schema on a connection to the latest Alembic revision"""
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_PATH)
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
 
 
 def create_tables():
-    """Create all tables in the database"""
-    Base.metadata.create_all(bind=engine)
+    """Create or upgrade all tables in the database"""
+    with engine.begin() as connection:
+        run_migrations(connection)
+
+
+async def create_tables_async():
+    """Create or upgrade all tables without blocking the event loop.
+
+    Every worker runs this on startup; on PostgreSQL the migrations take an
+    advisory lock, so concurrent workers upgrade one at a time.
+    """
+    async with async_engine.begin() as connection:
+        await connection.run_sync(run_migrations)
@@ -1,3 +1,4 @@
 from .drug import Drug
+from . import drug_search  # noqa: F401  registers search index DDL
 
 __all__ = ["Drug"]
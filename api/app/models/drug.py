@@ -1,10 +1,36 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Date, Integer, String, Float, DateTime, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from app.database import Base
 
+# SQLite fills CURRENT_TIMESTAMP without microseconds; bind datetimes in the same
+# format so keyset comparisons against stored values are exact.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+        "%(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
 
 class Drug(Base):
     __tablename__ = "drugs"
+    __table_args__ = (
+        Index("ix_drugs_created_at_id", "created_at", "id"),
+        Index("ix_drugs_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_drugs_manufacturer", "manufacturer"),
+        Index("ix_drugs_quantity", "quantity"),
+        *(
+            Index(
+                f"ix_drugs_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            ).ddl_if(dialect="postgresql")
+            for column in ("name", "generic_name", "manufacturer")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     sku = Column(String(100), nullable=True, unique=True, index=True)
@@ -12,13 +38,13 @@ class Drug(Base):
     generic_name = Column(String(100), nullable=False)
     dosage = Column(String(50), nullable=False)
     quantity = Column(Integer, nullable=False)
-    expiration_date = Column(String(10), nullable=False)
+    expiration_date = Column(Date, nullable=False, index=True)
     manufacturer = Column(String(100), nullable=False)
     price = Column(Float, nullable=False)
     category = Column(String(50), nullable=False)
     description = Column(String(500))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
 
     def __repr__(self):
         return f"<Drug(id={self.id}, name='{self.name}', quantity={self.quantity})>"
@@ -0,0 +1,55 @@
+"""Search index DDL for the drugs table.
+
+PostgreSQL gets pg_trgm GIN indexes (declared on the model) so substring ILIKE
+can use an index. SQLite gets an external-content FTS5 table with the trigram
+tokenizer, kept in sync with ``drugs`` by triggers.
+"""
+
+from sqlalchemy import DDL, event
+from app.models.drug import Drug
+
+FTS_TABLE = "drugs_fts"
+SEARCH_COLUMNS = ("name", "generic_name", "manufacturer")
+
+_columns = ", ".join(SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+POSTGRES_SETUP = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"]
+
+SQLITE_SETUP = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_columns}, content='drugs', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON drugs BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON drugs BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON drugs BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); "
+    "END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_TEARDOWN = [f"DROP TABLE IF EXISTS {FTS_TABLE}"]
+
+for statement in POSTGRES_SETUP:
+    event.listen(
+        Drug.__table__,
+        "before_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+
+for statement in SQLITE_SETUP:
+    event.listen(
+        Drug.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+
+for statement in SQLITE_TEARDOWN:
+    event.listen(
+        Drug.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite")
+    )
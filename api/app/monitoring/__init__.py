@@ -0,0 +1,30 @@
+from .histogram import LATENCY_BUCKETS, Histogram
+from .loop_lag import LoopLagMonitor, loop_lag_monitor
+from .metrics import MetricsMiddleware, record_import_rows, render_metrics
+from .profiling import ProfileStore, ProfilingMiddleware, render_profile
+from .pool import InstrumentedAsyncPool, PoolMetrics, pool_stats
+from .queries import QueryStats, current_queries, install_query_listeners, track_queries
+from .server_timing import format_server_timing, parse_server_timing, query_count
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "Histogram",
+    "LoopLagMonitor",
+    "loop_lag_monitor",
+    "MetricsMiddleware",
+    "record_import_rows",
+    "render_metrics",
+    "ProfileStore",
+    "ProfilingMiddleware",
+    "render_profile",
+    "InstrumentedAsyncPool",
+    "PoolMetrics",
+    "pool_stats",
+    "QueryStats",
+    "current_queries",
+    "install_query_listeners",
+    "track_queries",
+    "format_server_timing",
+    "parse_server_timing",
+    "query_count",
+]
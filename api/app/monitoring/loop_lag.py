@@ -0,0 +1,194 @@
+"""Event loop lag measurement and detection of blocking handlers.
+
+A task on the event loop sleeps for ``interval`` seconds at a time and records
+how late it wakes up in ``event_loop_lag_seconds``. A watchdog thread checks
+that the task keeps waking up; once the loop has been stuck for longer than
+``threshold`` seconds, it captures the loop thread's stack and the route of
+the request being served, logs them and keeps them for the diagnostics
+endpoint. The block's full length is filled in when the loop resumes.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator, List, Optional
+from prometheus_client import Counter, Histogram as PrometheusHistogram
+from starlette.types import Scope
+from app.monitoring.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Holding the loop longer than this is reported; 0 turns the monitor off
+LOOP_LAG_THRESHOLD_SECONDS = float(os.getenv("LOOP_LAG_THRESHOLD_SECONDS", "0.1"))
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_LAG_SECONDS = PrometheusHistogram(
+    "event_loop_lag_seconds",
+    "How late the event loop runs a task scheduled to wake up",
+    buckets=LAG_BUCKETS,
+)
+LOOP_BLOCKS = Counter(
+    "event_loop_blocks",
+    "Times a request held the event loop for longer than the threshold",
+    ["route"],
+)
+
+UNKNOWN_ROUTE = "unknown"
+
+# Blocks kept for the diagnostics endpoint
+MAX_REPORTS = 50
+
+
+class LoopBlock:
+    """One period in which the event loop stopped running other tasks"""
+
+    def __init__(self, route: str, stack: List[str]):
+        self.route = route
+        self.stack = stack
+        self.detected_at = datetime.now(timezone.utc)
+        self.blocked_seconds: Optional[float] = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "route": self.route,
+            "detected_at": self.detected_at,
+            "blocked_seconds": self.blocked_seconds,
+            "stack": self.stack,
+        }
+
+
+class LoopLagMonitor:
+    """Measures event loop lag and reports requests that block the loop.
+
+    Requests are attributed through ``serving``, which records the route of
+    the task serving each request. Work done in other tasks, such as a
+    streamed response body, is reported under ``unknown``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = LOOP_LAG_THRESHOLD_SECONDS,
+        interval: Optional[float] = None,
+    ):
+        self.threshold = threshold
+        self.interval = interval if interval is not None else threshold / 2
+        self.lag = Histogram(LAG_BUCKETS)
+        self.blocks: deque[LoopBlock] = deque(maxlen=MAX_REPORTS)
+        self._serving: dict[asyncio.Task, Scope] = {}
+        self._heartbeat = time.monotonic()
+        self._open_block: Optional[LoopBlock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def start(self) -> None:
+        """Start monitoring the running event loop"""
+        if not self.enabled or self._ticker is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._ticker = self._loop.create_task(self._tick())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._ticker is None:
+            return
+        self._stopped.set()
+        self._ticker.cancel()
+        try:
+            await self._ticker
+        except asyncio.CancelledError:
+            pass
+        self._ticker = None
+        self._watchdog.join()
+        self._watchdog = None
+
+    @contextmanager
+    def serving(self, scope: Scope) -> Iterator[None]:
+        """Attribute blocks in the current task to the request in scope"""
+        if self._ticker is None:
+            yield
+            return
+        task = asyncio.current_task()
+        self._serving[task] = scope
+        try:
+            yield
+        finally:
+            self._serving.pop(task, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threshold_seconds": self.threshold,
+            "lag_seconds": self.lag.snapshot(),
+            "blocks": [block.to_dict() for block in reversed(self.blocks)],
+        }
+
+    def reset(self) -> None:
+        self.lag.reset()
+        self.blocks.clear()
+
+    async def _tick(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self.lag.observe(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            block, self._open_block = self._open_block, None
+            if block is not None:
+                block.blocked_seconds = lag
+                logger.warning(
+                    "Event loop was blocked for %.3fs by %s", lag, block.route
+                )
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled > self.threshold and self._open_block is None:
+                self._report_block()
+
+    def _report_block(self) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame) if frame is not None else []
+        block = LoopBlock(self._blocking_route(), stack)
+        self._open_block = block
+        self.blocks.append(block)
+        LOOP_BLOCKS.labels(block.route).inc()
+        logger.warning(
+            "Event loop blocked for over %.3fs by %s:\n%s",
+            self.threshold,
+            block.route,
+            "".join(stack),
+        )
+
+    def _blocking_route(self) -> str:
+        # Read from this thread while the loop thread is stuck in the task
+        task = asyncio.current_task(self._loop)
+        scope = self._serving.get(task)
+        if scope is None:
+            return UNKNOWN_ROUTE
+        route = scope.get("route")
+        return getattr(route, "path", UNKNOWN_ROUTE)
+
+
+loop_lag_monitor = LoopLagMonitor()
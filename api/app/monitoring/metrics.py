@@ -0,0 +1,140 @@
+"""Prometheus metrics for the API.
+
+``MetricsMiddleware`` times every HTTP request by route template and status
+and counts the statements it sends to the database. Imports record the rows
+they process, so their throughput is ``rate(drug_import_rows_total[5m])``.
+
+When ``server_timing`` is on, the middleware also reports each request's
+database use to the client in a Server-Timing header.
+
+With several worker processes, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory shared by the workers so that ``/metrics`` adds up all of them.
+"""
+
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.monitoring.histogram import LATENCY_BUCKETS
+from app.monitoring.loop_lag import LoopLagMonitor, loop_lag_monitor
+from app.monitoring.queries import track_queries
+from app.monitoring.server_timing import SERVER_TIMING, format_server_timing
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve an HTTP request, including its response body",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served",
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements sent to the database per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in the database per HTTP request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+IMPORT_ROWS = Counter(
+    "drug_import_rows",
+    "Drug rows processed by batch requests, CSV imports and import jobs",
+    ["source", "outcome"],
+)
+IMPORT_SECONDS = Histogram(
+    "drug_import_write_seconds",
+    "Time spent writing one batch, CSV import or import job chunk",
+    ["source"],
+    buckets=LATENCY_BUCKETS,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_name(scope: Scope) -> str:
+    """Get the path template of the route that served a request.
+
+    Templates keep the label set bounded; paths that matched no route are
+    grouped together.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+def record_import_rows(source: str, **outcomes: int) -> None:
+    """Count the rows of one import by outcome, e.g. created=10, rejected=2"""
+    for outcome, rows in outcomes.items():
+        if rows:
+            IMPORT_ROWS.labels(source, outcome).inc(rows)
+
+
+def render_metrics() -> bytes:
+    """Render every metric in the Prometheus text format"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, concurrency and database use of
+    every HTTP request."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = SERVER_TIMING,
+        loop_monitor: LoopLagMonitor = loop_lag_monitor,
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.loop_monitor = loop_monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", format_server_timing(queries)
+                    )
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            with track_queries() as queries, self.loop_monitor.serving(scope):
+                await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            route = route_name(scope)
+            REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(route).observe(queries.count)
+            REQUEST_DB_SECONDS.labels(route).observe(queries.seconds)
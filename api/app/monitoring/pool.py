@@ -0,0 +1,76 @@
+"""Connection pool instrumentation.
+
+``InstrumentedAsyncPool`` is the queue pool SQLAlchemy uses for async engines,
+extended to time every checkout. With the pool's own counters this shows how
+close a worker runs to its pool limit, and so how many connections each worker
+really needs out of the server's ``max_connections``.
+"""
+
+import time
+from typing import Any
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from app.monitoring.histogram import Histogram
+
+
+class PoolMetrics:
+    """Checkout waits and timeouts of one engine's pool"""
+
+    def __init__(self):
+        self.waits = Histogram()
+        self.timeouts = 0
+
+    def reset(self) -> None:
+        self.waits.reset()
+        self.timeouts = 0
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout takes.
+
+    The time covers waiting for a free connection as well as opening a new
+    one and the pre-ping, which is everything a request waits on before its
+    first statement. Metrics are carried over when the engine is disposed.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.waits.observe(time.perf_counter() - started)
+
+    def recreate(self) -> "InstrumentedAsyncPool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_stats(pool: Pool) -> dict[str, Any]:
+    """Get the occupancy and checkout metrics of a pool.
+
+    Occupancy is only known for queue pools; other pools, such as the static
+    pool of an in-memory SQLite database, report just their class.
+    """
+    stats: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # Negative until the pool has opened pool_size connections
+            overflow=max(0, pool.overflow()),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if isinstance(metrics, PoolMetrics):
+        stats.update(timeouts=metrics.timeouts, wait_seconds=metrics.waits.snapshot())
+    return stats
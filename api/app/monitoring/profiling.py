@@ -0,0 +1,144 @@
+"""Opt-in profiling of single requests.
+
+With ``ADMIN_TOKEN`` set, a request sent with that token in ``X-Admin-Token``
+and either an ``X-Profile: true`` header or a ``profile=true`` query flag runs
+under cProfile. Its response carries an ``X-Profile-Id`` header naming the
+stored profile, which can then be fetched from the diagnostics endpoints.
+
+Without ``ADMIN_TOKEN`` the middleware is not installed at all, so requests
+pay nothing for it.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import secrets
+import threading
+from typing import Any, Optional
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.cache.backend import CacheBackend, cache_backend
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_TTL_SECONDS = float(os.getenv("PROFILE_TTL_SECONDS", "3600"))
+
+# Functions listed when a profile is rendered as text
+PROFILE_TEXT_LINES = 60
+
+# cProfile hooks the whole interpreter, so only one request is profiled at a time
+_profiling = threading.Lock()
+
+
+def is_admin_token(token: Optional[str], admin_token: str = ADMIN_TOKEN) -> bool:
+    """Whether token is the configured admin token; never true without one"""
+    return bool(admin_token and token) and secrets.compare_digest(token, admin_token)
+
+
+class _LoadedStats:
+    """Stats in the shape pstats.Stats loads from a profiler"""
+
+    def __init__(self, stats: dict[Any, Any]):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class ProfileStore:
+    """Profiles kept in a cache backend as pstats data, for ttl_seconds.
+
+    With a shared backend a profile can be fetched from any worker.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend = cache_backend,
+        ttl_seconds: float = PROFILE_TTL_SECONDS,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    async def save(self, profile_id: str, profiler: cProfile.Profile) -> None:
+        profiler.create_stats()
+        await self.backend.set(
+            self._key(profile_id), marshal.dumps(profiler.stats), self.ttl_seconds
+        )
+
+    async def load(self, profile_id: str) -> Optional[bytes]:
+        """Get a profile in the pstats file format, as ``pstats.Stats`` reads"""
+        return await self.backend.get(self._key(profile_id))
+
+    def _key(self, profile_id: str) -> str:
+        return f"profile:{profile_id}"
+
+
+profile_store = ProfileStore()
+
+
+def render_profile(data: bytes, lines: int = PROFILE_TEXT_LINES) -> str:
+    """Render pstats data as text, slowest cumulative time first"""
+    output = io.StringIO()
+    stats = pstats.Stats(_LoadedStats(marshal.loads(data)), stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(lines)
+    return output.getvalue()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running requests that ask for it under cProfile.
+
+    The profile covers the request until its last body message and is stored
+    before that message is sent, so it can be fetched as soon as the
+    response arrives. Other requests served by the event loop meanwhile are
+    included too; profile on a quiet worker for a clean picture. A request
+    arriving while another is profiled runs normally, without X-Profile-Id.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        admin_token: str = ADMIN_TOKEN,
+        store: ProfileStore = profile_store,
+    ):
+        self.app = app
+        self.admin_token = admin_token
+        self.store = store
+
+    def _requested(self, scope: Scope) -> bool:
+        headers = Headers(scope=scope)
+        if not is_admin_token(headers.get("x-admin-token"), self.admin_token):
+            return False
+        if headers.get("x-profile", "").lower() == "true":
+            return True
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        return query.get("profile", [""])[-1].lower() == "true"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _profiling.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = secrets.token_hex(8)
+        profiler = cProfile.Profile()
+
+        async def send_profiled(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            elif message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                profiler.disable()
+                await self.store.save(profile_id, profiler)
+            await send(message)
+
+        try:
+            profiler.enable()
+            await self.app(scope, receive, send_profiled)
+        finally:
+            profiler.disable()
+            _profiling.release()
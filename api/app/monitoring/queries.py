@@ -0,0 +1,71 @@
+"""Per-request accounting of the SQL statements sent to the database.
+
+``track_queries`` starts a ``QueryStats`` for the current context; while it is
+active, every statement run by any engine in that context is counted and
+timed through SQLAlchemy's cursor events. Statements run outside a tracked
+context, such as those of background import workers, are not counted.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """Statement count, total time and slowest statement of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+_current_queries: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_queries", default=None
+)
+
+
+def current_queries() -> Optional[QueryStats]:
+    """Get the QueryStats being recorded in this context, if any"""
+    return _current_queries.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Record the statements run in this context until the block exits"""
+    stats = QueryStats()
+    token = _current_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_queries.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    stats = _current_queries.get()
+    started = getattr(context, "query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install_query_listeners() -> None:
+    """Listen to the cursor events of every engine, sync and async"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
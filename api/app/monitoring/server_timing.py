@@ -0,0 +1,72 @@
+"""Server-Timing header describing a request's database use.
+
+The header carries two metrics, readable in browser developer tools:
+
+    Server-Timing: db;dur=4.210;desc="3 queries", db-slowest;dur=2.004;desc="SELECT ..."
+
+It is sent with the response head, so statements run while a streamed body
+is being sent are not included.
+"""
+
+import os
+import re
+from typing import Optional
+from app.monitoring.queries import QueryStats
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Statements are shortened to keep response heads small
+MAX_STATEMENT_LENGTH = 200
+
+_ENTRY = re.compile(r'^\s*([\w-]+)((?:;\s*\w+=(?:"(?:[^"\\]|\\.)*"|[^;,]*))*)')
+_PARAM = re.compile(r';\s*(\w+)=("(?:[^"\\]|\\.)*"|[^;,]*)')
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _unquote(value: str) -> str:
+    if value.startswith('"'):
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def format_server_timing(stats: QueryStats) -> str:
+    """Render QueryStats as a Server-Timing header value"""
+    header = (
+        f"db;dur={stats.seconds * 1000:.3f};desc="
+        f'"{stats.count} {"query" if stats.count == 1 else "queries"}"'
+    )
+    if stats.slowest_statement is not None:
+        statement = " ".join(stats.slowest_statement.split())
+        if len(statement) > MAX_STATEMENT_LENGTH:
+            statement = statement[: MAX_STATEMENT_LENGTH - 3] + "..."
+        header += (
+            f", db-slowest;dur={stats.slowest_seconds * 1000:.3f};"
+            f"desc={_quote(statement)}"
+        )
+    return header
+
+
+def parse_server_timing(header: str) -> dict[str, dict[str, str]]:
+    """Split a Server-Timing header value into each metric's parameters"""
+    metrics: dict[str, dict[str, str]] = {}
+    while header:
+        match = _ENTRY.match(header)
+        if match is None:
+            break
+        metrics[match.group(1)] = {
+            name: _unquote(value.strip())
+            for name, value in _PARAM.findall(match.group(2))
+        }
+        header = header[match.end() :].lstrip().removeprefix(",")
+    return metrics
+
+
+def query_count(header: str) -> Optional[int]:
+    """Get the statement count from a Server-Timing header, if it has one"""
+    db = parse_server_timing(header).get("db")
+    if db is None or "desc" not in db:
+        return None
+    return int(db["desc"].split()[0])
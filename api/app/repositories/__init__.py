@@ -1,4 +1,5 @@
 from .drug_interface import DrugRepositoryInterface
 from .drug_repository import DrugRepository
+from .drug_cache import CachedDrugRepository
 
-__all__ = ["DrugRepositoryInterface", "DrugRepository"]
+__all__ = ["DrugRepositoryInterface", "DrugRepository", "CachedDrugRepository"]
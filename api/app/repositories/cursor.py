@@ -0,0 +1,29 @@
+"""Opaque keyset cursors for paginated drug listings."""
+
+import base64
+import json
+from datetime import date
+from typing import Any, List, Sequence
+
+
+def encode_cursor(sort: str, key: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque token."""
+    values = [value.isoformat() if isinstance(value, date) else value for value in key]
+    payload = json.dumps({"sort": sort, "key": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """Decode a token produced by encode_cursor for the same sort order.
+
+    Values come back in their JSON form; callers convert them to column types.
+    Raises ValueError if the token is malformed or was issued for another sort.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if payload["sort"] != sort or not isinstance(payload["key"], list):
+            raise ValueError("Cursor does not match the requested sort")
+        return payload["key"]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
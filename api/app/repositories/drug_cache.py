@@ -0,0 +1,360 @@
+"""Read-through cache of drug data in front of a drug repository.
+
+``CachedDrugRepository`` decorates any ``DrugRepositoryInterface``: drugs by
+id, list pages, alert lists, totals and category counts are answered from a
+``DrugCache`` and every other call is passed straight through.
+
+Keys of lists, totals and counts embed the drugs table version, which
+``DrugRepository`` replaces on every committed write. Once any worker writes,
+entries stored before the write can no longer be found and age out of the
+backend by their TTL.
+
+Drugs by id are keyed by id alone, so writes to other drugs leave them in
+place: updates overwrite the entry and deletes replace it with a tombstone.
+Upserts change drugs without naming them and replace the generation embedded
+in those keys.
+"""
+
+import hashlib
+import os
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+import orjson
+from app.cache.backend import CacheBackend, cache_backend
+from app.models.drug import Drug
+from app.repositories.drug_interface import DrugRepositoryInterface
+from app.repositories.table_version import (
+    TableVersion,
+    drug_rows_version,
+    drug_table_version,
+)
+from app.schemas.drug import DrugCreate, DrugFilters, DrugUpdate
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+# Deleted drugs stay unfillable this long, which must outlast any read that
+# loaded the drug before it was deleted
+DRUG_TOMBSTONE_SECONDS = 30.0
+
+# Stored in place of a deleted drug; no encoded row is empty
+_TOMBSTONE = b""
+
+_DRUG_COLUMNS = tuple(column.key for column in Drug.__table__.columns)
+_TEMPORAL_COLUMNS = {
+    "expiration_date": date.fromisoformat,
+    "created_at": datetime.fromisoformat,
+    "updated_at": datetime.fromisoformat,
+}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default)
+
+
+def decode_row(row: dict[str, Any]) -> dict[str, Any]:
+    """Restore the date and datetime values of a cached drug row"""
+    for column, parse in _TEMPORAL_COLUMNS.items():
+        if row.get(column) is not None:
+            row[column] = parse(row[column])
+    return row
+
+
+def drug_to_row(drug: Drug) -> dict[str, Any]:
+    return {column: getattr(drug, column) for column in _DRUG_COLUMNS}
+
+
+class DrugCache:
+    """Drug entries in a cache backend, every one expiring after ttl_seconds.
+
+    Query results are keyed under the drugs table version: a read that raced
+    a write is stored under the version it started with, so it is never
+    served. Single drugs are keyed by id under the rows version; a read only
+    fills a missing entry, under the rows version it looked up, so it cannot
+    overwrite the row stored by a later update, nor the tombstone left by a
+    later delete. The last rows version seen is remembered, so a drug and
+    the current rows version are read together, in one round trip, until the
+    version changes. Hits and misses are counted per process.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend = cache_backend,
+        version: TableVersion = drug_table_version,
+        ttl_seconds: float = CACHE_TTL_SECONDS,
+        rows_version: TableVersion = drug_rows_version,
+        tombstone_seconds: float = DRUG_TOMBSTONE_SECONDS,
+    ):
+        self.backend = backend
+        self.version = version
+        self.rows_version = rows_version
+        self.ttl_seconds = ttl_seconds
+        self.tombstone_seconds = tombstone_seconds
+        self.hits = 0
+        self.misses = 0
+        self._rows_token: Optional[str] = None
+
+    async def get(self, kind: str, key: str, version: str) -> Optional[Any]:
+        return self._count(await self.backend.get(self._key(kind, key, version)))
+
+    async def get_drug(self, drug_id: int) -> tuple[Optional[dict[str, Any]], str]:
+        """Get a drug's cached row and the rows version it was looked up under"""
+        rows_token = self._rows_token
+        if rows_token is not None:
+            current, value = await self.backend.get_many(
+                [self.rows_version.key, self._drug_key(rows_token, drug_id)]
+            )
+            if current is not None and current.decode() == rows_token:
+                return self._count(value), rows_token
+
+        # First lookup, or the rows version changed or expired since the last
+        rows_token = self._rows_token = await self.rows_version.get()
+        value = await self.backend.get(self._drug_key(rows_token, drug_id))
+        return self._count(value), rows_token
+
+    async def fill_drug(
+        self, drug_id: int, row: dict[str, Any], rows_token: str
+    ) -> None:
+        """Store a drug's row read after get_drug missed under rows_token,
+        unless a write has stored or dropped the drug since"""
+        await self.backend.add(
+            self._drug_key(rows_token, drug_id), encode(row), self.ttl_seconds
+        )
+
+    async def put_drug(self, drug_id: int, row: dict[str, Any]) -> None:
+        """Store a drug's row as written, replacing any stored one"""
+        key = self._drug_key(await self.rows_version.get(), drug_id)
+        await self.backend.set(key, encode(row), self.ttl_seconds)
+
+    async def drop_drug(self, drug_id: int) -> None:
+        """Leave a tombstone for a deleted drug, which reads take for a miss"""
+        key = self._drug_key(await self.rows_version.get(), drug_id)
+        await self.backend.set(key, _TOMBSTONE, self.tombstone_seconds)
+
+    async def put(self, kind: str, key: str, version: str, value: Any) -> bytes:
+        data = encode(value)
+        await self.backend.set(self._key(kind, key, version), data, self.ttl_seconds)
+        return data
+
+    async def read_through(
+        self,
+        kind: str,
+        key: str,
+        load: Callable[[], Awaitable[Any]],
+        fill: bool = True,
+    ) -> Any:
+        """Get a cached value, loading it on a miss and storing it if fill.
+
+        The value is returned as decoded from JSON either way.
+        """
+        version = await self.version.get()
+        value = await self.get(kind, key, version)
+        if value is None:
+            loaded = await load()
+            if fill:
+                value = orjson.loads(await self.put(kind, key, version, loaded))
+            else:
+                value = orjson.loads(encode(loaded))
+        return value
+
+    async def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            **await self.backend.stats(),
+        }
+
+    def reset(self) -> None:
+        """Zero the hit and miss counts"""
+        self.hits = self.misses = 0
+
+    def _count(self, value: Optional[bytes]) -> Optional[Any]:
+        if value is None or value == _TOMBSTONE:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return orjson.loads(value)
+
+    def _key(self, kind: str, key: str, version: str) -> str:
+        return f"drugs:{version}:{kind}:{key}"
+
+    def _drug_key(self, rows_token: str, drug_id: int) -> str:
+        return f"drug:{rows_token}:{drug_id}"
+
+
+drug_cache = DrugCache()
+
+
+class CachedDrugRepository(DrugRepositoryInterface):
+    """Serves repeated reads from a DrugCache.
+
+    Invalidation relies on the wrapped repository replacing the table version
+    on each write, as DrugRepository does. Drugs are returned from the cache as
+    new objects that belong to no session. Without fill, cached values are
+    still served but nothing read is stored, for reads that may be stale.
+    """
+
+    def __init__(
+        self,
+        repository: DrugRepositoryInterface,
+        cache: DrugCache = drug_cache,
+        fill: bool = True,
+    ):
+        self.repository = repository
+        self.cache = cache
+        self.fill = fill
+
+    async def get_by_id(self, drug_id: int) -> Optional[Drug]:
+        row, rows_token = await self.cache.get_drug(drug_id)
+        if row is not None:
+            return Drug(**decode_row(row))
+
+        drug = await self.repository.get_by_id(drug_id)
+        if drug is not None and self.fill:
+            await self.cache.fill_drug(drug_id, drug_to_row(drug), rows_token)
+        return drug
+
+    async def update(self, drug_id: int, drug_data: DrugUpdate) -> Optional[Drug]:
+        drug = await self.repository.update(drug_id, drug_data)
+        if drug is not None:
+            # Edited drugs are usually read again right away
+            await self.cache.put_drug(drug_id, drug_to_row(drug))
+        return drug
+
+    async def delete(self, drug_id: int) -> bool:
+        deleted = await self.repository.delete(drug_id)
+        if deleted:
+            await self.cache.drop_drug(drug_id)
+        return deleted
+
+    async def find_rows(
+        self,
+        filters: DrugFilters,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Mapping[str, Any]], Optional[str]]:
+        async def load() -> dict[str, Any]:
+            rows, next_cursor = await self.repository.find_rows(filters, limit, cursor)
+            return {"rows": rows, "next_cursor": next_cursor}
+
+        request = encode([filters.model_dump(mode="json"), limit, cursor])
+        page = await self.cache.read_through(
+            "page", hashlib.sha256(request).hexdigest(), load, self.fill
+        )
+        return [decode_row(row) for row in page["rows"]], page["next_cursor"]
+
+    async def get_low_stock_rows(self, threshold: int) -> List[Mapping[str, Any]]:
+        rows = await self.cache.read_through(
+            "low_stock",
+            str(threshold),
+            lambda: self.repository.get_low_stock_rows(threshold),
+            self.fill,
+        )
+        return [decode_row(row) for row in rows]
+
+    async def get_expiring_rows(
+        self, start: date, end: date
+    ) -> List[Mapping[str, Any]]:
+        rows = await self.cache.read_through(
+            "expiring",
+            f"{start}:{end}",
+            lambda: self.repository.get_expiring_rows(start, end),
+            self.fill,
+        )
+        return [decode_row(row) for row in rows]
+
+    async def get_category_counts(self) -> List[tuple[str, int]]:
+        counts = await self.cache.read_through(
+            "categories", "counts", self.repository.get_category_counts, self.fill
+        )
+        return [(category, count) for category, count in counts]
+
+    async def get_all(self) -> List[Drug]:
+        return await self.repository.get_all()
+
+    async def get_by_sku(self, sku: str) -> Optional[Drug]:
+        return await self.repository.get_by_sku(sku)
+
+    async def create(self, drug_data: DrugCreate) -> Drug:
+        return await self.repository.create(drug_data)
+
+    def stream_all(self, batch_size: int) -> AsyncIterator[List[Mapping[str, Any]]]:
+        return self.repository.stream_all(batch_size)
+
+    async def search(self, query: str) -> List[Drug]:
+        return await self.repository.search(query)
+
+    async def filter_by_category(self, category: str) -> List[Drug]:
+        return await self.repository.filter_by_category(category)
+
+    async def get_low_stock(self, threshold: int = 100) -> List[Drug]:
+        return await self.repository.get_low_stock(threshold)
+
+    async def get_expiring(self, start: date, end: date) -> List[Drug]:
+        return await self.repository.get_expiring(start, end)
+
+    async def exists(self, sku: str) -> bool:
+        return await self.repository.exists(sku)
+
+    async def batch_create(self, drugs_data: List[DrugCreate]) -> List[Drug]:
+        return await self.repository.batch_create(drugs_data)
+
+    async def batch_create_partial(
+        self, drugs_data: List[DrugCreate]
+    ) -> List[Optional[Drug]]:
+        return await self.repository.batch_create_partial(drugs_data)
+
+    async def import_drugs(
+        self,
+        chunks: AsyncIterator[List[tuple[int, DrugCreate]]],
+        upsert: bool = False,
+    ) -> tuple[int, int]:
+        counts = await self.repository.import_drugs(chunks, upsert)
+        if upsert:
+            await self.cache.rows_version.bump()
+        return counts
+
+    async def upsert(self, drugs_data: List[DrugCreate]) -> tuple[int, int]:
+        counts = await self.repository.upsert(drugs_data)
+        await self.cache.rows_version.bump()
+        return counts
+
+    async def check_existing_skus(self, skus: List[str]) -> List[str]:
+        return await self.repository.check_existing_skus(skus)
+
+    async def get_stats(
+        self, low_stock_threshold: int, expiring_start: date, expiring_end: date
+    ) -> dict[str, Any]:
+        return await self.cache.read_through(
+            "stats",
+            f"{low_stock_threshold}:{expiring_start}:{expiring_end}",
+            lambda: self.repository.get_stats(
+                low_stock_threshold, expiring_start, expiring_end
+            ),
+            self.fill,
+        )
+
+    async def get_paginated(
+        self, page: int = 1, page_size: int = 50
+    ) -> tuple[List[Drug], int]:
+        return await self.repository.get_paginated(page, page_size)
+
+    async def find(
+        self,
+        filters: DrugFilters,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Drug], Optional[str]]:
+        return await self.repository.find(filters, limit, cursor)
+
+    async def search_paginated(
+        self, query: str, page: int = 1, page_size: int = 50
+    ) -> tuple[List[Drug], int]:
+        return await self.repository.search_paginated(query, page, page_size)
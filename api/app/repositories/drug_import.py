@@ -0,0 +1,138 @@
+"""Staging table for bulk drug imports.
+
+Rows are loaded into a temporary table first (with COPY on PostgreSQL), checked
+for SKU conflicts with one set-based query, and merged into ``drugs`` with a
+single INSERT ... SELECT. The staging table lives only for the import's
+transaction and is not part of the application schema.
+"""
+
+from typing import List
+from sqlalchemy import (
+    Column,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    exists,
+    insert,
+    or_,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.models.drug import Drug
+from app.repositories.drug_upsert import build_upsert, count_upserted
+from app.schemas.drug import DrugCreate, RowError
+
+STAGING_TABLE = "drug_import_staging"
+IMPORT_COLUMNS = tuple(DrugCreate.model_fields)
+MAX_IMPORT_ERRORS = 100
+
+drug_import_staging = Table(
+    STAGING_TABLE,
+    MetaData(),
+    Column("source_row", Integer, nullable=False),
+    *(Column(name, Drug.__table__.c[name].type) for name in IMPORT_COLUMNS),
+    Index(f"ix_{STAGING_TABLE}_sku", "sku"),
+    prefixes=["TEMPORARY"],
+)
+
+
+class DrugImportError(ValueError):
+    """Raised when staged rows cannot be merged; nothing is imported."""
+
+    def __init__(self, errors: List[RowError]):
+        super().__init__(f"{len(errors)} rows cannot be imported")
+        self.errors = errors
+
+
+class DrugImportStaging:
+    """Loads validated rows into the staging table and merges them."""
+
+    def __init__(self, connection: AsyncConnection):
+        self.connection = connection
+
+    async def create(self) -> None:
+        await self.connection.run_sync(drug_import_staging.drop, checkfirst=True)
+        await self.connection.run_sync(drug_import_staging.create)
+
+    async def drop(self) -> None:
+        await self.connection.run_sync(drug_import_staging.drop)
+
+    async def load(self, rows: List[tuple[int, DrugCreate]]) -> None:
+        """Append (source row, drug) pairs to the staging table"""
+        if not rows:
+            return
+
+        columns = ["source_row", *IMPORT_COLUMNS]
+        records = [
+            (row, *(getattr(drug, name) for name in IMPORT_COLUMNS))
+            for row, drug in rows
+        ]
+
+        if self.connection.dialect.name == "postgresql":
+            # COPY FROM STDIN through the asyncpg connection of this transaction
+            raw_connection = await self.connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                STAGING_TABLE, records=records, columns=columns
+            )
+        else:
+            await self.connection.execute(
+                insert(drug_import_staging),
+                [dict(zip(columns, record)) for record in records],
+            )
+
+    async def find_conflicts(
+        self, include_existing: bool = True, limit: int = MAX_IMPORT_ERRORS
+    ) -> List[RowError]:
+        """Rows whose SKU repeats an earlier row or, if include_existing,
+        already exists in drugs"""
+        staged = drug_import_staging
+        earlier = staged.alias("earlier")
+        duplicate = exists().where(
+            earlier.c.sku == staged.c.sku,
+            earlier.c.source_row < staged.c.source_row,
+        )
+        conflict = duplicate
+        if include_existing:
+            conflict = or_(duplicate, exists().where(Drug.sku == staged.c.sku))
+
+        result = await self.connection.execute(
+            select(staged.c.source_row, staged.c.sku, duplicate.label("duplicate"))
+            .where(conflict)
+            .order_by(staged.c.source_row)
+            .limit(limit)
+        )
+        return [
+            RowError(
+                row=row,
+                field="sku",
+                message=(
+                    f"Duplicate SKU '{sku}' in import data"
+                    if is_duplicate
+                    else f"SKU '{sku}' already exists"
+                ),
+            )
+            for row, sku, is_duplicate in result.all()
+        ]
+
+    async def merge(self, upsert: bool = False) -> tuple[int, int]:
+        """Write every staged row into drugs in file order.
+
+        With upsert, rows whose SKU exists update that drug instead. Returns
+        the number of (inserted, updated) drugs.
+        """
+        staged = drug_import_staging
+        source = select(*(staged.c[name] for name in IMPORT_COLUMNS)).order_by(
+            staged.c.source_row
+        )
+
+        if upsert:
+            result = await self.connection.execute(
+                build_upsert(self.connection.dialect.name, source=source)
+            )
+            return count_upserted(result)
+
+        result = await self.connection.execute(
+            insert(Drug.__table__).from_select(IMPORT_COLUMNS, source)
+        )
+        return result.rowcount, 0
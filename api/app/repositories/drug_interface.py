@@ -1,83 +1,191 @@
-"""Interface for drug repository operations."""
+"""Interface for drug repository operations.
+
+All operations are coroutines so that implementations can run on an async
+database driver without blocking the event loop.
+"""
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import date
+from typing import Any, AsyncIterator, List, Mapping, Optional
 from app.models.drug import Drug
-from app.schemas.drug import DrugCreate, DrugUpdate
+from app.schemas.drug import DrugCreate, DrugFilters, DrugUpdate
 
 
 class DrugRepositoryInterface(ABC):
     """Abstract interface for drug repository operations."""
 
     @abstractmethod
-    def get_all(self) -> List[Drug]:
+    async def get_all(self) -> List[Drug]:
         """Get all drugs from the database."""
         pass
 
     @abstractmethod
-    def get_by_id(self, drug_id: int) -> Optional[Drug]:
+    async def get_by_id(self, drug_id: int) -> Optional[Drug]:
         """Get a drug by ID."""
         pass
 
     @abstractmethod
-    def get_by_sku(self, sku: str) -> Optional[Drug]:
+    async def get_by_sku(self, sku: str) -> Optional[Drug]:
         """Get a drug by SKU."""
         pass
 
     @abstractmethod
-    def create(self, drug_data: DrugCreate) -> Drug:
+    async def create(self, drug_data: DrugCreate) -> Drug:
         """Create a new drug."""
         pass
 
     @abstractmethod
-    def update(self, drug_id: int, drug_data: DrugUpdate) -> Optional[Drug]:
+    def stream_all(self, batch_size: int) -> AsyncIterator[List[Mapping[str, Any]]]:
+        """Yield every drug as a column mapping, batch_size rows at a time.
+
+        Rows are read through a server-side cursor in id order, so memory is
+        bounded by one batch however large the table is.
+        """
+        pass
+
+    @abstractmethod
+    async def update(self, drug_id: int, drug_data: DrugUpdate) -> Optional[Drug]:
         """Update an existing drug."""
         pass
 
     @abstractmethod
-    def delete(self, drug_id: int) -> bool:
+    async def delete(self, drug_id: int) -> bool:
         """Delete a drug by ID."""
         pass
 
     @abstractmethod
-    def search(self, query: str) -> List[Drug]:
+    async def search(self, query: str) -> List[Drug]:
         """Search drugs by name, generic name, or manufacturer."""
         pass
 
     @abstractmethod
-    def filter_by_category(self, category: str) -> List[Drug]:
+    async def filter_by_category(self, category: str) -> List[Drug]:
         """Filter drugs by category."""
         pass
 
     @abstractmethod
-    def get_low_stock(self, threshold: int = 100) -> List[Drug]:
+    async def get_low_stock(self, threshold: int = 100) -> List[Drug]:
         """Get drugs with quantity below threshold."""
         pass
 
     @abstractmethod
-    def exists(self, sku: str) -> bool:
+    async def get_expiring(self, start: date, end: date) -> List[Drug]:
+        """Get drugs expiring between start and end inclusive, soonest first."""
+        pass
+
+    @abstractmethod
+    async def get_low_stock_rows(self, threshold: int) -> List[Mapping[str, Any]]:
+        """Like get_low_stock, as read-only column mappings."""
+        pass
+
+    @abstractmethod
+    async def get_expiring_rows(
+        self, start: date, end: date
+    ) -> List[Mapping[str, Any]]:
+        """Like get_expiring, as read-only column mappings."""
+        pass
+
+    @abstractmethod
+    async def exists(self, sku: str) -> bool:
         """Check if a drug with the given SKU already exists."""
         pass
 
     @abstractmethod
-    def batch_create(self, drugs_data: List[DrugCreate]) -> List[Drug]:
+    async def batch_create(self, drugs_data: List[DrugCreate]) -> List[Drug]:
         """Create multiple drugs efficiently in a single transaction."""
         pass
 
     @abstractmethod
-    def check_existing_skus(self, skus: List[str]) -> List[str]:
+    async def batch_create_partial(
+        self, drugs_data: List[DrugCreate]
+    ) -> List[Optional[Drug]]:
+        """Create drugs in chunked transactions, skipping rows the database rejects.
+
+        Returns the created drug, or None if it was rejected, for each input.
+        """
+        pass
+
+    @abstractmethod
+    async def import_drugs(
+        self,
+        chunks: AsyncIterator[List[tuple[int, DrugCreate]]],
+        upsert: bool = False,
+    ) -> tuple[int, int]:
+        """Bulk load streamed (source row, drug) chunks in one transaction.
+
+        With upsert, rows whose SKU exists update that drug instead of
+        conflicting. Returns the number of (inserted, updated) drugs. Raises
+        DrugImportError listing rows whose SKU repeats an earlier row or (unless
+        upserting) already exists; nothing is imported then, nor if the chunk
+        iterator raises.
+        """
+        pass
+
+    @abstractmethod
+    async def upsert(self, drugs_data: List[DrugCreate]) -> tuple[int, int]:
+        """Insert drugs or update the ones whose SKU exists, atomically.
+
+        SKUs must be unique within drugs_data. Drugs whose stored values already
+        match are left untouched. Returns the number of (inserted, updated)
+        drugs.
+        """
+        pass
+
+    @abstractmethod
+    async def check_existing_skus(self, skus: List[str]) -> List[str]:
         """Check which SKUs already exist in the database."""
         pass
 
     @abstractmethod
-    def get_paginated(
+    async def get_category_counts(self) -> List[tuple[str, int]]:
+        """Get each distinct category with its number of drugs, by name."""
+        pass
+
+    @abstractmethod
+    async def get_stats(
+        self, low_stock_threshold: int, expiring_start: date, expiring_end: date
+    ) -> dict[str, Any]:
+        """Get inventory totals in one aggregate query.
+
+        Returns total_drugs, total_stock, low_stock_count (quantity below
+        low_stock_threshold), expiring_soon_count (expiring between the two
+        dates inclusive) and inventory_value (sum of price * quantity).
+        """
+        pass
+
+    @abstractmethod
+    async def get_paginated(
         self, page: int = 1, page_size: int = 50
     ) -> tuple[List[Drug], int]:
         """Get paginated drugs with total count."""
         pass
 
     @abstractmethod
-    def search_paginated(
+    async def find(
+        self,
+        filters: DrugFilters,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Drug], Optional[str]]:
+        """Get drugs matching filters in sort order, a page at a time.
+
+        Returns the page and an opaque cursor for the next page, or None when
+        there are no more rows. Raises ValueError for an invalid cursor.
+        """
+        pass
+
+    @abstractmethod
+    async def find_rows(
+        self,
+        filters: DrugFilters,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Mapping[str, Any]], Optional[str]]:
+        """Like find, as read-only column mappings for serializing directly."""
+        pass
+
+    @abstractmethod
+    async def search_paginated(
         self, query: str, page: int = 1, page_size: int = 50
     ) -> tuple[List[Drug], int]:
         """Search drugs with pagination."""
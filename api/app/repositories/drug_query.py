@@ -0,0 +1,112 @@
+"""Composable SQL query builder for filtered, sorted and paginated drug lists."""
+
+from datetime import date, datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+from sqlalchemy import ColumnElement, Select, select, tuple_
+from app.models.drug import Drug
+from app.repositories.search import get_drug_search
+from app.schemas.drug import DrugFilters, DrugSort
+
+
+class SortOrder(NamedTuple):
+    expression: ColumnElement
+    descending: bool
+    parse: Callable[[Any], Any]
+
+
+COLUMN_SORTS = {
+    DrugSort.NEWEST: (Drug.created_at, True, datetime.fromisoformat),
+    DrugSort.OLDEST: (Drug.created_at, False, datetime.fromisoformat),
+    DrugSort.NAME: (Drug.name, False, str),
+    DrugSort.NAME_DESC: (Drug.name, True, str),
+    DrugSort.QUANTITY: (Drug.quantity, False, int),
+    DrugSort.QUANTITY_DESC: (Drug.quantity, True, int),
+    DrugSort.EXPIRATION: (Drug.expiration_date, False, date.fromisoformat),
+    DrugSort.EXPIRATION_DESC: (Drug.expiration_date, True, date.fromisoformat),
+    DrugSort.PRICE: (Drug.price, False, float),
+    DrugSort.PRICE_DESC: (Drug.price, True, float),
+}
+
+
+class DrugQueryBuilder:
+    """Builds a single SELECT combining text search, filters, ordering and
+    keyset seeking.
+
+    Every ordering ends with ``id`` in the same direction as the sort column,
+    so the pair (sort value, id) identifies a position for cursor pagination.
+    """
+
+    def __init__(self, dialect_name: str, filters: DrugFilters):
+        self.filters = filters
+        query = filters.search or ""
+        self.search = get_drug_search(dialect_name, query) if query else None
+        self.sort, self.order = self._resolve_sort()
+
+    def _resolve_sort(self) -> tuple[DrugSort, SortOrder]:
+        sort = self.filters.sort
+        if sort is None:
+            sort = DrugSort.RELEVANCE if self.search else DrugSort.NEWEST
+
+        if sort == DrugSort.RELEVANCE:
+            rank = self.search.rank(self.filters.search) if self.search else None
+            if rank is not None:
+                return sort, SortOrder(rank, False, float)
+            sort = DrugSort.NEWEST
+
+        return sort, SortOrder(*COLUMN_SORTS[sort])
+
+    def parse_key(self, raw_key: Sequence[Any]) -> tuple[Any, int]:
+        """Convert a decoded cursor key back into typed column values."""
+        value, drug_id = raw_key
+        return self.order.parse(value), int(drug_id)
+
+    def build(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[tuple[Any, int]] = None,
+        plain: bool = False,
+    ) -> Select:
+        """Select (Drug, sort value) rows matching the filters, in sort order.
+
+        With plain, the drug's table columns are selected instead of the ORM
+        entity, followed by the sort value.
+        """
+        drug = Drug.__table__ if plain else Drug
+        statement = select(drug, self.order.expression.label("sort_value"))
+
+        if self.search:
+            statement = self.search.apply(statement, self.filters.search)
+        statement = statement.where(*self._conditions())
+
+        if after is not None:
+            position = tuple_(self.order.expression, Drug.id)
+            if self.order.descending:
+                statement = statement.where(position < after)
+            else:
+                statement = statement.where(position > after)
+
+        if self.order.descending:
+            statement = statement.order_by(self.order.expression.desc(), Drug.id.desc())
+        else:
+            statement = statement.order_by(self.order.expression, Drug.id)
+
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
+
+    def _conditions(self) -> List[ColumnElement[bool]]:
+        filters = self.filters
+        conditions = []
+        if filters.category and filters.category != "All":
+            conditions.append(Drug.category == filters.category)
+        if filters.manufacturer:
+            conditions.append(Drug.manufacturer == filters.manufacturer)
+        if filters.min_quantity is not None:
+            conditions.append(Drug.quantity >= filters.min_quantity)
+        if filters.max_quantity is not None:
+            conditions.append(Drug.quantity <= filters.max_quantity)
+        if filters.expires_after is not None:
+            conditions.append(Drug.expiration_date >= filters.expires_after)
+        if filters.expires_before is not None:
+            conditions.append(Drug.expiration_date <= filters.expires_before)
+        return conditions
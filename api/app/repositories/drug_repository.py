@@ -1,91 +1,184 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from datetime import date
+from typing import Any, AsyncIterator, List, Mapping, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, Select, func, insert, select
+from sqlalchemy.exc import IntegrityError
 from app.models.drug import Drug
-from app.schemas.drug import DrugCreate, DrugUpdate
+from app.schemas.drug import DrugCreate, DrugFilters, DrugUpdate
+from app.repositories.cursor import decode_cursor, encode_cursor
+from app.repositories.drug_import import DrugImportError, DrugImportStaging
 from app.repositories.drug_interface import DrugRepositoryInterface
+from app.repositories.drug_query import DrugQueryBuilder
+from app.repositories.drug_upsert import build_upsert, count_upserted
+from app.repositories.search import get_drug_search
+from app.repositories.table_version import TableVersion, drug_table_version
+
+# Rows per INSERT statement in batch_create; bounds statement size and the
+# number of bound parameters regardless of how large the batch is.
+BATCH_INSERT_CHUNK_SIZE = 1000
 
 
 class DrugRepository(DrugRepositoryInterface):
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, version: TableVersion = drug_table_version):
         self.db = db
+        self.version = version
 
-    def get_all(self) -> List[Drug]:
+    async def get_all(self) -> List[Drug]:
         """Get all drugs from the database"""
-        return self.db.query(Drug).order_by(Drug.created_at.desc()).all()
+        result = await self.db.execute(select(Drug).order_by(Drug.created_at.desc()))
+        return list(result.scalars().all())
 
-    def get_by_id(self, drug_id: int) -> Optional[Drug]:
+    async def get_by_id(self, drug_id: int) -> Optional[Drug]:
         """Get a drug by ID"""
-        return self.db.query(Drug).filter(Drug.id == drug_id).first()
+        return await self.db.get(Drug, drug_id)
 
-    def get_by_sku(self, sku: str) -> Optional[Drug]:
+    async def get_by_sku(self, sku: str) -> Optional[Drug]:
         """Get a drug by SKU"""
-        return self.db.query(Drug).filter(Drug.sku == sku).first()
+        result = await self.db.execute(select(Drug).where(Drug.sku == sku))
+        return result.scalars().first()
 
-    def get_by_name(self, name: str) -> Optional[Drug]:
+    async def get_by_name(self, name: str) -> Optional[Drug]:
         """Get a drug by name"""
-        return self.db.query(Drug).filter(Drug.name == name).first()
+        result = await self.db.execute(select(Drug).where(Drug.name == name))
+        return result.scalars().first()
 
-    def search(self, query: str) -> List[Drug]:
+    async def search(self, query: str) -> List[Drug]:
         """Search drugs by name, generic name, or manufacturer"""
-        search_pattern = f"%{query}%"
-        return (
-            self.db.query(Drug)
-            .filter(
-                or_(
-                    Drug.name.ilike(search_pattern),
-                    Drug.generic_name.ilike(search_pattern),
-                    Drug.manufacturer.ilike(search_pattern),
-                )
-            )
-            .order_by(Drug.created_at.desc())
-            .all()
-        )
+        drugs, _ = await self.find(DrugFilters(search=query))
+        return drugs
 
-    def filter_by_category(self, category: str) -> List[Drug]:
+    async def filter_by_category(self, category: str) -> List[Drug]:
         """Filter drugs by category"""
-        return self.db.query(Drug).filter(Drug.category == category).all()
+        result = await self.db.execute(select(Drug).where(Drug.category == category))
+        return list(result.scalars().all())
 
-    def get_low_stock(self, threshold: int = 100) -> List[Drug]:
+    async def get_low_stock(self, threshold: int = 100) -> List[Drug]:
         """Get drugs with quantity below threshold"""
-        return self.db.query(Drug).filter(Drug.quantity < threshold).all()
+        result = await self.db.execute(select(Drug).where(Drug.quantity < threshold))
+        return list(result.scalars().all())
+
+    async def get_low_stock_rows(self, threshold: int) -> List[Mapping[str, Any]]:
+        """Get drugs with quantity below threshold without loading ORM objects"""
+        result = await self.db.execute(
+            select(Drug.__table__).where(Drug.quantity < threshold)
+        )
+        return list(result.mappings().all())
+
+    async def get_expiring(self, start: date, end: date) -> List[Drug]:
+        """Get drugs expiring between start and end inclusive, soonest first"""
+        result = await self.db.execute(self._expiring_query(Drug, start, end))
+        return list(result.scalars().all())
 
-    def create(self, drug_data: DrugCreate) -> Drug:
+    async def get_expiring_rows(
+        self, start: date, end: date
+    ) -> List[Mapping[str, Any]]:
+        """Get expiring drugs without loading ORM objects"""
+        result = await self.db.execute(self._expiring_query(Drug.__table__, start, end))
+        return list(result.mappings().all())
+
+    def _expiring_query(self, drug: Any, start: date, end: date) -> Select:
+        return (
+            select(drug)
+            .where(Drug.expiration_date.between(start, end))
+            .order_by(Drug.expiration_date, Drug.id)
+        )
+
+    async def create(self, drug_data: DrugCreate) -> Drug:
         """Create a new drug"""
         db_drug = Drug(**drug_data.model_dump())
         self.db.add(db_drug)
-        self.db.commit()
-        self.db.refresh(db_drug)
+        await self._commit()
+        await self.db.refresh(db_drug)
         return db_drug
 
-    def batch_create(self, drugs_data: List[DrugCreate]) -> List[Drug]:
+    async def batch_create(self, drugs_data: List[DrugCreate]) -> List[Drug]:
         """Create multiple drugs efficiently in a single transaction"""
         if not drugs_data:
             return []
 
-        db_drugs = [Drug(**drug_data.model_dump()) for drug_data in drugs_data]
+        # Multi-row INSERT ... RETURNING hands back complete rows (ids and
+        # server defaults included), so no per-row refresh is needed. RETURNING
+        # order is unspecified, but ids are assigned in VALUES order, so rows
+        # are put back in input order by id. (sort_by_parameter_order would
+        # make SQLite fall back to one INSERT per row.)
+        statement = insert(Drug).returning(Drug)
+        db_drugs: List[Drug] = []
 
         try:
-            self.db.add_all(db_drugs)
-            self.db.commit()
+            for start in range(0, len(drugs_data), BATCH_INSERT_CHUNK_SIZE):
+                chunk = drugs_data[start : start + BATCH_INSERT_CHUNK_SIZE]
+                result = await self.db.scalars(
+                    statement, [drug_data.model_dump() for drug_data in chunk]
+                )
+                db_drugs.extend(sorted(result.all(), key=lambda drug: drug.id))
+            await self._commit()
 
-            for drug in db_drugs:
-                self.db.refresh(drug)
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+
+        return db_drugs
+
+    async def batch_create_partial(
+        self, drugs_data: List[DrugCreate]
+    ) -> List[Optional[Drug]]:
+        """Create drugs chunk by chunk, committing each chunk on its own.
+
+        A chunk is inserted under a savepoint; if it violates a constraint it is
+        retried one row per savepoint, so only the offending rows are lost.
+        """
+        statement = insert(Drug).returning(Drug)
+        db_drugs: List[Optional[Drug]] = []
+
+        try:
+            for start in range(0, len(drugs_data), BATCH_INSERT_CHUNK_SIZE):
+                chunk = drugs_data[start : start + BATCH_INSERT_CHUNK_SIZE]
+                try:
+                    async with self.db.begin_nested():
+                        result = await self.db.scalars(
+                            statement, [drug_data.model_dump() for drug_data in chunk]
+                        )
+                        created = sorted(result.all(), key=lambda drug: drug.id)
+                except IntegrityError:
+                    created = [await self._create_or_skip(drug) for drug in chunk]
+                db_drugs.extend(created)
+                await self._commit()
 
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             raise e
 
         return db_drugs
 
-    def update(self, drug_id: int, drug_data: DrugUpdate) -> Optional[Drug]:
+    async def _create_or_skip(self, drug_data: DrugCreate) -> Optional[Drug]:
+        try:
+            async with self.db.begin_nested():
+                return await self.db.scalar(
+                    insert(Drug).values(**drug_data.model_dump()).returning(Drug)
+                )
+        except IntegrityError:
+            return None
+
+    async def stream_all(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Mapping[str, Any]]]:
+        """Yield all drugs as plain rows, batch_size at a time, in id order"""
+        result = await self.db.stream(
+            select(Drug.__table__)
+            .order_by(Drug.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.mappings().partitions():
+            yield partition
+
+    async def update(self, drug_id: int, drug_data: DrugUpdate) -> Optional[Drug]:
         """Update an existing drug"""
-        db_drug = self.get_by_id(drug_id)
+        db_drug = await self.get_by_id(drug_id)
         if not db_drug:
             return None
 
         if drug_data.sku and drug_data.sku != db_drug.sku:
-            existing_drug_with_sku = self.get_by_sku(drug_data.sku)
+            existing_drug_with_sku = await self.get_by_sku(drug_data.sku)
             if existing_drug_with_sku and existing_drug_with_sku.id != drug_id:
                 raise ValueError("SKU already exists")
 
@@ -93,73 +186,215 @@ class DrugRepository(DrugRepositoryInterface):
         for field, value in update_data.items():
             setattr(db_drug, field, value)
 
-        self.db.commit()
-        self.db.refresh(db_drug)
+        await self._commit()
+        await self.db.refresh(db_drug)
         return db_drug
 
-    def delete(self, drug_id: int) -> bool:
+    async def delete(self, drug_id: int) -> bool:
         """Delete a drug by ID"""
-        db_drug = self.get_by_id(drug_id)
+        db_drug = await self.get_by_id(drug_id)
         if not db_drug:
             return False
 
-        self.db.delete(db_drug)
-        self.db.commit()
+        await self.db.delete(db_drug)
+        await self._commit()
         return True
 
-    def exists(self, sku: str) -> bool:
+    async def exists(self, sku: str) -> bool:
         """Check if a drug with the given SKU already exists"""
-        query = self.db.query(Drug).filter(Drug.sku == sku)
-        return query.first() is not None
+        result = await self.db.execute(select(Drug.id).where(Drug.sku == sku).limit(1))
+        return result.first() is not None
 
-    def check_existing_skus(self, skus: List[str]) -> List[str]:
+    async def import_drugs(
+        self,
+        chunks: AsyncIterator[List[tuple[int, DrugCreate]]],
+        upsert: bool = False,
+    ) -> tuple[int, int]:
+        """Bulk load streamed rows through a staging table and merge them"""
+        staging = DrugImportStaging(await self.db.connection())
+
+        try:
+            await staging.create()
+            async for chunk in chunks:
+                await staging.load(chunk)
+
+            conflicts = await staging.find_conflicts(include_existing=not upsert)
+            if conflicts:
+                raise DrugImportError(conflicts)
+
+            counts = await staging.merge(upsert)
+            await staging.drop()
+            await self._commit()
+
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+
+        return counts
+
+    async def upsert(self, drugs_data: List[DrugCreate]) -> tuple[int, int]:
+        """Insert drugs or update those whose SKU exists, in one transaction"""
+        inserted = updated = 0
+
+        try:
+            for start in range(0, len(drugs_data), BATCH_INSERT_CHUNK_SIZE):
+                chunk = drugs_data[start : start + BATCH_INSERT_CHUNK_SIZE]
+                result = await self.db.execute(
+                    build_upsert(
+                        self._dialect_name,
+                        rows=[drug_data.model_dump() for drug_data in chunk],
+                    )
+                )
+                chunk_inserted, chunk_updated = count_upserted(result)
+                inserted += chunk_inserted
+                updated += chunk_updated
+            await self._commit()
+
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+
+        return inserted, updated
+
+    async def check_existing_skus(self, skus: List[str]) -> List[str]:
         """Check which SKUs already exist in the database"""
         if not skus:
             return []
 
-        existing_drugs = self.db.query(Drug.sku).filter(Drug.sku.in_(skus)).all()
-        return [drug.sku for drug in existing_drugs]
+        result = await self.db.execute(select(Drug.sku).where(Drug.sku.in_(skus)))
+        return list(result.scalars().all())
+
+    async def get_category_counts(self) -> List[tuple[str, int]]:
+        """Get each distinct category with its number of drugs, by name"""
+        result = await self.db.execute(
+            select(Drug.category, func.count())
+            .group_by(Drug.category)
+            .order_by(Drug.category)
+        )
+        return [(category, count) for category, count in result.all()]
+
+    async def get_stats(
+        self, low_stock_threshold: int, expiring_start: date, expiring_end: date
+    ) -> dict[str, Any]:
+        """Get inventory totals in one aggregate query"""
+        result = await self.db.execute(
+            select(
+                func.count().label("total_drugs"),
+                func.coalesce(func.sum(Drug.quantity), 0).label("total_stock"),
+                func.count()
+                .filter(Drug.quantity < low_stock_threshold)
+                .label("low_stock_count"),
+                func.count()
+                .filter(Drug.expiration_date.between(expiring_start, expiring_end))
+                .label("expiring_soon_count"),
+                func.coalesce(func.sum(Drug.price * Drug.quantity), 0).label(
+                    "inventory_value"
+                ),
+            )
+        )
+        return dict(result.one()._mapping)
 
-    def get_paginated(
+    async def get_paginated(
         self, page: int = 1, page_size: int = 50
     ) -> tuple[List[Drug], int]:
         """Get paginated drugs with total count"""
         offset = (page - 1) * page_size
 
-        total = self.db.query(Drug).count()
+        total = await self.db.scalar(select(func.count()).select_from(Drug))
 
-        drugs = (
-            self.db.query(Drug)
+        result = await self.db.execute(
+            select(Drug)
             .order_by(Drug.created_at.desc())
             .offset(offset)
             .limit(page_size)
-            .all()
         )
 
-        return drugs, total
+        return list(result.scalars().all()), total
+
+    async def find(
+        self,
+        filters: DrugFilters,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Drug], Optional[str]]:
+        """Get drugs matching filters in sort order, a page at a time"""
+        rows, next_cursor = await self._find(filters, limit, cursor, plain=False)
+        return [drug for drug, _ in rows], next_cursor
+
+    async def find_rows(
+        self,
+        filters: DrugFilters,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Mapping[str, Any]], Optional[str]]:
+        """Get a page of matching drugs as plain column mappings"""
+        rows, next_cursor = await self._find(filters, limit, cursor, plain=True)
+        columns = Drug.__table__.c.keys()
+        return [dict(zip(columns, row[:-1])) for row in rows], next_cursor
+
+    async def _find(
+        self,
+        filters: DrugFilters,
+        limit: Optional[int],
+        cursor: Optional[str],
+        plain: bool,
+    ) -> tuple[List[Row], Optional[str]]:
+        """Rows ending with their sort value, and the cursor after the last"""
+        builder = DrugQueryBuilder(self._dialect_name, filters)
+        after = None
+        if cursor:
+            after = builder.parse_key(decode_cursor(cursor, builder.sort.value))
+
+        statement = builder.build(
+            limit + 1 if limit is not None else None, after, plain=plain
+        )
+        rows = (await self.db.execute(statement)).all()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last_row = rows[-1]
+            last_id = last_row.id if plain else last_row[0].id
+            next_cursor = encode_cursor(
+                builder.sort.value, (last_row.sort_value, last_id)
+            )
 
-    def search_paginated(
+        return rows, next_cursor
+
+    async def search_paginated(
         self, query: str, page: int = 1, page_size: int = 50
     ) -> tuple[List[Drug], int]:
-        """Search drugs with pagination"""
-        search_pattern = f"%{query}%"
+        """Search drugs with pagination, most relevant first where the database
+        can rank matches and newest first otherwise"""
         offset = (page - 1) * page_size
+        search = get_drug_search(self._dialect_name, query)
 
-        base_query = self.db.query(Drug).filter(
-            or_(
-                Drug.name.ilike(search_pattern),
-                Drug.generic_name.ilike(search_pattern),
-                Drug.manufacturer.ilike(search_pattern),
+        total = await self.db.scalar(
+            select(func.count()).select_from(
+                search.apply(select(Drug.id), query).order_by(None).subquery()
             )
         )
 
-        total = base_query.count()
-
-        drugs = (
-            base_query.order_by(Drug.created_at.desc())
+        rank = search.rank(query)
+        order = (
+            (Drug.created_at.desc(), Drug.id.desc())
+            if rank is None
+            else (rank, Drug.id)
+        )
+        result = await self.db.execute(
+            search.apply(select(Drug), query)
+            .order_by(*order)
             .offset(offset)
             .limit(page_size)
-            .all()
         )
 
-        return drugs, total
+        return list(result.scalars().all()), total
+
+    @property
+    def _dialect_name(self) -> str:
+        return self.db.bind.dialect.name
+
+    async def _commit(self) -> None:
+        """Commit a write and bump the table version once it is visible"""
+        await self.db.commit()
+        await self.version.bump()
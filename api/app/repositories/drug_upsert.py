@@ -0,0 +1,67 @@
+"""INSERT ... ON CONFLICT (sku) DO UPDATE for drugs.
+
+PostgreSQL and SQLite share the same upsert syntax, so one statement shape
+serves both. Conflicting rows are only rewritten when a value differs, and
+each written row reports whether it was inserted: a fresh row has no
+``updated_at`` yet, while the update sets it.
+"""
+
+from typing import List, Optional
+from sqlalchemy import Insert, Result, Select, func, or_, true
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.drug import Drug
+from app.schemas.drug import DrugCreate
+
+UPSERT_COLUMNS = tuple(DrugCreate.model_fields)
+UPDATED_COLUMNS = tuple(name for name in UPSERT_COLUMNS if name != "sku")
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def build_upsert(
+    dialect_name: str,
+    rows: Optional[List[dict]] = None,
+    source: Optional[Select] = None,
+) -> Insert:
+    """Upsert either literal rows or the rows of a SELECT over UPSERT_COLUMNS"""
+    if dialect_name not in _DIALECT_INSERTS:
+        raise ValueError(f"Upsert is not supported on {dialect_name}")
+
+    statement = _DIALECT_INSERTS[dialect_name](Drug)
+    if source is not None:
+        # SQLite needs a WHERE on INSERT ... SELECT to parse ON CONFLICT
+        statement = statement.from_select(UPSERT_COLUMNS, source.where(true()))
+    else:
+        statement = statement.values(rows)
+
+    excluded = statement.excluded
+    columns = Drug.__table__.c
+    return statement.on_conflict_do_update(
+        index_elements=[columns.sku],
+        set_={
+            **{name: excluded[name] for name in UPDATED_COLUMNS},
+            "updated_at": func.now(),
+        },
+        where=or_(
+            *(
+                columns[name].is_distinct_from(excluded[name])
+                for name in UPDATED_COLUMNS
+            )
+        ),
+    ).returning(columns.updated_at)
+
+
+def count_upserted(result: Result) -> tuple[int, int]:
+    """Count (inserted, updated) rows returned by a build_upsert statement"""
+    inserted = updated = 0
+    # Tested here rather than in RETURNING: SQLite evaluates RETURNING
+    # expressions incorrectly when the table has triggers (drugs_fts)
+    for updated_at in result.scalars():
+        if updated_at is None:
+            inserted += 1
+        else:
+            updated += 1
+    return inserted, updated
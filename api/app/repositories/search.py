@@ -0,0 +1,73 @@
+"""Dialect-specific strategies for searching drugs by text."""
+
+from abc import ABC, abstractmethod
+from typing import Optional
+from sqlalchemy import ColumnElement, Select, column, func, literal_column, or_, table
+from app.models.drug import Drug
+from app.models.drug_search import FTS_TABLE
+
+MIN_INDEXED_QUERY_LENGTH = 3
+
+drugs_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+
+class DrugSearch(ABC):
+    """Adds a text match and a relevance measure to a drug query."""
+
+    @abstractmethod
+    def apply(self, statement: Select, query: str) -> Select:
+        """Restrict statement to drugs matching query."""
+        pass
+
+    def rank(self, query: str) -> Optional[ColumnElement]:
+        """Relevance expression where lower sorts first, if supported."""
+        return None
+
+
+class LikeSearch(DrugSearch):
+    """Substring match with ILIKE; no index support, no ranking."""
+
+    def apply(self, statement: Select, query: str) -> Select:
+        search_pattern = f"%{query}%"
+        return statement.where(
+            or_(
+                Drug.name.ilike(search_pattern),
+                Drug.generic_name.ilike(search_pattern),
+                Drug.manufacturer.ilike(search_pattern),
+            )
+        )
+
+
+class TrigramSearch(LikeSearch):
+    """PostgreSQL pg_trgm search; ILIKE is served by the GIN trigram indexes."""
+
+    def rank(self, query: str) -> Optional[ColumnElement]:
+        return -func.greatest(
+            func.word_similarity(query, Drug.name),
+            func.word_similarity(query, Drug.generic_name),
+            func.word_similarity(query, Drug.manufacturer),
+        )
+
+
+class Fts5Search(DrugSearch):
+    """SQLite FTS5 trigram search ranked by bm25."""
+
+    def apply(self, statement: Select, query: str) -> Select:
+        phrase = '"' + query.replace('"', '""') + '"'
+        return statement.join(drugs_fts, drugs_fts.c.rowid == Drug.id).where(
+            literal_column(FTS_TABLE).op("MATCH")(phrase)
+        )
+
+    def rank(self, query: str) -> Optional[ColumnElement]:
+        return drugs_fts.c.rank
+
+
+def get_drug_search(dialect_name: str, query: str) -> DrugSearch:
+    """Pick the best search strategy for the database and query."""
+    if len(query) < MIN_INDEXED_QUERY_LENGTH:
+        return LikeSearch()
+    if dialect_name == "postgresql":
+        return TrigramSearch()
+    if dialect_name == "sqlite":
+        return Fts5Search()
+    return LikeSearch()
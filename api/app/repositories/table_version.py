@@ -0,0 +1,89 @@
+"""Version token for the drugs table, replaced by every committed write."""
+
+import asyncio
+import os
+import secrets
+from app.cache.backend import CacheBackend, cache_backend
+from app.database import READ_YOUR_WRITES_SECONDS
+
+# Tokens are redrawn this long after they were set, bounding how long writes
+# made outside the repository (seeds, migrations, psql) can go unseen
+TABLE_VERSION_TTL_SECONDS = float(os.getenv("TABLE_VERSION_TTL_SECONDS", "300"))
+
+
+def _new_token() -> bytes:
+    return secrets.token_hex(8).encode()
+
+
+class TableVersion:
+    """Token that changes whenever a table's data may have changed.
+
+    The token is kept in the cache backend, so with a shared backend every
+    worker sees the writes committed by the others. Tokens are random rather
+    than counted: if the backend loses the key (a restart or an eviction), a
+    new token is drawn and nothing issued under an old one can match. Writes
+    made outside the repository are not seen until the token expires after
+    ``ttl_seconds``, or until ``bump`` is called for them.
+
+    Each bump also marks the table as written for ``write_window_seconds``,
+    during which rows read from a replica may predate the write, so they must
+    not be cached or served with an ETag under the new token.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        backend: CacheBackend = cache_backend,
+        write_window_seconds: float = READ_YOUR_WRITES_SECONDS,
+        ttl_seconds: float = TABLE_VERSION_TTL_SECONDS,
+    ):
+        self.key = f"version:{table}"
+        self.written_key = f"written:{table}"
+        self.backend = backend
+        self.write_window_seconds = write_window_seconds
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self) -> str:
+        token = await self.backend.get(self.key)
+        if token is None:
+            # Several workers may race to draw the first token; one wins
+            token = _new_token()
+            if not await self.backend.add(self.key, token, self.ttl_seconds):
+                token = await self.backend.get(self.key) or token
+        return token.decode()
+
+    async def bump(self) -> None:
+        # Marked first: anyone who sees the new token also sees the mark
+        await self.backend.set(self.written_key, b"1", self.write_window_seconds)
+        await self.backend.set(self.key, _new_token(), self.ttl_seconds)
+
+    async def written_recently(self) -> bool:
+        """Whether the table was written within the write window"""
+        return await self.backend.get(self.written_key) is not None
+
+
+drug_table_version = TableVersion("drugs")
+
+# Replaced only by writes that change stored drugs without naming them (upserts)
+drug_rows_version = TableVersion("drug_rows")
+
+
+async def bump_drug_versions() -> None:
+    """Bump every drugs version after writes made outside the repository.
+
+    Seeds and migrations change rows without going through the repository;
+    with a shared cache backend this makes every worker drop the ETags,
+    cached pages and cached drugs issued before them.
+    """
+    await drug_table_version.bump()
+    await drug_rows_version.bump()
+
+
+def bump_drug_table_version() -> None:
+    """Run bump_drug_versions from a script; not inside a running event loop"""
+
+    async def bump() -> None:
+        await bump_drug_versions()
+        await drug_table_version.backend.close()
+
+    asyncio.run(bump())
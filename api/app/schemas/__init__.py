@@ -1,3 +1,55 @@
-from .drug import DrugBase, DrugCreate, DrugUpdate, DrugResponse
+from .drug import (
+    DrugBase,
+    DrugCreate,
+    DrugUpdate,
+    DrugResponse,
+    DrugPage,
+    DrugSort,
+    DrugFilters,
+    CategoryCount,
+    DrugStats,
+    RowError,
+    DrugImportResult,
+    ImportMode,
+    ExportFormat,
+    DrugUpsertResult,
+    DrugBatchResult,
+    ImportJobState,
+    ImportJobStatus,
+)
+from .diagnostics import (
+    CacheStats,
+    HistogramSnapshot,
+    DatabasePoolStats,
+    PoolStats,
+    LoopBlockReport,
+    LoopLagStats,
+    ProfileFormat,
+)
 
-__all__ = ["DrugBase", "DrugCreate", "DrugUpdate", "DrugResponse"]
+__all__ = [
+    "DrugBase",
+    "DrugCreate",
+    "DrugUpdate",
+    "DrugResponse",
+    "DrugPage",
+    "DrugSort",
+    "DrugFilters",
+    "CategoryCount",
+    "DrugStats",
+    "RowError",
+    "DrugImportResult",
+    "ImportMode",
+    "ExportFormat",
+    "DrugUpsertResult",
+    "DrugBatchResult",
+    "ImportJobState",
+    "ImportJobStatus",
+    "CacheStats",
+    "HistogramSnapshot",
+    "DatabasePoolStats",
+    "PoolStats",
+    "LoopBlockReport",
+    "LoopLagStats",
+    "ProfileFormat",
+]
@@ -0,0 +1,55 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    backend: str
+    ttl_seconds: float
+    hits: int
+    misses: int
+    size: Optional[int] = None
+    evictions: Optional[int] = None
+
+
+class HistogramSnapshot(BaseModel):
+    buckets: dict[str, int]
+    count: int
+    sum: float
+
+
+class PoolStats(BaseModel):
+    database: Optional[str] = None
+    pool: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout_seconds: Optional[float] = None
+    timeouts: Optional[int] = None
+    wait_seconds: Optional[HistogramSnapshot] = None
+
+
+class DatabasePoolStats(BaseModel):
+    primary: PoolStats
+    replicas: List[PoolStats]
+
+
+class LoopBlockReport(BaseModel):
+    route: str
+    detected_at: datetime
+    blocked_seconds: Optional[float] = None
+    stack: List[str]
+
+
+class LoopLagStats(BaseModel):
+    threshold_seconds: float
+    lag_seconds: HistogramSnapshot
+    blocks: List[LoopBlockReport]
+
+
+class ProfileFormat(str, Enum):
+    TEXT = "text"
+    PSTATS = "pstats"
@@ -1,6 +1,7 @@
+from enum import Enum
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 
 
 class DrugBase(BaseModel):
@@ -15,10 +16,8 @@ class DrugBase(BaseModel):
         ..., min_length=1, max_length=50, description="Dosage is required"
     )
     quantity: int = Field(..., ge=1, description="Quantity must be at least 1")
-    expiration_date: str = Field(
-        ...,
-        pattern=r"^\d{4}-\d{2}-\d{2}$",
-        description="Please select a valid expiration date",
+    expiration_date: date = Field(
+        ..., description="Please select a valid expiration date"
     )
     manufacturer: str = Field(
         ..., min_length=1, max_length=100, description="Manufacturer is required"
@@ -88,7 +87,7 @@ class DrugUpdate(BaseModel):
     generic_name: Optional[str] = Field(None, min_length=1, max_length=100)
     dosage: Optional[str] = Field(None, min_length=1, max_length=50)
     quantity: Optional[int] = Field(None, ge=1)
-    expiration_date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    expiration_date: Optional[date] = None
     manufacturer: Optional[str] = Field(None, min_length=1, max_length=100)
     price: Optional[float] = Field(None, gt=0)
     category: Optional[str] = Field(None, min_length=1, max_length=50)
@@ -151,3 +150,100 @@ class DrugResponse(DrugBase):
 
     class Config:
         from_attributes = True
+
+
+class DrugPage(BaseModel):
+    items: List[DrugResponse]
+    next_cursor: Optional[str] = None
+
+
+class CategoryCount(BaseModel):
+    category: str
+    count: int
+
+
+class DrugStats(BaseModel):
+    total_drugs: int
+    total_stock: int
+    low_stock_count: int
+    expiring_soon_count: int
+    inventory_value: float
+    low_stock_threshold: int
+    expiring_within_days: int
+
+
+class RowError(BaseModel):
+    row: int = Field(..., description="1-based position of the row in the upload")
+    field: str
+    message: str
+
+
+class DrugImportResult(BaseModel):
+    imported: int
+
+
+class ImportMode(str, Enum):
+    INSERT = "insert"
+    UPSERT = "upsert"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class DrugUpsertResult(BaseModel):
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+class DrugBatchResult(BaseModel):
+    created_ids: List[int]
+    errors: List[RowError]
+
+
+class ImportJobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ImportJobStatus(BaseModel):
+    id: str
+    status: ImportJobState
+    total: int
+    processed: int = Field(..., description="Rows imported so far")
+    failed: int = Field(..., description="Rows rejected so far")
+    remaining: int = Field(..., description="Rows not yet attempted")
+    errors: List[RowError] = []
+    error: Optional[str] = Field(None, description="Why a failed job stopped")
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class DrugSort(str, Enum):
+    NEWEST = "-created_at"
+    OLDEST = "created_at"
+    NAME = "name"
+    NAME_DESC = "-name"
+    QUANTITY = "quantity"
+    QUANTITY_DESC = "-quantity"
+    EXPIRATION = "expiration_date"
+    EXPIRATION_DESC = "-expiration_date"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+    RELEVANCE = "relevance"
+
+
+class DrugFilters(BaseModel):
+    search: Optional[str] = None
+    category: Optional[str] = None
+    manufacturer: Optional[str] = None
+    min_quantity: Optional[int] = Field(None, ge=0)
+    max_quantity: Optional[int] = Field(None, ge=0)
+    expires_after: Optional[date] = None
+    expires_before: Optional[date] = None
+    sort: Optional[DrugSort] = None
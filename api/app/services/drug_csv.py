@@ -0,0 +1,91 @@
+"""Incremental parsing and validation of drug CSV uploads."""
+
+import csv
+import io
+from typing import BinaryIO, List
+from pydantic import ValidationError
+from app.exceptions import format_validation_error
+from app.schemas.drug import DrugCreate, RowError
+
+REQUIRED_COLUMNS = (
+    "sku",
+    "name",
+    "generic_name",
+    "dosage",
+    "quantity",
+    "expiration_date",
+    "manufacturer",
+    "price",
+    "category",
+)
+OPTIONAL_COLUMNS = ("description",)
+
+
+def normalize_column(header: str) -> str:
+    """Match headers the way the web template writes them"""
+    return "_".join(header.strip().lower().split())
+
+
+class DrugCsvReader:
+    """Reads validated drugs from a CSV file one chunk at a time.
+
+    Only the current chunk is held in memory, so files of any size can be
+    processed. Rows are numbered from 1, skipping the header and blank lines.
+    Raises ValueError if the header lacks a required column; reading may raise
+    csv.Error or UnicodeDecodeError on malformed input.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        self._reader = csv.reader(self._text)
+        header = next(self._reader, None)
+        if header is None:
+            raise ValueError("CSV file is empty")
+
+        self.columns = [normalize_column(column) for column in header]
+        missing = [column for column in REQUIRED_COLUMNS if column not in self.columns]
+        if missing:
+            raise ValueError(f"CSV file is missing columns: {', '.join(missing)}")
+
+        self.rows_read = 0
+        self.exhausted = False
+
+    def read_chunk(
+        self, size: int
+    ) -> tuple[List[tuple[int, DrugCreate]], List[RowError]]:
+        """Parse up to size rows into (row number, drug) pairs and row errors"""
+        drugs: List[tuple[int, DrugCreate]] = []
+        errors: List[RowError] = []
+
+        first_row = self.rows_read
+        while self.rows_read - first_row < size:
+            values = next(self._reader, None)
+            if values is None:
+                self.exhausted = True
+                break
+            if not any(value.strip() for value in values):
+                continue
+
+            self.rows_read += 1
+            row = self.rows_read
+            record = {
+                column: value.strip()
+                for column, value in zip(self.columns, values)
+                if column in REQUIRED_COLUMNS or column in OPTIONAL_COLUMNS
+            }
+            if not record.get("description"):
+                record.pop("description", None)
+
+            try:
+                drugs.append((row, DrugCreate(**record)))
+            except ValidationError as e:
+                errors.extend(
+                    RowError(
+                        row=row,
+                        field=str(error["loc"][-1]) if error["loc"] else "row",
+                        message=format_validation_error(error),
+                    )
+                    for error in e.errors()
+                )
+
+        return drugs, errors
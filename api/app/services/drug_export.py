@@ -0,0 +1,69 @@
+"""Encoding of the drug catalog as NDJSON or CSV for streamed export."""
+
+import csv
+import io
+import zlib
+from typing import Any, AsyncIterator, List, Mapping
+import orjson
+from app.schemas.drug import DrugCreate, ExportFormat
+
+EXPORT_BATCH_SIZE = 1000
+
+# CSV exports use the import column names, so an export can be re-imported
+EXPORT_COLUMNS = ("id", *DrugCreate.model_fields, "created_at", "updated_at")
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def encode_ndjson(rows: List[Mapping[str, Any]]) -> bytes:
+    """One compact JSON object per line"""
+    return b"".join(
+        orjson.dumps(
+            {column: row[column] for column in EXPORT_COLUMNS},
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_UTC_Z,
+        )
+        for row in rows
+    )
+
+
+def encode_csv(rows: List[Mapping[str, Any]], header: bool = False) -> bytes:
+    """CSV lines for rows, preceded by the column names if header is set"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([row[column] for column in EXPORT_COLUMNS] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def encode_export(
+    batches: AsyncIterator[List[Mapping[str, Any]]],
+    export_format: ExportFormat,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """Encode batches of rows as they arrive, optionally as one gzip stream.
+
+    The CSV header is sent before the first batch is read, so the response
+    starts immediately.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+
+    def encoded(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    if export_format == ExportFormat.CSV:
+        yield encoded(encode_csv([], header=True))
+
+    async for rows in batches:
+        if export_format == ExportFormat.CSV:
+            data = encoded(encode_csv(rows))
+        else:
+            data = encoded(encode_ndjson(rows))
+        if data:
+            yield data
+
+    if compressor:
+        yield compressor.flush()
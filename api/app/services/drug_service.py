@@ -1,67 +1,136 @@
-from typing import List, Optional
+import csv
+import os
+from typing import Any, AsyncIterator, BinaryIO, List, Mapping, Optional, Union
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from app.exceptions import format_validation_error
+from app.monitoring.metrics import IMPORT_SECONDS, record_import_rows
+from app.repositories.drug_import import MAX_IMPORT_ERRORS, DrugImportError
 from app.repositories.drug_interface import DrugRepositoryInterface
-from app.schemas.drug import DrugCreate, DrugUpdate, DrugResponse
-from datetime import datetime
+from app.schemas.drug import (
+    CategoryCount,
+    DrugCreate,
+    DrugFilters,
+    DrugUpdate,
+    DrugResponse,
+    DrugStats,
+    DrugBatchResult,
+    DrugImportResult,
+    DrugUpsertResult,
+    ExportFormat,
+    ImportMode,
+    RowError,
+)
+from app.services.drug_csv import DrugCsvReader
+from app.services.drug_export import EXPORT_BATCH_SIZE, encode_export
+from datetime import date, datetime, timedelta
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", "100"))
+EXPIRING_SOON_DAYS = int(os.getenv("EXPIRING_SOON_DAYS", "90"))
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+
+
+def check_unique_skus(skus: List[str]) -> None:
+    """Reject batch data that repeats a SKU"""
+    seen_skus = set()
+    for sku in skus:
+        if sku in seen_skus:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Duplicate SKU '{sku}' in batch data",
+            )
+        seen_skus.add(sku)
 
 
 class DrugService:
     def __init__(self, repository: DrugRepositoryInterface):
         self.repository = repository
 
-    def get_all_drugs(self) -> List[DrugResponse]:
+    async def get_all_drugs(self) -> List[DrugResponse]:
         """Get all drugs"""
-        drugs = self.repository.get_all()
+        drugs = await self.repository.get_all()
         return [DrugResponse.model_validate(drug) for drug in drugs]
 
-    def get_drug_by_id(self, drug_id: int) -> DrugResponse:
+    async def list_drugs(
+        self,
+        filters: DrugFilters,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> dict[str, Any]:
+        """Get one page of drugs matching the filters, shaped like DrugPage.
+
+        Items are plain column mappings, for serializing without validation.
+        """
+        try:
+            rows, next_cursor = await self.repository.find_rows(filters, limit, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+        return {"items": rows, "next_cursor": next_cursor}
+
+    async def get_drug_by_id(self, drug_id: int) -> DrugResponse:
         """Get a drug by ID"""
-        drug = self.repository.get_by_id(drug_id)
+        drug = await self.repository.get_by_id(drug_id)
         if not drug:
             raise HTTPException(status_code=404, detail="Drug not found")
         return DrugResponse.model_validate(drug)
 
-    def search_drugs(
+    async def search_drugs(
         self, query: str, category: Optional[str] = None
     ) -> List[DrugResponse]:
         """Search drugs with optional category filter"""
-        if query:
-            drugs = self.repository.search(query)
-        else:
-            drugs = self.repository.get_all()
-
-        if category and category != "All":
-            drugs = [drug for drug in drugs if drug.category == category]
-
+        drugs, _ = await self.repository.find(
+            DrugFilters(search=query or None, category=category)
+        )
         return [DrugResponse.model_validate(drug) for drug in drugs]
 
-    def get_low_stock_drugs(self, threshold: int = 100) -> List[DrugResponse]:
-        """Get drugs with low stock"""
-        drugs = self.repository.get_low_stock(threshold)
-        return [DrugResponse.model_validate(drug) for drug in drugs]
-
-    def get_expiring_soon_drugs(self, days: int = 90) -> List[DrugResponse]:
-        """Get drugs expiring within the specified number of days"""
-        all_drugs = self.repository.get_all()
-        expiring_drugs = []
+    async def get_low_stock_drugs(
+        self, threshold: int = LOW_STOCK_THRESHOLD
+    ) -> List[Mapping[str, Any]]:
+        """Get drugs with low stock as column mappings"""
+        return await self.repository.get_low_stock_rows(threshold)
 
+    async def get_expiring_soon_drugs(
+        self, days: int = EXPIRING_SOON_DAYS
+    ) -> List[Mapping[str, Any]]:
+        """Get drugs expiring within the specified number of days as column
+        mappings"""
         current_date = datetime.now().date()
+        return await self.repository.get_expiring_rows(
+            current_date, current_date + timedelta(days=days)
+        )
 
-        for drug in all_drugs:
-            try:
-                exp_date = datetime.strptime(drug.expiration_date, "%Y-%m-%d").date()
-                days_until_expiry = (exp_date - current_date).days
-                if 0 <= days_until_expiry <= days:
-                    expiring_drugs.append(drug)
-            except ValueError:
-                continue
-
-        return [DrugResponse.model_validate(drug) for drug in expiring_drugs]
+    async def get_stats(
+        self,
+        low_stock_threshold: int = LOW_STOCK_THRESHOLD,
+        expiring_within_days: int = EXPIRING_SOON_DAYS,
+    ) -> DrugStats:
+        """Get inventory totals for the dashboard"""
+        current_date = datetime.now().date()
+        totals = await self.repository.get_stats(
+            low_stock_threshold,
+            current_date,
+            current_date + timedelta(days=expiring_within_days),
+        )
+        return DrugStats(
+            total_drugs=totals["total_drugs"],
+            total_stock=totals["total_stock"],
+            low_stock_count=totals["low_stock_count"],
+            expiring_soon_count=totals["expiring_soon_count"],
+            inventory_value=round(totals["inventory_value"], 2),
+            low_stock_threshold=low_stock_threshold,
+            expiring_within_days=expiring_within_days,
+        )
 
-    def create_drug(self, drug_data: DrugCreate) -> DrugResponse:
+    async def create_drug(self, drug_data: DrugCreate) -> DrugResponse:
         """Create a new drug with validation"""
 
-        if self.repository.exists(drug_data.sku):
+        if await self.repository.exists(drug_data.sku):
             raise HTTPException(
                 status_code=400,
                 detail=f"Drug with SKU '{drug_data.sku}' already exists",
@@ -69,26 +138,20 @@ class DrugService:
 
         self._validate_expiration_date(drug_data.expiration_date)
 
-        drug = self.repository.create(drug_data)
+        drug = await self.repository.create(drug_data)
         return DrugResponse.model_validate(drug)
 
-    def batch_create_drugs(self, drugs_data: List[DrugCreate]) -> List[DrugResponse]:
+    async def batch_create_drugs(
+        self, drugs_data: List[DrugCreate]
+    ) -> List[DrugResponse]:
         """Create multiple drugs in a batch with validation"""
         if not drugs_data:
             raise HTTPException(status_code=400, detail="No drug data provided")
 
         skus = [drug_data.sku for drug_data in drugs_data]
+        check_unique_skus(skus)
 
-        seen_skus = set()
-        for sku in skus:
-            if sku in seen_skus:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Duplicate SKU '{sku}' in batch data",
-                )
-            seen_skus.add(sku)
-
-        existing_skus = self.repository.check_existing_skus(skus)
+        existing_skus = await self.repository.check_existing_skus(skus)
         if existing_skus:
             raise HTTPException(
                 status_code=400,
@@ -98,12 +161,240 @@ class DrugService:
         for drug_data in drugs_data:
             self._validate_expiration_date(drug_data.expiration_date)
 
-        created_drugs = self.repository.batch_create(drugs_data)
+        with IMPORT_SECONDS.labels("batch").time():
+            created_drugs = await self.repository.batch_create(drugs_data)
+        record_import_rows("batch", created=len(created_drugs))
         return [DrugResponse.model_validate(drug) for drug in created_drugs]
 
-    def update_drug(self, drug_id: int, drug_data: DrugUpdate) -> DrugResponse:
+    async def batch_create_drugs_partial(
+        self, rows: List[Mapping[str, Any]]
+    ) -> DrugBatchResult:
+        """Create the valid drugs of a batch and report the others by row.
+
+        Rows are checked up front (schema errors, past expiration date, SKU
+        repeated earlier in the batch or already stored) and the rest are
+        committed in chunks, so a retry only needs to resend the rows listed
+        in errors.
+        """
+        if not rows:
+            raise HTTPException(status_code=400, detail="No drug data provided")
+
+        errors: List[RowError] = []
+        drugs_data: List[tuple[int, DrugCreate]] = []
+        for index, row in enumerate(rows):
+            try:
+                drugs_data.append((index, DrugCreate.model_validate(row)))
+            except ValidationError as e:
+                errors.extend(
+                    RowError(
+                        row=index + 1,
+                        field=str(error["loc"][-1]) if error["loc"] else "row",
+                        message=format_validation_error(error),
+                    )
+                    for error in e.errors()
+                )
+
+        existing_skus = set(
+            await self.repository.check_existing_skus(
+                [drug_data.sku for _, drug_data in drugs_data]
+            )
+        )
+        today = datetime.now().date()
+        seen_skus = set()
+        candidates: List[tuple[int, DrugCreate]] = []
+        for index, drug_data in drugs_data:
+            if drug_data.expiration_date < today:
+                field, message = (
+                    "expiration_date",
+                    "Expiration date cannot be in the past",
+                )
+            elif drug_data.sku in seen_skus:
+                field, message = "sku", f"Duplicate SKU '{drug_data.sku}' in batch data"
+            elif drug_data.sku in existing_skus:
+                field, message = "sku", f"SKU '{drug_data.sku}' already exists"
+            else:
+                seen_skus.add(drug_data.sku)
+                candidates.append((index, drug_data))
+                continue
+            errors.append(RowError(row=index + 1, field=field, message=message))
+
+        with IMPORT_SECONDS.labels("batch").time():
+            created = await self.repository.batch_create_partial(
+                [drug_data for _, drug_data in candidates]
+            )
+        created_ids = []
+        for (index, drug_data), drug in zip(candidates, created):
+            if drug is None:
+                errors.append(
+                    RowError(
+                        row=index + 1,
+                        field="sku",
+                        message=f"SKU '{drug_data.sku}' could not be saved",
+                    )
+                )
+            else:
+                created_ids.append(drug.id)
+
+        record_import_rows("batch", created=len(created_ids), rejected=len(errors))
+        return DrugBatchResult(
+            created_ids=created_ids,
+            errors=sorted(errors, key=lambda error: error.row),
+        )
+
+    async def upsert_drugs(self, drugs_data: List[DrugCreate]) -> DrugUpsertResult:
+        """Create drugs or update the ones whose SKU already exists"""
+        if not drugs_data:
+            raise HTTPException(status_code=400, detail="No drug data provided")
+
+        check_unique_skus([drug_data.sku for drug_data in drugs_data])
+        for drug_data in drugs_data:
+            self._validate_expiration_date(drug_data.expiration_date)
+
+        with IMPORT_SECONDS.labels("batch").time():
+            inserted, updated = await self.repository.upsert(drugs_data)
+        unchanged = len(drugs_data) - inserted - updated
+        record_import_rows(
+            "batch", created=inserted, updated=updated, unchanged=unchanged
+        )
+        return DrugUpsertResult(inserted=inserted, updated=updated, unchanged=unchanged)
+
+    async def import_drugs_csv(
+        self, file: BinaryIO, mode: ImportMode = ImportMode.INSERT
+    ) -> Union[DrugImportResult, DrugUpsertResult]:
+        """Import drugs from a CSV file, validating and loading it in chunks.
+
+        In upsert mode drugs whose SKU exists are updated rather than rejected.
+        """
+        try:
+            reader = await run_in_threadpool(DrugCsvReader, file)
+        except (ValueError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        errors: List[RowError] = []
+        today = datetime.now().date()
+
+        async def validated_chunks() -> AsyncIterator[List[tuple[int, DrugCreate]]]:
+            while not reader.exhausted and len(errors) < MAX_IMPORT_ERRORS:
+                drugs, row_errors = await run_in_threadpool(
+                    reader.read_chunk, IMPORT_CHUNK_SIZE
+                )
+                errors.extend(row_errors)
+                errors.extend(
+                    RowError(
+                        row=row,
+                        field="expiration_date",
+                        message="Expiration date cannot be in the past",
+                    )
+                    for row, drug in drugs
+                    if drug.expiration_date < today
+                )
+                # Keep validating after the first error to report as many as
+                # possible, but stop loading since nothing will be committed
+                if not errors:
+                    yield drugs
+
+            if errors:
+                raise DrugImportError(errors)
+            if reader.rows_read == 0:
+                raise HTTPException(status_code=400, detail="No drug data provided")
+
+        upsert = mode == ImportMode.UPSERT
+        try:
+            with IMPORT_SECONDS.labels("csv").time():
+                inserted, updated = await self.repository.import_drugs(
+                    validated_chunks(), upsert=upsert
+                )
+        except DrugImportError as e:
+            record_import_rows("csv", rejected=len(e.errors))
+            raise HTTPException(
+                status_code=422,
+                detail=[
+                    f"Row {error.row}, {error.field}: {error.message}"
+                    for error in sorted(e.errors, key=lambda error: error.row)
+                ][:MAX_IMPORT_ERRORS],
+            )
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV file: {e}")
+
+        unchanged = reader.rows_read - inserted - updated
+        record_import_rows(
+            "csv", created=inserted, updated=updated, unchanged=unchanged
+        )
+        if upsert:
+            return DrugUpsertResult(
+                inserted=inserted, updated=updated, unchanged=unchanged
+            )
+        return DrugImportResult(imported=inserted)
+
+    async def import_rows(
+        self, rows: List[tuple[int, DrugCreate]]
+    ) -> tuple[int, List[RowError]]:
+        """Create the valid drugs of one import chunk and report the others.
+
+        Rows expiring in the past or whose SKU already exists are skipped with
+        an error; the rest are created together, falling back to one row at a
+        time so a SKU stored meanwhile (by another chunk, say) only costs its
+        own row. Returns the number created.
+        """
+        today = datetime.now().date()
+        errors = [
+            RowError(
+                row=row,
+                field="expiration_date",
+                message="Expiration date cannot be in the past",
+            )
+            for row, drug in rows
+            if drug.expiration_date < today
+        ]
+        candidates = [
+            (row, drug) for row, drug in rows if drug.expiration_date >= today
+        ]
+
+        existing_skus = set(
+            await self.repository.check_existing_skus(
+                [drug.sku for _, drug in candidates]
+            )
+        )
+        errors.extend(
+            RowError(row=row, field="sku", message=f"SKU '{drug.sku}' already exists")
+            for row, drug in candidates
+            if drug.sku in existing_skus
+        )
+        drugs = [
+            (row, drug) for row, drug in candidates if drug.sku not in existing_skus
+        ]
+
+        created = 0
+        if drugs:
+            with IMPORT_SECONDS.labels("job").time():
+                results = await self.repository.batch_create_partial(
+                    [drug for _, drug in drugs]
+                )
+            for (row, drug), result in zip(drugs, results):
+                if result is None:
+                    errors.append(
+                        RowError(
+                            row=row,
+                            field="sku",
+                            message=f"SKU '{drug.sku}' already exists",
+                        )
+                    )
+                else:
+                    created += 1
+        record_import_rows("job", created=created, rejected=len(errors))
+        return created, sorted(errors, key=lambda error: error.row)
+
+    def export_drugs(
+        self, export_format: ExportFormat, compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Stream every drug encoded in export_format, optionally gzipped"""
+        return encode_export(
+            self.repository.stream_all(EXPORT_BATCH_SIZE), export_format, compress
+        )
+
+    async def update_drug(self, drug_id: int, drug_data: DrugUpdate) -> DrugResponse:
         """Update an existing drug"""
-        existing_drug = self.repository.get_by_id(drug_id)
+        existing_drug = await self.repository.get_by_id(drug_id)
         if not existing_drug:
             raise HTTPException(status_code=404, detail="Drug not found")
 
@@ -111,7 +402,7 @@ class DrugService:
             self._validate_expiration_date(drug_data.expiration_date)
 
         try:
-            updated_drug = self.repository.update(drug_id, drug_data)
+            updated_drug = await self.repository.update(drug_id, drug_data)
             if not updated_drug:
                 raise HTTPException(status_code=404, detail="Drug not found")
         except ValueError as e:
@@ -124,29 +415,26 @@ class DrugService:
 
         return DrugResponse.model_validate(updated_drug)
 
-    def delete_drug(self, drug_id: int) -> dict:
+    async def delete_drug(self, drug_id: int) -> dict:
         """Delete a drug"""
-        if not self.repository.delete(drug_id):
+        if not await self.repository.delete(drug_id):
             raise HTTPException(status_code=404, detail="Drug not found")
         return {"message": "Drug deleted successfully"}
 
-    def get_categories(self) -> List[str]:
+    async def get_categories(self) -> List[str]:
         """Get all unique categories"""
-        drugs = self.repository.get_all()
-        categories = list(set(drug.category for drug in drugs))
-        return sorted(categories)
+        return [entry.category for entry in await self.get_category_counts()]
 
-    def _validate_expiration_date(self, expiration_date: str) -> None:
-        """Validate expiration date format and ensure it's not in the past"""
-        try:
-            exp_date = datetime.strptime(expiration_date, "%Y-%m-%d").date()
-            current_date = datetime.now().date()
+    async def get_category_counts(self) -> List[CategoryCount]:
+        """Get each category with its number of drugs"""
+        return [
+            CategoryCount(category=category, count=count)
+            for category, count in await self.repository.get_category_counts()
+        ]
 
-            if exp_date < current_date:
-                raise HTTPException(
-                    status_code=400, detail="Expiration date cannot be in the past"
-                )
-        except ValueError:
+    def _validate_expiration_date(self, expiration_date: date) -> None:
+        """Ensure the expiration date is not in the past"""
+        if expiration_date < datetime.now().date():
             raise HTTPException(
-                status_code=400, detail="Invalid expiration date format. Use YYYY-MM-DD"
+                status_code=400, detail="Expiration date cannot be in the past"
             )
@@ -0,0 +1,288 @@
+"""Background drug import jobs processed by a pool of asyncio workers.
+
+A submitted batch is split into chunks of ``chunk_size`` rows and queued; each
+worker takes one chunk at a time and creates its valid rows in a transaction
+of its own. Chunks are worked on by the process that accepted the job, but job
+progress and idempotency keys are stored in the cache backend, so with Redis
+configured any worker can report on a job or recognise a retried submission.
+
+Jobs do not survive the process working on them. Stopping the manager marks
+its unfinished jobs failed, and a job whose process died without saying so is
+reported failed once its status has not been refreshed for a while. The rows
+still remaining must then be submitted again, under a new idempotency key.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache.backend import CacheBackend, cache_backend
+from app.database import AsyncSessionLocal
+from app.repositories.drug_cache import CachedDrugRepository
+from app.repositories.drug_import import MAX_IMPORT_ERRORS
+from app.repositories.drug_repository import DrugRepository
+from app.schemas.drug import (
+    DrugCreate,
+    ImportJobState,
+    ImportJobStatus,
+    RowError,
+)
+from app.services.drug_service import IMPORT_CHUNK_SIZE, DrugService, check_unique_skus
+
+logger = logging.getLogger(__name__)
+
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "4"))
+# Jobs and their idempotency keys are forgotten this long after their last update
+IMPORT_JOB_TTL_SECONDS = float(os.getenv("IMPORT_JOB_TTL_SECONDS", "86400"))
+# Unfinished jobs are saved at least this often; one not saved for three times
+# as long has lost its process
+IMPORT_JOB_HEARTBEAT_SECONDS = 10.0
+
+
+class ImportJob:
+    """Progress of one submitted import"""
+
+    def __init__(self, total: int, chunks: int):
+        self.id = uuid.uuid4().hex
+        self.status = ImportJobState.QUEUED
+        self.total = total
+        self.processed = 0
+        self.failed = 0
+        self.errors: List[RowError] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self._chunks_remaining = chunks
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (ImportJobState.COMPLETED, ImportJobState.FAILED)
+
+    def record_chunk(self, created: int, attempted: int, errors: List[RowError]):
+        self.processed += created
+        self.failed += attempted - created
+        self.errors.extend(errors[: MAX_IMPORT_ERRORS - len(self.errors)])
+        self._chunks_remaining -= 1
+        if self._chunks_remaining == 0:
+            self.status = ImportJobState.COMPLETED
+            self.finished_at = datetime.now(timezone.utc)
+
+    def fail(self, error: str) -> None:
+        """Give up on the rows not yet attempted"""
+        self.status = ImportJobState.FAILED
+        self.error = error
+        self.finished_at = datetime.now(timezone.utc)
+
+    def to_status(self) -> ImportJobStatus:
+        return ImportJobStatus(
+            id=self.id,
+            status=self.status,
+            total=self.total,
+            processed=self.processed,
+            failed=self.failed,
+            remaining=self.total - self.processed - self.failed,
+            errors=sorted(self.errors, key=lambda error: error.row),
+            error=self.error,
+            created_at=self.created_at,
+            updated_at=datetime.now(timezone.utc),
+            finished_at=self.finished_at,
+        )
+
+
+class ImportJobManager:
+    """Queues import chunks and runs them on a fixed pool of workers.
+
+    Throughput is tuned with ``workers`` (chunks imported concurrently) and
+    ``chunk_size`` (rows per transaction). Workers start with the first
+    submission and run until ``stop`` is called. Job status is saved to
+    ``backend`` after every change, and every ``heartbeat_seconds`` while the
+    job is unfinished, and kept for ``ttl_seconds`` after that.
+    """
+
+    def __init__(
+        self,
+        workers: int = IMPORT_WORKERS,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        backend: CacheBackend = cache_backend,
+        ttl_seconds: float = IMPORT_JOB_TTL_SECONDS,
+        heartbeat_seconds: float = IMPORT_JOB_HEARTBEAT_SECONDS,
+    ):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.session_factory = session_factory
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._jobs: dict[str, ImportJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._save_lock: Optional[asyncio.Lock] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def submit(
+        self, drugs_data: List[DrugCreate], idempotency_key: Optional[str] = None
+    ) -> ImportJobStatus:
+        """Queue a batch for import and return its job without waiting.
+
+        Resubmitting with the idempotency key of a retained job returns that
+        job instead of importing the batch again.
+        """
+        if idempotency_key:
+            job_status = await self._get_by_idempotency_key(idempotency_key)
+            if job_status is not None:
+                return job_status
+
+        if not drugs_data:
+            raise HTTPException(status_code=400, detail="No drug data provided")
+        check_unique_skus([drug_data.sku for drug_data in drugs_data])
+
+        self._start()
+        chunks = range(0, len(drugs_data), self.chunk_size)
+        job = ImportJob(total=len(drugs_data), chunks=len(chunks))
+        # Saved before the key is claimed, so whoever sees the key finds the job
+        await self._save(job)
+        if idempotency_key and not await self.backend.add(
+            _idempotency_key(idempotency_key), job.id.encode(), self.ttl_seconds
+        ):
+            # The same submission was accepted meanwhile, maybe by another worker
+            await self.backend.delete(_job_key(job.id))
+            job_status = await self._get_by_idempotency_key(idempotency_key)
+            if job_status is not None:
+                return job_status
+
+        self._jobs[job.id] = job
+        for start in chunks:
+            self._queue.put_nowait(
+                (job, start, drugs_data[start : start + self.chunk_size])
+            )
+        return job.to_status()
+
+    async def get(self, job_id: str) -> Optional[ImportJobStatus]:
+        data = await self.backend.get(_job_key(job_id))
+        if data is None:
+            return None
+        job_status = ImportJobStatus.model_validate_json(data)
+        silent_seconds = (
+            datetime.now(timezone.utc) - job_status.updated_at
+        ).total_seconds()
+        if (
+            job_status.status in (ImportJobState.QUEUED, ImportJobState.RUNNING)
+            and silent_seconds > 3 * self.heartbeat_seconds
+        ):
+            return job_status.model_copy(
+                update={
+                    "status": ImportJobState.FAILED,
+                    "error": "The process running the import stopped",
+                }
+            )
+        return job_status
+
+    async def stop(self) -> None:
+        """Stop the workers, failing the jobs they had not finished"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job in list(self._jobs.values()):
+            await self._fail(job, "The import was stopped before it finished")
+        self._tasks = []
+        self._queue = None
+        self._save_lock = None
+
+    def _start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._save_lock = asyncio.Lock()
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"import-worker-{index}")
+            for index in range(self.workers)
+        ]
+        self._tasks.append(
+            asyncio.create_task(self._heartbeat(), name="import-heartbeat")
+        )
+
+    async def _get_by_idempotency_key(
+        self, idempotency_key: str
+    ) -> Optional[ImportJobStatus]:
+        job_id = await self.backend.get(_idempotency_key(idempotency_key))
+        return None if job_id is None else await self.get(job_id.decode())
+
+    async def _save(self, job: ImportJob) -> None:
+        # Chunks of a job finish concurrently; the status is taken under the
+        # lock so a slower save can never overwrite newer progress
+        async with self._save_lock:
+            await self.backend.set(
+                _job_key(job.id),
+                job.to_status().model_dump_json().encode(),
+                self.ttl_seconds,
+            )
+        if job.finished:
+            self._jobs.pop(job.id, None)
+
+    async def _fail(self, job: ImportJob, error: str) -> None:
+        job.fail(error)
+        try:
+            await self._save(job)
+        except Exception:
+            logger.exception("Import job %s could not be marked failed", job.id)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for job in list(self._jobs.values()):
+                try:
+                    await self._save(job)
+                except Exception:
+                    logger.exception("Import job %s could not be updated", job.id)
+
+    async def _work(self) -> None:
+        while True:
+            job, start, drugs_data = await self._queue.get()
+            try:
+                await self._import_chunk(job, start, drugs_data)
+            except Exception:
+                logger.exception("Import job %s could not be updated", job.id)
+                await self._fail(job, "The import could not be recorded")
+            finally:
+                self._queue.task_done()
+
+    async def _import_chunk(
+        self, job: ImportJob, start: int, drugs_data: List[DrugCreate]
+    ) -> None:
+        if job.status == ImportJobState.FAILED:
+            # The rest of a failed job is dropped
+            return
+        if job.status == ImportJobState.QUEUED:
+            job.status = ImportJobState.RUNNING
+            await self._save(job)
+        rows = [(start + index + 1, drug) for index, drug in enumerate(drugs_data)]
+
+        try:
+            async with self.session_factory() as db:
+                service = DrugService(CachedDrugRepository(DrugRepository(db)))
+                created, errors = await service.import_rows(rows)
+        except Exception:
+            logger.exception("Import job %s failed on rows from %d", job.id, start + 1)
+            created = 0
+            errors = [
+                RowError(row=row, field="row", message="Row could not be imported")
+                for row, _ in rows
+            ]
+
+        job.record_chunk(created, len(rows), errors)
+        await self._save(job)
+
+
+def _job_key(job_id: str) -> str:
+    return f"import-job:{job_id}"
+
+
+def _idempotency_key(idempotency_key: str) -> str:
+    return f"import-key:{idempotency_key}"
+
+
+import_job_manager = ImportJobManager()
@@ -0,0 +1,606 @@
+"""Load generator replaying the web app's traffic against the API.
+
+Virtual users repeat what the web app does, picked by weight: polling the
+drug list, typeahead searches, category loads, the dashboard's stats,
+low-stock and expiring-soon calls, edits and the occasional batch import.
+Alternatively ``--replay`` sends the requests of a captured access log.
+Throughput and p50/p95/p99 latency are reported per route, with the database
+time from Server-Timing when the API sends it and the pool's stats from
+``/api/v1/diagnostics/pool`` at the end, given the API's ``ADMIN_TOKEN``.
+
+    python -m benchmarks.load --users 20 --duration 60
+    python -m benchmarks.load --url http://localhost:8000 --users 50
+    python -m benchmarks.load --url http://localhost:8000 --replay access.log
+
+Without ``--url`` the app runs in this process on ASGI, configured from the
+environment like the server (DATABASE_URL and the rest), so nothing but the
+app itself is measured. Batch imports and edits write to that database.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import secrets
+import statistics
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, AsyncIterator, Iterable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+import httpx
+from starlette.routing import BaseRoute, Match, Route
+from app.monitoring.server_timing import parse_server_timing, query_count
+
+API_PREFIX = "/api/v1/drugs"
+DEFAULT_USERS = 10
+DEFAULT_DURATION = 30.0
+DEFAULT_THINK_SECONDS = 0.5
+REQUEST_TIMEOUT_SECONDS = 30.0
+
+# The web app's page size, and the pages a list view reads at most. The web
+# app loads the first page and the next ones as the user scrolls down.
+LIST_PAGE_SIZE = 50
+LIST_MAX_PAGES = 3
+
+LOW_STOCK_THRESHOLD = 100
+EXPIRING_SOON_DAYS = 90
+BATCH_IMPORT_SIZE = 50
+
+# Actions of a web app user, by how often they happen
+TRAFFIC_MIX = {
+    "list": 30,
+    "typeahead": 20,
+    "category": 15,
+    "stats": 10,
+    "low_stock": 7,
+    "expiring_soon": 7,
+    "edit": 9,
+    "batch_import": 2,
+}
+
+# Typed when no drug names have been seen yet
+FALLBACK_SEARCHES = ["amox", "ibup", "metf", "lisin", "atorv", "omep"]
+
+# Drug ids and names remembered from list responses for edits and typeahead
+MAX_KNOWN_DRUGS = 1000
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of values"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def route_label(routes: List[BaseRoute], method: str, target: str) -> str:
+    """Name a request by its method and route template, like the metrics do.
+
+    Requests to the drug list are told apart by whether they search or load
+    a category, as those are different workloads behind one route.
+    """
+    url = urlsplit(target)
+    scope = {"type": "http", "method": method, "path": url.path}
+    path = url.path
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            path = getattr(route, "path", url.path)
+            break
+    label = f"{method} {path}"
+    if path == f"{API_PREFIX}/":
+        query = parse_qs(url.query)
+        for name in ("search", "category"):
+            if query.get(name):
+                return f"{label}?{name}"
+    return label
+
+
+@dataclass
+class RouteStats:
+    """Outcomes of the requests sent to one route"""
+
+    seconds: List[float] = field(default_factory=list)
+    db_seconds: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+    def record(self, response: Optional[httpx.Response], seconds: float) -> None:
+        self.seconds.append(seconds)
+        if response is None:
+            self.errors += 1
+            return
+        self.statuses[response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors += 1
+        header = response.headers.get("server-timing")
+        if header:
+            db = parse_server_timing(header).get("db", {})
+            if "dur" in db:
+                self.db_seconds.append(float(db["dur"]) / 1000)
+            count = query_count(header)
+            if count is not None:
+                self.queries.append(count)
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        summary = {
+            "requests": len(self.seconds),
+            "errors": self.errors,
+            "statuses": {str(status): n for status, n in sorted(self.statuses.items())},
+            "throughput": len(self.seconds) / elapsed if elapsed else 0.0,
+            "seconds": {
+                **{f"p{p}": percentile(self.seconds, p) for p in PERCENTILES},
+                "mean": statistics.fmean(self.seconds),
+                "max": max(self.seconds),
+            },
+        }
+        if self.db_seconds:
+            summary["db_seconds"] = {
+                f"p{p}": percentile(self.db_seconds, p) for p in PERCENTILES
+            }
+        if self.queries:
+            summary["queries_per_request"] = statistics.fmean(self.queries)
+        return summary
+
+
+class LoadRun:
+    """Requests sent during one run and what came back, by route"""
+
+    def __init__(self, client: httpx.AsyncClient, routes: List[BaseRoute]):
+        self.client = client
+        self.routes = routes
+        self.stats: dict[str, RouteStats] = {}
+        self.skipped = 0
+        self.started = time.perf_counter()
+
+    async def send(
+        self, method: str, url: str, **kwargs: Any
+    ) -> Optional[httpx.Response]:
+        """Send a request and record it; None if it failed to complete"""
+        target = url
+        if kwargs.get("params"):
+            target = str(httpx.URL(url, params=kwargs["params"]))
+        route = route_label(self.routes, method, target)
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - started
+
+        self.stats.setdefault(route, RouteStats()).record(response, elapsed)
+        return response
+
+    def report(self) -> dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        routes = {
+            route: stats.summary(elapsed) for route, stats in sorted(self.stats.items())
+        }
+        seconds = [s for stats in self.stats.values() for s in stats.seconds]
+        return {
+            "elapsed_seconds": elapsed,
+            "requests": len(seconds),
+            "errors": sum(stats.errors for stats in self.stats.values()),
+            "skipped": self.skipped,
+            "throughput": len(seconds) / elapsed if elapsed else 0.0,
+            "seconds": (
+                {f"p{p}": percentile(seconds, p) for p in PERCENTILES}
+                if seconds
+                else {}
+            ),
+            "routes": routes,
+        }
+
+
+class WebAppTraffic:
+    """The requests the web app makes for each user action.
+
+    Drug ids and names seen in list responses are shared by every virtual
+    user, so edits target existing drugs and typeahead types real names.
+    """
+
+    def __init__(self, run: LoadRun):
+        self.run = run
+        self.drug_ids: List[int] = []
+        self.drug_names: List[str] = []
+        self.categories: List[str] = []
+        self.batch_id = secrets.token_hex(4)
+        self.batches = 0
+
+    def remember(self, drugs: Iterable[dict[str, Any]]) -> None:
+        for drug in drugs:
+            if len(self.drug_ids) >= MAX_KNOWN_DRUGS:
+                return
+            self.drug_ids.append(drug["id"])
+            self.drug_names.append(drug["name"])
+
+    async def list_drugs(self, params: dict[str, Any]) -> None:
+        """Read pages of the drug list, scrolling down like the web app"""
+        params = {**params, "limit": LIST_PAGE_SIZE}
+        for _ in range(LIST_MAX_PAGES):
+            response = await self.run.send("GET", f"{API_PREFIX}/", params=params)
+            if response is None or response.status_code != 200:
+                return
+            page = response.json()
+            self.remember(page["items"])
+            if not page["next_cursor"]:
+                return
+            params["cursor"] = page["next_cursor"]
+
+    async def list(self, rng: random.Random) -> None:
+        await self.list_drugs({})
+
+    async def typeahead(self, rng: random.Random) -> None:
+        """Search for each prefix of a drug name as it is typed"""
+        word = rng.choice(self.drug_names or FALLBACK_SEARCHES).split()[0]
+        for length in range(2, min(len(word), 6) + 1):
+            await self.list_drugs({"search": word[:length]})
+
+    async def category(self, rng: random.Random) -> None:
+        if not self.categories:
+            response = await self.run.send("GET", f"{API_PREFIX}/categories")
+            if response is None or response.status_code != 200:
+                return
+            self.categories = response.json()
+        if self.categories:
+            await self.list_drugs({"category": rng.choice(self.categories)})
+
+    async def stats(self, rng: random.Random) -> None:
+        await self.run.send(
+            "GET",
+            f"{API_PREFIX}/stats",
+            params={
+                "low_stock_threshold": LOW_STOCK_THRESHOLD,
+                "expiring_within_days": EXPIRING_SOON_DAYS,
+            },
+        )
+
+    async def low_stock(self, rng: random.Random) -> None:
+        await self.run.send(
+            "GET",
+            f"{API_PREFIX}/low-stock",
+            params={"threshold": LOW_STOCK_THRESHOLD},
+        )
+
+    async def expiring_soon(self, rng: random.Random) -> None:
+        await self.run.send(
+            "GET",
+            f"{API_PREFIX}/expiring-soon",
+            params={"days": EXPIRING_SOON_DAYS},
+        )
+
+    async def edit(self, rng: random.Random) -> None:
+        """Open a drug and save a new quantity, as the edit form does"""
+        if not self.drug_ids:
+            await self.list(rng)
+            return
+        drug_id = rng.choice(self.drug_ids)
+        response = await self.run.send("GET", f"{API_PREFIX}/{drug_id}")
+        if response is None or response.status_code != 200:
+            return
+        await self.run.send(
+            "PUT",
+            f"{API_PREFIX}/{drug_id}",
+            json={"quantity": rng.randint(1, 1000)},
+        )
+
+    async def batch_import(self, rng: random.Random) -> None:
+        """Create a batch of new drugs, as an import from the web app does"""
+        self.batches += 1
+        expiration = date.today() + timedelta(days=365)
+        drugs = [
+            {
+                "name": f"Load Test Drug {self.batches}-{index}",
+                "sku": f"LOAD-{self.batch_id}-{self.batches}-{index}",
+                "generic_name": "loadtestamine",
+                "dosage": "10mg",
+                "quantity": rng.randint(1, 1000),
+                "expiration_date": expiration.isoformat(),
+                "manufacturer": "Load Test Labs",
+                "price": round(rng.uniform(1, 100), 2),
+                "category": rng.choice(self.categories or ["Analgesic"]),
+            }
+            for index in range(BATCH_IMPORT_SIZE)
+        ]
+        await self.run.send("POST", f"{API_PREFIX}/batch", json=drugs)
+
+
+async def run_mix(
+    run: LoadRun,
+    users: int,
+    duration: float,
+    think_seconds: float = DEFAULT_THINK_SECONDS,
+    seed: Optional[int] = None,
+) -> None:
+    """Have users act out the web app's traffic mix for duration seconds"""
+    traffic = WebAppTraffic(run)
+    actions = list(TRAFFIC_MIX)
+    weights = list(TRAFFIC_MIX.values())
+    deadline = time.perf_counter() + duration
+
+    async def user(number: int) -> None:
+        rng = random.Random(None if seed is None else seed + number)
+        while time.perf_counter() < deadline:
+            action = rng.choices(actions, weights)[0]
+            await getattr(traffic, action)(rng)
+            if think_seconds > 0:
+                await asyncio.sleep(rng.expovariate(1 / think_seconds))
+
+    await asyncio.gather(*(user(number) for number in range(users)))
+
+
+@dataclass
+class LogEntry:
+    """A request from an access log, at its offset from the first one"""
+
+    method: str
+    target: str
+    offset: Optional[float] = None
+
+
+# The quoted request line, as in the combined log format and uvicorn's log
+_REQUEST_LINE = re.compile(r'"([A-Z]+) (\S+) HTTP/[\d.]+"')
+# The combined log format's [10/Oct/2025:13:55:36 +0000] timestamp
+_TIMESTAMP = re.compile(r"\[(\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2} [+-]\d{4})\]")
+
+
+def parse_access_log(lines: Iterable[str]) -> List[LogEntry]:
+    """Read the requests of an access log, skipping lines that are not one.
+
+    Offsets are filled in when every request line has a timestamp.
+    """
+    entries = []
+    times: List[Optional[datetime]] = []
+    for line in lines:
+        request = _REQUEST_LINE.search(line)
+        if request is None:
+            continue
+        entries.append(LogEntry(request.group(1), request.group(2)))
+        timestamp = _TIMESTAMP.search(line)
+        times.append(
+            datetime.strptime(timestamp.group(1), "%d/%b/%Y:%H:%M:%S %z")
+            if timestamp
+            else None
+        )
+
+    if entries and all(times):
+        first = times[0]
+        for entry, logged_at in zip(entries, times):
+            entry.offset = (logged_at - first).total_seconds()
+    return entries
+
+
+async def run_replay(
+    run: LoadRun,
+    entries: List[LogEntry],
+    users: int,
+    speed: float = 1.0,
+) -> None:
+    """Send the requests of an access log through users connections.
+
+    Logged times are kept, scaled by speed, when the log has them and speed
+    is above 0; otherwise requests are sent as fast as users allow. Access
+    logs carry no request bodies, so only GET and HEAD requests are sent;
+    the others are counted as skipped.
+    """
+    queue: asyncio.Queue[Optional[LogEntry]] = asyncio.Queue(maxsize=users * 2)
+    paced = speed > 0 and all(entry.offset is not None for entry in entries)
+
+    async def produce() -> None:
+        started = time.perf_counter()
+        for entry in entries:
+            if entry.method not in ("GET", "HEAD"):
+                run.skipped += 1
+                continue
+            if paced:
+                delay = entry.offset / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await queue.put(entry)
+        for _ in range(users):
+            await queue.put(None)
+
+    async def user() -> None:
+        while (entry := await queue.get()) is not None:
+            await run.send(entry.method, entry.target)
+
+    await asyncio.gather(produce(), *(user() for _ in range(users)))
+
+
+async def server_routes(client: httpx.AsyncClient) -> List[BaseRoute]:
+    """The routes the server documents in its OpenAPI schema, for labels"""
+    try:
+        response = await client.get("/openapi.json")
+        response.raise_for_status()
+        paths = response.json()["paths"]
+    except (httpx.HTTPError, ValueError, KeyError):
+        # Requests are labelled by their raw paths then
+        return []
+    return [
+        Route(path, endpoint=_documented, methods=[m.upper() for m in methods])
+        for path, methods in paths.items()
+    ]
+
+
+def _documented(request: Any) -> None:
+    """Endpoint of a route known only from the server's schema"""
+
+
+@asynccontextmanager
+async def open_client(
+    url: Optional[str], users: int
+) -> AsyncIterator[tuple[httpx.AsyncClient, List[BaseRoute]]]:
+    """A client for the server at url, or for the app run in this process"""
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    # Users share the client, so one user's last-write cookie must not send
+    # every other user's reads to the primary
+    cookies = CookieJar(DefaultCookiePolicy(allowed_domains=[]))
+    if url:
+        async with httpx.AsyncClient(
+            base_url=url,
+            limits=limits,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            cookies=cookies,
+        ) as client:
+            yield client, await server_routes(client)
+        return
+
+    # Imported here as the app builds the database engines on import, which
+    # a run against a server must not need
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://pharmatrack",
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            cookies=cookies,
+        ) as client:
+            yield client, app.routes
+
+
+async def pool_report(
+    client: httpx.AsyncClient, admin_token: Optional[str] = None
+) -> Optional[dict[str, Any]]:
+    """The database pool's stats after the run, if the API reports them"""
+    if not admin_token:
+        return None
+    try:
+        response = await client.get(
+            "/api/v1/diagnostics/pool", headers={"X-Admin-Token": admin_token}
+        )
+    except httpx.HTTPError:
+        return None
+    return response.json() if response.status_code == 200 else None
+
+
+async def run_load(
+    url: Optional[str] = None,
+    users: int = DEFAULT_USERS,
+    duration: float = DEFAULT_DURATION,
+    think_seconds: float = DEFAULT_THINK_SECONDS,
+    replay: Optional[List[LogEntry]] = None,
+    speed: float = 1.0,
+    seed: Optional[int] = None,
+    admin_token: Optional[str] = None,
+) -> dict[str, Any]:
+    """Run the traffic mix, or replay log entries, and report on it"""
+    async with open_client(url, users) as (client, routes):
+        run = LoadRun(client, routes)
+        if replay is not None:
+            await run_replay(run, replay, users, speed)
+        else:
+            await run_mix(run, users, duration, think_seconds, seed)
+        report = run.report()
+        pool = await pool_report(client, admin_token)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "target": url or "asgi",
+        "users": users,
+        "mode": "replay" if replay is not None else "mix",
+        **report,
+        "pool": pool,
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """A table of the report's routes for the terminal"""
+    lines = [
+        f"{'route':<44} {'reqs':>7} {'err':>5} {'req/s':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db p95':>9}"
+    ]
+    for route, stats in report["routes"].items():
+        seconds = stats["seconds"]
+        db = stats.get("db_seconds", {}).get("p95")
+        lines.append(
+            f"{route:<44} {stats['requests']:>7} {stats['errors']:>5} "
+            f"{stats['throughput']:>8.1f} {seconds['p50'] * 1000:>9.1f} "
+            f"{seconds['p95'] * 1000:>9.1f} {seconds['p99'] * 1000:>9.1f} "
+            f"{'' if db is None else f'{db * 1000:.1f}':>9}"
+        )
+    lines.append(
+        f"{report['requests']} requests in {report['elapsed_seconds']:.1f}s, "
+        f"{report['throughput']:.1f} req/s, {report['errors']} errors"
+        + (f", {report['skipped']} skipped" if report["skipped"] else "")
+    )
+    pools = report.get("pool") or {}
+    for name, pool in [
+        ("pool", pools.get("primary")),
+        *(("replica pool", replica) for replica in pools.get("replicas", [])),
+    ]:
+        if pool and pool.get("checked_out") is not None:
+            lines.append(
+                f"{name} {pool['database']}: {pool['checked_out']} of "
+                f"{pool['size']} connections out, {pool['overflow']} overflow, "
+                f"{pool['timeouts']} checkout timeouts, "
+                f"{pool['wait_seconds']['count']} checkouts"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running server; default runs the app here")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    parser.add_argument(
+        "--think",
+        type=float,
+        default=DEFAULT_THINK_SECONDS,
+        help="mean seconds a user waits between actions; 0 for none",
+    )
+    parser.add_argument("--replay", help="access log to replay instead of the mix")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay the log this many times faster; 0 sends it as fast as "
+        "users allow",
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="also write the report as JSON")
+    parser.add_argument(
+        "--admin-token",
+        default=os.getenv("ADMIN_TOKEN"),
+        help="the API's ADMIN_TOKEN, to report its pools; defaults to the "
+        "environment's",
+    )
+    args = parser.parse_args(argv)
+
+    entries = None
+    if args.replay:
+        with open(args.replay) as file:
+            entries = parse_access_log(file)
+
+    report = asyncio.run(
+        run_load(
+            args.url,
+            args.users,
+            args.duration,
+            args.think,
+            entries,
+            args.speed,
+            args.seed,
+            args.admin_token,
+        )
+    )
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
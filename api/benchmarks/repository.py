@@ -0,0 +1,493 @@
+"""Benchmarks for every DrugRepositoryInterface method.
+
+Each database is seeded with 1k, 100k and 1M generated drugs (by default) and
+every repository method is timed against it, reads first and then writes.
+Results are written as JSON, one file per run, to compare across commits:
+
+    python -m benchmarks.repository --output results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.repository --sizes 1000 --compare results/abc123.json
+
+SQLite runs on a fresh file in a temporary directory. PostgreSQL runs only
+when ``--postgres-url`` (or ``BENCHMARK_POSTGRES_URL``) is given; every table
+in that database is dropped and recreated, so point it at a scratch database.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+# The app's own engines are never used here, but they are built on import
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import sqlalchemy
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from app.cache.backend import MemoryCacheBackend
+from app.database import get_async_database_url, run_migrations
+from app.models.drug import Drug
+from app.repositories.drug_repository import DrugRepository
+from app.repositories.table_version import TableVersion
+from app.schemas.drug import DrugCreate, DrugFilters, DrugSort, DrugUpdate
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 5
+SEED_CHUNK_SIZE = 5_000
+WRITE_BATCH_SIZE = 1_000
+
+# SKUs of drugs created by the write benchmarks, removed after each size
+NEW_SKU_PREFIX = "BENCH-NEW-"
+
+CATEGORIES = [
+    "Analgesic",
+    "Antibiotic",
+    "Antidepressant",
+    "Antidiabetic",
+    "Antifungal",
+    "Antihistamine",
+    "Antihypertensive",
+    "Antiviral",
+    "Anticoagulant",
+    "Bronchodilator",
+    "Corticosteroid",
+    "Diuretic",
+    "Hormone",
+    "Immunosuppressant",
+    "NSAID",
+    "Proton Pump Inhibitor",
+    "Sedative",
+    "Statin",
+    "Vaccine",
+    "Vitamin",
+]
+SYLLABLES = ["am", "ox", "ci", "lin", "pra", "zol", "met", "for", "sta", "tin", "val"]
+MANUFACTURERS = [f"{name} Pharma" for name in ("Acme", "Nova", "Helix", "Orion")] + [
+    f"Generic Labs {number}" for number in range(46)
+]
+DOSAGES = ["5mg", "10mg", "20mg", "50mg", "100mg", "250mg", "500mg", "1g"]
+
+# Matches a few percent of generated names, like a typed drug name would
+SEARCH_TERM = "praval"
+
+
+def drug_values(index: int, rng: random.Random, today: date) -> dict[str, Any]:
+    """Column values of the index-th generated drug"""
+    name = "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+    return {
+        "sku": f"BENCH-{index:07d}",
+        "name": f"{name} {index}",
+        "generic_name": name.lower(),
+        "dosage": rng.choice(DOSAGES),
+        "quantity": rng.randint(1, 1000),
+        "expiration_date": today + timedelta(days=rng.randint(1, 3 * 365)),
+        "manufacturer": rng.choice(MANUFACTURERS),
+        "price": round(rng.uniform(1, 500), 2),
+        "category": rng.choice(CATEGORIES),
+        "description": f"Generated drug {index} for benchmarks",
+    }
+
+
+def new_drugs(label: str, count: int, start: int = 0) -> List[DrugCreate]:
+    """Drugs with SKUs no seeded drug has, for the write benchmarks"""
+    rng = random.Random(f"{label}-{start}")
+    today = date.today()
+    return [
+        DrugCreate(
+            **{
+                **drug_values(index, rng, today),
+                "sku": f"{NEW_SKU_PREFIX}{label}-{index:07d}",
+            }
+        )
+        for index in range(start, start + count)
+    ]
+
+
+async def seed(engine: AsyncEngine, size: int) -> None:
+    """Insert size generated drugs, newest first by created_at"""
+    rng = random.Random(size)
+    today = date.today()
+    created = datetime.now(timezone.utc)
+    async with engine.begin() as connection:
+        for start in range(0, size, SEED_CHUNK_SIZE):
+            rows = []
+            for index in range(start, min(start + SEED_CHUNK_SIZE, size)):
+                row = drug_values(index, rng, today)
+                row["created_at"] = created - timedelta(seconds=index)
+                rows.append(row)
+            await connection.execute(insert(Drug.__table__), rows)
+
+
+@dataclass
+class Case:
+    """One timed call of a repository method.
+
+    run gets a repository on a fresh session and the repetition number, so
+    write cases can use new data on every repetition.
+    """
+
+    name: str
+    method: str
+    run: Callable[[DrugRepository, int], Awaitable[Any]]
+    max_size: Optional[int] = None
+
+
+async def _consume(batches: AsyncIterator[List[Any]]) -> int:
+    return sum([len(batch) async for batch in batches])
+
+
+async def _import_chunks(drugs: List[DrugCreate]):
+    for start in range(0, len(drugs), WRITE_BATCH_SIZE):
+        yield [
+            (start + index + 1, drug)
+            for index, drug in enumerate(drugs[start : start + WRITE_BATCH_SIZE])
+        ]
+
+
+def build_cases(size: int) -> List[Case]:
+    """Every benchmark case for a database seeded with size drugs"""
+    today = date.today()
+    middle_id = size // 2 + 1
+    middle_sku = f"BENCH-{size // 2:07d}"
+    last_page = max(1, size // 50)
+    filters = DrugFilters(
+        category="Antibiotic", min_quantity=100, sort=DrugSort.NAME_DESC
+    )
+    existing_skus = [f"BENCH-{index:07d}" for index in range(0, size, 7)]
+
+    def sku_list(count: int) -> List[str]:
+        # Half existing, half missing, as in a typical batch import check
+        missing = [f"BENCH-MISSING-{index}" for index in range(count // 2)]
+        return (existing_skus[: count - len(missing)] + missing)[:count]
+
+    created_ids: List[int] = []
+
+    async def create(repository: DrugRepository, repetition: int):
+        drug = await repository.create(new_drugs("create", 1, repetition)[0])
+        created_ids.append(drug.id)
+
+    async def update(repository: DrugRepository, repetition: int):
+        drug_id = created_ids[repetition % len(created_ids)]
+        await repository.update(drug_id, DrugUpdate(quantity=repetition + 1))
+
+    async def delete_drug(repository: DrugRepository, repetition: int):
+        await repository.delete(created_ids.pop())
+
+    def write_batch(label: str, repetition: int) -> List[DrugCreate]:
+        return new_drugs(label, WRITE_BATCH_SIZE, repetition * WRITE_BATCH_SIZE)
+
+    async def upsert(repository: DrugRepository, repetition: int):
+        # Half the batch updates drugs inserted by the previous repetition
+        drugs = new_drugs(
+            "upsert", WRITE_BATCH_SIZE, repetition * WRITE_BATCH_SIZE // 2
+        )
+        await repository.upsert(drugs)
+
+    return [
+        Case("get_all", "get_all", lambda r, _: r.get_all(), max_size=100_000),
+        Case("get_by_id", "get_by_id", lambda r, _: r.get_by_id(middle_id)),
+        Case("get_by_sku", "get_by_sku", lambda r, _: r.get_by_sku(middle_sku)),
+        Case("exists", "exists", lambda r, _: r.exists(middle_sku)),
+        Case(
+            "stream_all",
+            "stream_all",
+            lambda r, _: _consume(r.stream_all(1000)),
+        ),
+        Case("search", "search", lambda r, _: r.search(SEARCH_TERM)),
+        Case(
+            "search_paginated first page",
+            "search_paginated",
+            lambda r, _: r.search_paginated(SEARCH_TERM, 1, 50),
+        ),
+        Case(
+            "search_paginated page 20",
+            "search_paginated",
+            lambda r, _: r.search_paginated(SEARCH_TERM, 20, 50),
+        ),
+        Case(
+            "filter_by_category",
+            "filter_by_category",
+            lambda r, _: r.filter_by_category("Antibiotic"),
+        ),
+        Case("get_low_stock", "get_low_stock", lambda r, _: r.get_low_stock(100)),
+        Case(
+            "get_low_stock_rows",
+            "get_low_stock_rows",
+            lambda r, _: r.get_low_stock_rows(100),
+        ),
+        Case(
+            "get_expiring 90 days",
+            "get_expiring",
+            lambda r, _: r.get_expiring(today, today + timedelta(days=90)),
+        ),
+        Case(
+            "get_expiring_rows 90 days",
+            "get_expiring_rows",
+            lambda r, _: r.get_expiring_rows(today, today + timedelta(days=90)),
+        ),
+        Case(
+            "check_existing_skus 1000",
+            "check_existing_skus",
+            lambda r, _: r.check_existing_skus(sku_list(1_000)),
+        ),
+        Case(
+            "check_existing_skus 10000",
+            "check_existing_skus",
+            lambda r, _: r.check_existing_skus(sku_list(10_000)),
+        ),
+        Case(
+            "get_category_counts",
+            "get_category_counts",
+            lambda r, _: r.get_category_counts(),
+        ),
+        Case(
+            "get_stats",
+            "get_stats",
+            lambda r, _: r.get_stats(100, today, today + timedelta(days=90)),
+        ),
+        Case(
+            "get_paginated first page",
+            "get_paginated",
+            lambda r, _: r.get_paginated(1, 50),
+        ),
+        Case(
+            "get_paginated last page",
+            "get_paginated",
+            lambda r, _: r.get_paginated(last_page, 50),
+        ),
+        Case(
+            "find filtered and sorted",
+            "find",
+            lambda r, _: r.find(filters, limit=50),
+        ),
+        Case(
+            "find_rows filtered and sorted",
+            "find_rows",
+            lambda r, _: r.find_rows(filters, limit=50),
+        ),
+        Case("create", "create", create),
+        Case("update", "update", update),
+        Case("delete", "delete", delete_drug),
+        Case(
+            f"batch_create {WRITE_BATCH_SIZE}",
+            "batch_create",
+            lambda r, n: r.batch_create(write_batch("batch", n)),
+        ),
+        Case(
+            f"batch_create_partial {WRITE_BATCH_SIZE}",
+            "batch_create_partial",
+            lambda r, n: r.batch_create_partial(write_batch("partial", n)),
+        ),
+        Case(f"upsert {WRITE_BATCH_SIZE}", "upsert", upsert),
+        Case(
+            f"import_drugs {10 * WRITE_BATCH_SIZE}",
+            "import_drugs",
+            lambda r, n: r.import_drugs(
+                _import_chunks(new_drugs("import", 10 * WRITE_BATCH_SIZE, n * 10_000))
+            ),
+        ),
+    ]
+
+
+def _rows(result: Any) -> Optional[int]:
+    """Number of drugs a call returned, where that is meaningful"""
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return None
+
+
+async def run_case(
+    session_factory: async_sessionmaker, case: Case, repeat: int
+) -> dict[str, Any]:
+    """Time repeat calls of a case after one untimed warm-up call"""
+    timings = []
+    rows = None
+    for repetition in range(repeat + 1):
+        async with session_factory() as db:
+            repository = DrugRepository(db, TableVersion("drugs", MemoryCacheBackend()))
+            started = time.perf_counter()
+            result = await case.run(repository, repetition)
+            elapsed = time.perf_counter() - started
+        if repetition > 0:
+            timings.append(elapsed)
+            rows = _rows(result)
+    return {
+        "name": case.name,
+        "method": case.method,
+        "rows": rows,
+        "seconds": {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+            "max": max(timings),
+        },
+    }
+
+
+async def prepare(engine: AsyncEngine) -> None:
+    """Give the database an empty, fully migrated schema"""
+    async with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            await connection.execute(
+                text("DROP TABLE IF EXISTS drugs, alembic_version CASCADE")
+            )
+        await connection.run_sync(run_migrations)
+
+
+async def run_size(
+    database: str, database_url: str, size: int, repeat: int
+) -> dict[str, Any]:
+    engine = create_async_engine(get_async_database_url(database_url))
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+    try:
+        await prepare(engine)
+        started = time.perf_counter()
+        await seed(engine, size)
+        seed_seconds = time.perf_counter() - started
+        if engine.dialect.name == "postgresql":
+            async with engine.begin() as connection:
+                await connection.execute(text("ANALYZE drugs"))
+
+        cases = []
+        for case in build_cases(size):
+            if case.max_size is not None and size > case.max_size:
+                cases.append(
+                    {
+                        "name": case.name,
+                        "method": case.method,
+                        "skipped": f"only run up to {case.max_size} drugs",
+                    }
+                )
+                continue
+            result = await run_case(session_factory, case, repeat)
+            print(
+                f"{database:>10} {size:>9} {case.name:<36} "
+                f"{result['seconds']['median'] * 1000:10.2f} ms",
+                file=sys.stderr,
+            )
+            cases.append(result)
+
+        async with engine.begin() as connection:
+            await connection.execute(
+                delete(Drug.__table__).where(Drug.sku.startswith(NEW_SKU_PREFIX))
+            )
+    finally:
+        await engine.dispose()
+
+    return {
+        "database": database,
+        "size": size,
+        "seed_seconds": seed_seconds,
+        "cases": cases,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(
+    sizes: List[int],
+    repeat: int = DEFAULT_REPEAT,
+    postgres_url: Optional[str] = None,
+    sqlite_dir: Optional[str] = None,
+) -> dict[str, Any]:
+    """Benchmark every size on SQLite, and on PostgreSQL if a URL is given"""
+    runs = []
+    with tempfile.TemporaryDirectory(dir=sqlite_dir) as directory:
+        for size in sizes:
+            url = f"sqlite:///{os.path.join(directory, f'bench-{size}.db')}"
+            runs.append(await run_size("sqlite", url, size, repeat))
+            os.remove(url.removeprefix("sqlite:///"))
+    if postgres_url:
+        for size in sizes:
+            runs.append(await run_size("postgresql", postgres_url, size, repeat))
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "postgresql": bool(postgres_url),
+        "runs": runs,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> List[str]:
+    """Lines comparing median times of the cases both results contain"""
+    medians = {
+        (run["database"], run["size"], case["name"]): case["seconds"]["median"]
+        for run in baseline["runs"]
+        for case in run["cases"]
+        if "seconds" in case
+    }
+    lines = []
+    for run in current["runs"]:
+        for case in run["cases"]:
+            before = medians.get((run["database"], run["size"], case["name"]))
+            if before is None or "seconds" not in case:
+                continue
+            after = case["seconds"]["median"]
+            lines.append(
+                f"{run['database']:>10} {run['size']:>9} {case['name']:<36} "
+                f"{before * 1000:10.2f} ms -> {after * 1000:10.2f} ms "
+                f"({after / before:5.2f}x)"
+            )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--postgres-url",
+        default=os.getenv("BENCHMARK_POSTGRES_URL"),
+        help="scratch PostgreSQL database; its tables are dropped",
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_benchmarks(args.sizes, args.repeat, args.postgres_url))
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as file:
+            print("\n".join(compare(json.load(file), results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from app.api.v1.api import api_router
-from app.database import create_tables
+from app.cache.backend import cache_backend
+from app.database import async_engine, create_tables_async, read_engines
 from app.models import Drug
 from app.exceptions import validation_exception_handler
+from app.monitoring.loop_lag import loop_lag_monitor
+from app.monitoring.metrics import (
+    METRICS_CONTENT_TYPE,
+    MetricsMiddleware,
+    render_metrics,
+)
+from app.monitoring.profiling import ADMIN_TOKEN, ProfilingMiddleware
+from app.monitoring.queries import install_query_listeners
+from app.repositories.table_version import bump_drug_versions
+from app.services.import_jobs import import_job_manager
 
 app = FastAPI(
     title="PharmaTrack API",
@@ -23,6 +34,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if ADMIN_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+install_query_listeners()
+
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
 app.include_router(api_router, prefix="/api/v1")
@@ -30,8 +46,22 @@ app.include_router(api_router, prefix="/api/v1")
 
 @app.on_event("startup")
 async def startup_event():
-    """Create database tables on startup"""
-    create_tables()
+    """Create database tables and start watching the event loop on startup"""
+    await create_tables_async()
+    # Migrations may have changed rows behind the cached pages and ETags
+    await bump_drug_versions()
+    loop_lag_monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work and release pooled connections on shutdown"""
+    await import_job_manager.stop()
+    await loop_lag_monitor.stop()
+    await cache_backend.close()
+    await async_engine.dispose()
+    for read_engine in read_engines:
+        await read_engine.dispose()
 
 
 @app.get("/health")
@@ -39,6 +69,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose request, database and import metrics to Prometheus"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,81 @@
+"""Alembic environment for the PharmaTrack API."""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.database import DATABASE_URL, Base
+from app import models  # noqa: F401  registers the model tables on Base
+from app.repositories.table_version import bump_drug_table_version
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Advisory lock held by whoever is upgrading a PostgreSQL database; every API
+# worker upgrades on startup, so the others wait and then find nothing to do
+MIGRATION_LOCK_ID = 7_302_114_301
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Leave the SQLite FTS5 tables, which the models do not declare, alone."""
+    if type_ == "table" and name.startswith("drugs_fts"):
+        return False
+    return True
+
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        if connection.dialect.name == "postgresql":
+            # Released with the transaction, once the upgrade has committed
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+        context.run_migrations()
+
+
+def run_migrations_offline():
+    """Emit migration SQL without connecting to the database."""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations on a caller-supplied connection or a fresh engine."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
+    engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    with engine.connect() as connection:
+        do_run_migrations(connection)
+
+    # Run from the alembic command line: let running workers see the changes
+    bump_drug_table_version()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,56 @@
+"""Create drugs table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created with Base.metadata.create_all() before migrations
+    # existed already have this table; adopt it as-is.
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("drugs"):
+        return
+
+    op.create_table(
+        "drugs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("sku", sa.String(length=100), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("generic_name", sa.String(length=100), nullable=False),
+        sa.Column("dosage", sa.String(length=50), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("expiration_date", sa.String(length=10), nullable=False),
+        sa.Column("manufacturer", sa.String(length=100), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("category", sa.String(length=50), nullable=False),
+        sa.Column("description", sa.String(length=500), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_drugs_id", "drugs", ["id"])
+    op.create_index("ix_drugs_name", "drugs", ["name"])
+    op.create_index("ix_drugs_sku", "drugs", ["sku"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_drugs_sku", table_name="drugs")
+    op.drop_index("ix_drugs_name", table_name="drugs")
+    op.drop_index("ix_drugs_id", table_name="drugs")
+    op.drop_table("drugs")
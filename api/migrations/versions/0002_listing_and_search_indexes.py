@@ -0,0 +1,82 @@
+"""Add listing and search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:10:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ("name", "generic_name", "manufacturer")
+
+SQLITE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS drugs_fts USING fts5("
+    "name, generic_name, manufacturer, "
+    "content='drugs', content_rowid='id', tokenize='trigram')"
+)
+
+SQLITE_FTS_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_ai AFTER INSERT ON drugs BEGIN "
+    "INSERT INTO drugs_fts(rowid, name, generic_name, manufacturer) "
+    "VALUES (new.id, new.name, new.generic_name, new.manufacturer); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_ad AFTER DELETE ON drugs BEGIN "
+    "INSERT INTO drugs_fts(drugs_fts, rowid, name, generic_name, manufacturer) "
+    "VALUES ('delete', old.id, old.name, old.generic_name, old.manufacturer); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_au AFTER UPDATE ON drugs BEGIN "
+    "INSERT INTO drugs_fts(drugs_fts, rowid, name, generic_name, manufacturer) "
+    "VALUES ('delete', old.id, old.name, old.generic_name, old.manufacturer); "
+    "INSERT INTO drugs_fts(rowid, name, generic_name, manufacturer) "
+    "VALUES (new.id, new.name, new.generic_name, new.manufacturer); "
+    "END",
+)
+
+
+def upgrade() -> None:
+    op.create_index("ix_drugs_created_at_id", "drugs", ["created_at", "id"])
+    op.create_index(
+        "ix_drugs_category_created_at_id", "drugs", ["category", "created_at", "id"]
+    )
+    op.create_index("ix_drugs_manufacturer", "drugs", ["manufacturer"])
+    op.create_index("ix_drugs_quantity", "drugs", ["quantity"])
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in SEARCH_COLUMNS:
+            op.create_index(
+                f"ix_drugs_{column}_trgm",
+                "drugs",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+    elif dialect == "sqlite":
+        op.execute(SQLITE_FTS_TABLE)
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+        op.execute("INSERT INTO drugs_fts(drugs_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for column in SEARCH_COLUMNS:
+            op.drop_index(f"ix_drugs_{column}_trgm", table_name="drugs")
+    elif dialect == "sqlite":
+        for trigger in ("drugs_fts_ai", "drugs_fts_ad", "drugs_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS drugs_fts")
+
+    op.drop_index("ix_drugs_quantity", table_name="drugs")
+    op.drop_index("ix_drugs_manufacturer", table_name="drugs")
+    op.drop_index("ix_drugs_category_created_at_id", table_name="drugs")
+    op.drop_index("ix_drugs_created_at_id", table_name="drugs")
@@ -0,0 +1,85 @@
+"""Store expiration_date as DATE with an index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:20:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rebuilding the table on SQLite drops its triggers, so they are recreated.
+SQLITE_FTS_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_ai AFTER INSERT ON drugs BEGIN "
+    "INSERT INTO drugs_fts(rowid, name, generic_name, manufacturer) "
+    "VALUES (new.id, new.name, new.generic_name, new.manufacturer); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_ad AFTER DELETE ON drugs BEGIN "
+    "INSERT INTO drugs_fts(drugs_fts, rowid, name, generic_name, manufacturer) "
+    "VALUES ('delete', old.id, old.name, old.generic_name, old.manufacturer); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_au AFTER UPDATE ON drugs BEGIN "
+    "INSERT INTO drugs_fts(drugs_fts, rowid, name, generic_name, manufacturer) "
+    "VALUES ('delete', old.id, old.name, old.generic_name, old.manufacturer); "
+    "INSERT INTO drugs_fts(rowid, name, generic_name, manufacturer) "
+    "VALUES (new.id, new.name, new.generic_name, new.manufacturer); "
+    "END",
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # A batch ALTER would CAST the ISO strings to DATE, which SQLite turns
+        # into integers. Rebuild the table with the new declared type and copy
+        # the values verbatim; SQLAlchemy's Date type reads ISO-8601 text.
+        with op.batch_alter_table(
+            "drugs",
+            recreate="always",
+            reflect_args=[sa.Column("expiration_date", sa.Date(), nullable=False)],
+        ) as batch_op:
+            batch_op.create_index("ix_drugs_expiration_date", ["expiration_date"])
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+        return
+
+    op.alter_column(
+        "drugs",
+        "expiration_date",
+        existing_type=sa.String(length=10),
+        type_=sa.Date(),
+        existing_nullable=False,
+        postgresql_using="expiration_date::date",
+    )
+    op.create_index("ix_drugs_expiration_date", "drugs", ["expiration_date"])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table(
+            "drugs",
+            recreate="always",
+            reflect_args=[
+                sa.Column("expiration_date", sa.String(length=10), nullable=False)
+            ],
+        ) as batch_op:
+            batch_op.drop_index("ix_drugs_expiration_date")
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+        return
+
+    op.drop_index("ix_drugs_expiration_date", table_name="drugs")
+    op.alter_column(
+        "drugs",
+        "expiration_date",
+        existing_type=sa.Date(),
+        type_=sa.String(length=10),
+        existing_nullable=False,
+        postgresql_using="to_char(expiration_date, 'YYYY-MM-DD')",
+    )
@@ -20,6 +20,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 try:
     from app.database import SessionLocal, create_tables, engine
     from app.models.drug import Drug
+    from app.repositories.table_version import bump_drug_table_version
     from sqlalchemy import text
 except ImportError as e:
     print(f"Error importing modules: {e}")
@@ -165,6 +166,7 @@ def seed_database():
             db.add(drug)
 
         db.commit()
+        bump_drug_table_version()
 
         print(f"✅ Successfully seeded database with {len(initial_drugs)} drugs.")
         return True
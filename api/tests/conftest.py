@@ -1,60 +1,82 @@
 """Test configuration and fixtures."""
 
+import asyncio
 import os
+from datetime import date, timedelta
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
-
-from app.database import Base, get_database_session
+# Import chunks share the single in-memory connection, so run them one at a time
+os.environ["IMPORT_WORKERS"] = "1"
+# Query budgets are checked against the Server-Timing header
+os.environ["SERVER_TIMING"] = "true"
+os.environ["ADMIN_TOKEN"] = "test-admin-token"
+
+from app.database import (
+    Base,
+    get_database_session,
+    get_read_session_factory,
+    get_session_factory,
+)
 from main import app
+from app.monitoring.server_timing import parse_server_timing, query_count
 from app.schemas.drug import DrugCreate
+from app.cache.backend import cache_backend
+from app.repositories.drug_cache import drug_cache
+from app.services.import_jobs import import_job_manager
 
-
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def dispose_engine():
+    """Close the shared in-memory connection once the test session ends."""
+    yield
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Keep cached drug data from leaking between test databases."""
+    cache_backend.clear()
+    drug_cache.reset()
 
 
 @pytest.fixture(scope="function")
-def db_session():
+async def db_session():
     """Create a fresh database session for each test."""
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
-    try:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
-        Base.metadata.drop_all(bind=engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
 
 
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client with database dependency override."""
-
-    def override_get_database_session():
-        try:
-            yield db_session
-        finally:
-            pass
-
-    app.dependency_overrides[get_database_session] = override_get_database_session
+    app.dependency_overrides[get_database_session] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+    app.dependency_overrides[get_read_session_factory] = lambda: TestingSessionLocal
+    import_job_manager.session_factory = TestingSessionLocal
 
     with TestClient(app) as test_client:
         yield test_client
@@ -62,6 +84,29 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def query_budget(request):
+    """Fail a test marked query_budget(n) as soon as one of its requests sends
+    more than n SQL statements."""
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is None:
+        return
+    max_queries = marker.args[0]
+
+    def check(response):
+        header = response.headers.get("server-timing", "")
+        count = query_count(header)
+        assert count is not None, f"{response.request.url} has no query count"
+        slowest = parse_server_timing(header).get("db-slowest", {}).get("desc")
+        assert count <= max_queries, (
+            f"{response.request.method} {response.request.url.path} sent "
+            f"{count} SQL statements, over its budget of {max_queries}; "
+            f"slowest: {slowest}"
+        )
+
+    request.getfixturevalue("client").event_hooks["response"].append(check)
+
+
 @pytest.fixture
 def sample_drug_data():
     """Sample drug data for testing."""
@@ -71,7 +116,7 @@ def sample_drug_data():
         "generic_name": "test_medication",
         "dosage": "10mg",
         "quantity": 100,
-        "expiration_date": "2025-12-31",
+        "expiration_date": (date.today() + timedelta(days=365)).isoformat(),
         "manufacturer": "Test Pharma",
         "price": 29.99,
         "category": "Pain Relief",
@@ -86,12 +131,12 @@ def sample_drug_create(sample_drug_data):
 
 
 @pytest.fixture
-def sample_drug(db_session, sample_drug_data):
+async def sample_drug(db_session, sample_drug_create):
     """Create a sample drug in the database."""
     from app.models.drug import Drug
 
-    drug = Drug(**sample_drug_data)
+    drug = Drug(**sample_drug_create.model_dump())
     db_session.add(drug)
-    db_session.commit()
-    db_session.refresh(drug)
+    await db_session.commit()
+    await db_session.refresh(drug)
     return drug
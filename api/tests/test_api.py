@@ -1,5 +1,14 @@
 """Tests for FastAPI drug endpoints."""
 
+import csv
+import gzip
+import io
+import json
+from datetime import date
+
+# Expiration dates must be in the future to pass validation
+NEXT_YEAR = date.today().year + 1
+
 
 class TestDrugAPI:
     """Test cases for drug API endpoints."""
@@ -44,9 +53,69 @@ class TestDrugAPI:
         response = client.get("/api/v1/drugs/")
         assert response.status_code == 200
 
-        data = response.json()
+        data = response.json()["items"]
         assert len(data) == 1
 
+    def test_list_items_match_drug_response(self, client, sample_drug_data):
+        """Test that rows serialized without validation match DrugResponse."""
+        created = client.post("/api/v1/drugs/", json=sample_drug_data).json()
+        client.put(f"/api/v1/drugs/{created['id']}", json={"quantity": 5})
+        drug = client.get(f"/api/v1/drugs/{created['id']}").json()
+
+        assert client.get("/api/v1/drugs/").json()["items"] == [drug]
+        assert client.get("/api/v1/drugs/low-stock").json() == [drug]
+        expiring = client.get("/api/v1/drugs/expiring-soon", params={"days": 365})
+        assert expiring.json() == [drug]
+
+    def test_get_drugs_cursor_pagination(self, client, sample_drug_data):
+        """Test walking the drug list page by page with next_cursor."""
+        for i in range(5):
+            client.post(
+                "/api/v1/drugs/", json={**sample_drug_data, "sku": f"PAGE-{i:03d}"}
+            )
+
+        seen_ids = []
+        params = {"limit": 2}
+        while True:
+            response = client.get("/api/v1/drugs/", params=params)
+            assert response.status_code == 200
+
+            page = response.json()
+            assert len(page["items"]) <= 2
+            seen_ids.extend(drug["id"] for drug in page["items"])
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+
+        assert len(seen_ids) == 5
+        assert seen_ids == sorted(seen_ids, reverse=True)
+
+    def test_get_drugs_sorted_pages_with_filters(self, client, sample_drug_data):
+        """Test sorting and filtering stay consistent across cursor pages."""
+        for i, price in enumerate([5.0, 25.0, 15.0, 35.0, 45.0]):
+            client.post(
+                "/api/v1/drugs/",
+                json={**sample_drug_data, "sku": f"SORT-{i:03d}", "price": price},
+            )
+
+        params = {"sort": "-price", "max_quantity": 100, "limit": 2}
+        first = client.get("/api/v1/drugs/", params=params).json()
+        params["cursor"] = first["next_cursor"]
+        second = client.get("/api/v1/drugs/", params=params).json()
+
+        prices = [drug["price"] for drug in first["items"] + second["items"]]
+        assert prices == [45.0, 35.0, 25.0, 15.0]
+
+    def test_get_drugs_invalid_sort(self, client):
+        """Test that an unknown sort field is rejected."""
+        response = client.get("/api/v1/drugs/", params={"sort": "colour"})
+        assert response.status_code == 422
+
+    def test_get_drugs_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected."""
+        response = client.get("/api/v1/drugs/", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
     def test_get_drug_by_id(self, client, sample_drug_data):
         """Test retrieving a drug by ID."""
         create_response = client.post("/api/v1/drugs/", json=sample_drug_data)
@@ -114,6 +183,48 @@ class TestDrugAPI:
         assert response.status_code == 404
         assert "not found" in response.json()["detail"]
 
+    def test_get_categories(self, client, sample_drug_data):
+        """Test listing categories and their drug counts."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        client.post(
+            "/api/v1/drugs/",
+            json={**sample_drug_data, "sku": "TEST-002", "category": "Vitamins"},
+        )
+
+        response = client.get("/api/v1/drugs/categories")
+        assert response.status_code == 200
+        assert response.json() == ["Pain Relief", "Vitamins"]
+
+        response = client.get("/api/v1/drugs/categories/counts")
+        assert response.status_code == 200
+        assert response.json() == [
+            {"category": "Pain Relief", "count": 1},
+            {"category": "Vitamins", "count": 1},
+        ]
+
+    def test_get_stats(self, client, sample_drug_data):
+        """Test inventory totals and threshold parameters."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        client.post(
+            "/api/v1/drugs/",
+            json={**sample_drug_data, "sku": "TEST-002", "quantity": 10},
+        )
+
+        response = client.get("/api/v1/drugs/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_drugs"] == 2
+        assert data["total_stock"] == 110
+        assert data["low_stock_count"] == 1
+        assert data["inventory_value"] == 3298.9
+
+        response = client.get("/api/v1/drugs/stats", params={"low_stock_threshold": 5})
+        assert response.json()["low_stock_count"] == 0
+        assert response.json()["low_stock_threshold"] == 5
+
+        response = client.get("/api/v1/drugs/stats", params={"low_stock_threshold": -1})
+        assert response.status_code == 422
+
     def test_search_drugs_by_name(self, client):
         """Test searching drugs by name."""
         drugs_data = [
@@ -123,7 +234,7 @@ class TestDrugAPI:
                 "generic_name": "test_medicine",
                 "dosage": "10mg",
                 "quantity": 100,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Test Pharma",
                 "price": 29.99,
                 "category": "Pain Relief",
@@ -134,7 +245,7 @@ class TestDrugAPI:
                 "generic_name": "pain_reliever",
                 "dosage": "500mg",
                 "quantity": 50,
-                "expiration_date": "2025-06-30",
+                "expiration_date": f"{NEXT_YEAR}-06-30",
                 "manufacturer": "Pain Corp",
                 "price": 15.99,
                 "category": "Pain Relief",
@@ -147,7 +258,7 @@ class TestDrugAPI:
         response = client.get("/api/v1/drugs/", params={"search": "Test"})
         assert response.status_code == 200
 
-        data = response.json()
+        data = response.json()["items"]
         assert len(data) == 1
         assert data[0]["name"] == "Test Medicine"
 
@@ -160,7 +271,7 @@ class TestDrugAPI:
                 "generic_name": "pain_med",
                 "dosage": "10mg",
                 "quantity": 100,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Pain Corp",
                 "price": 29.99,
                 "category": "Pain Relief",
@@ -171,7 +282,7 @@ class TestDrugAPI:
                 "generic_name": "ascorbic_acid",
                 "dosage": "1000mg",
                 "quantity": 200,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Vitamin Corp",
                 "price": 12.99,
                 "category": "Vitamins",
@@ -184,7 +295,7 @@ class TestDrugAPI:
         response = client.get("/api/v1/drugs/", params={"category": "Pain Relief"})
         assert response.status_code == 200
 
-        data = response.json()
+        data = response.json()["items"]
         assert len(data) == 1
         assert data[0]["category"] == "Pain Relief"
 
@@ -197,7 +308,7 @@ class TestDrugAPI:
                 "generic_name": "test_pain_killer",
                 "dosage": "200mg",
                 "quantity": 50,
-                "expiration_date": "2025-06-30",
+                "expiration_date": f"{NEXT_YEAR}-06-30",
                 "manufacturer": "Test Pharma",
                 "price": 25.99,
                 "category": "Pain Relief",
@@ -208,7 +319,7 @@ class TestDrugAPI:
                 "generic_name": "test_vitamin",
                 "dosage": "500mg",
                 "quantity": 100,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Test Pharma",
                 "price": 15.99,
                 "category": "Vitamins",
@@ -219,7 +330,7 @@ class TestDrugAPI:
                 "generic_name": "other_pain_med",
                 "dosage": "100mg",
                 "quantity": 75,
-                "expiration_date": "2025-09-30",
+                "expiration_date": f"{NEXT_YEAR}-09-30",
                 "manufacturer": "Other Pharma",
                 "price": 20.99,
                 "category": "Pain Relief",
@@ -234,7 +345,7 @@ class TestDrugAPI:
         )
         assert response.status_code == 200
 
-        data = response.json()
+        data = response.json()["items"]
         assert len(data) == 1
         assert data[0]["name"] == "Test Pain Killer"
 
@@ -260,7 +371,7 @@ class TestDrugAPI:
         response = client.get("/api/v1/drugs/", params={"search": ""})
         assert response.status_code == 200
 
-        data = response.json()
+        data = response.json()["items"]
         assert len(data) == 1
 
     def test_batch_create_drugs_success(self, client):
@@ -272,7 +383,7 @@ class TestDrugAPI:
                 "generic_name": "batch_drug_1",
                 "dosage": "10mg",
                 "quantity": 100,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Batch Pharma",
                 "price": 29.99,
                 "category": "Antibiotic",
@@ -283,7 +394,7 @@ class TestDrugAPI:
                 "generic_name": "batch_drug_2",
                 "dosage": "20mg",
                 "quantity": 150,
-                "expiration_date": "2025-11-30",
+                "expiration_date": f"{NEXT_YEAR}-11-30",
                 "manufacturer": "Batch Pharma",
                 "price": 39.99,
                 "category": "NSAID",
@@ -314,7 +425,7 @@ class TestDrugAPI:
                 "generic_name": "duplicate_drug_1",
                 "dosage": "10mg",
                 "quantity": 100,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Dup Pharma",
                 "price": 29.99,
                 "category": "Antibiotic",
@@ -325,7 +436,7 @@ class TestDrugAPI:
                 "generic_name": "duplicate_drug_2",
                 "dosage": "20mg",
                 "quantity": 150,
-                "expiration_date": "2025-11-30",
+                "expiration_date": f"{NEXT_YEAR}-11-30",
                 "manufacturer": "Dup Pharma",
                 "price": 39.99,
                 "category": "NSAID",
@@ -347,7 +458,7 @@ class TestDrugAPI:
                 "generic_name": "conflicting_drug",
                 "dosage": "15mg",
                 "quantity": 75,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Conflict Pharma",
                 "price": 25.99,
                 "category": "Other",
@@ -387,7 +498,7 @@ class TestDrugAPI:
                 "generic_name": "valid_drug",
                 "dosage": "10mg",
                 "quantity": 100,
-                "expiration_date": "2025-12-31",
+                "expiration_date": f"{NEXT_YEAR}-12-31",
                 "manufacturer": "Valid Pharma",
                 "price": 29.99,
                 "category": "Other",
@@ -410,4 +521,283 @@ class TestDrugAPI:
         assert "cannot be in the past" in response.json()["detail"]
 
         get_response = client.get("/api/v1/drugs/")
-        assert len(get_response.json()) == 0
+        assert len(get_response.json()["items"]) == 0
+
+    def test_import_drugs_csv(self, client):
+        """Test importing drugs from an uploaded CSV file."""
+        csv_data = (
+            "SKU,Name,Generic Name,Dosage,Quantity,Expiration Date,"
+            "Manufacturer,Price,Category,Description\n"
+            "CSV-001,Csv Drug One,csv_one,10mg,100,2031-01-01,Csv Pharma,9.99,"
+            'Antibiotic,"Broad spectrum, oral"\n'
+            "\n"
+            "CSV-002,Csv Drug Two,csv_two,20mg,5,2031-02-01,Csv Pharma,19.99,"
+            "Vitamins,\n"
+        )
+
+        response = client.post(
+            "/api/v1/drugs/import.csv",
+            files={"file": ("drugs.csv", csv_data, "text/csv")},
+        )
+        assert response.status_code == 201
+        assert response.json() == {"imported": 2}
+
+        items = client.get("/api/v1/drugs/", params={"sort": "name"}).json()["items"]
+        assert [item["sku"] for item in items] == ["CSV-001", "CSV-002"]
+        assert items[0]["description"] == "Broad spectrum, oral"
+        assert items[1]["description"] is None
+
+        search = client.get("/api/v1/drugs/", params={"search": "drug two"})
+        assert [item["sku"] for item in search.json()["items"]] == ["CSV-002"]
+
+    def test_import_drugs_csv_reports_row_errors(self, client):
+        """Test that invalid rows are reported and nothing is imported."""
+        csv_data = (
+            "sku,name,generic_name,dosage,quantity,expiration_date,"
+            "manufacturer,price,category\n"
+            "CSV-001,Good Drug,good,10mg,100,2031-01-01,Csv Pharma,9.99,Other\n"
+            "CSV-002,Bad Drug,bad,10mg,many,2020-01-01,Csv Pharma,9.99,Other\n"
+            "CSV-003,Old Drug,old,10mg,100,2020-01-01,Csv Pharma,9.99,Other\n"
+        )
+
+        response = client.post(
+            "/api/v1/drugs/import.csv",
+            files={"file": ("drugs.csv", csv_data, "text/csv")},
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"] == [
+            "Row 2, quantity: Quantity must be a whole number",
+            "Row 3, expiration_date: Expiration date cannot be in the past",
+        ]
+        assert client.get("/api/v1/drugs/").json()["items"] == []
+
+    def test_import_drugs_csv_rejects_sku_conflicts(self, client, sample_drug_data):
+        """Test that existing and repeated SKUs abort the import."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        csv_data = (
+            "sku,name,generic_name,dosage,quantity,expiration_date,"
+            "manufacturer,price,category\n"
+            "CSV-001,New Drug,new,10mg,100,2031-01-01,Csv Pharma,9.99,Other\n"
+            "TEST-001,Same Sku,same,10mg,100,2031-01-01,Csv Pharma,9.99,Other\n"
+            "CSV-001,Repeat Drug,rep,10mg,100,2031-01-01,Csv Pharma,9.99,Other\n"
+        )
+
+        response = client.post(
+            "/api/v1/drugs/import.csv",
+            files={"file": ("drugs.csv", csv_data, "text/csv")},
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"] == [
+            "Row 2, sku: SKU 'TEST-001' already exists",
+            "Row 3, sku: Duplicate SKU 'CSV-001' in import data",
+        ]
+        assert len(client.get("/api/v1/drugs/").json()["items"]) == 1
+
+    def test_import_drugs_csv_missing_columns(self, client):
+        """Test that a header without required columns is rejected."""
+        response = client.post(
+            "/api/v1/drugs/import.csv",
+            files={"file": ("drugs.csv", "sku,name\nCSV-001,Drug\n", "text/csv")},
+        )
+        assert response.status_code == 400
+        assert "missing columns" in response.json()["detail"]
+        assert "generic_name" in response.json()["detail"]
+
+    def test_batch_upsert_drugs(self, client, sample_drug_data):
+        """Test that upsert mode updates existing SKUs and inserts new ones."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        client.post("/api/v1/drugs/", json={**sample_drug_data, "sku": "TEST-002"})
+        batch_data = [
+            {**sample_drug_data, "quantity": 7},
+            {**sample_drug_data, "sku": "TEST-002"},
+            {**sample_drug_data, "sku": "TEST-003"},
+        ]
+
+        response = client.post(
+            "/api/v1/drugs/batch", params={"mode": "upsert"}, json=batch_data
+        )
+        assert response.status_code == 201
+        assert response.json() == {"inserted": 1, "updated": 1, "unchanged": 1}
+
+        items = client.get("/api/v1/drugs/", params={"sort": "quantity"}).json()
+        assert [(i["sku"], i["quantity"]) for i in items["items"]][0] == (
+            "TEST-001",
+            7,
+        )
+        assert len(items["items"]) == 3
+
+    def test_batch_create_drugs_partial(self, client, sample_drug_data):
+        """Test that a partial batch commits good rows and lists failed ones."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        batch_data = [
+            {**sample_drug_data, "sku": "PART-001"},
+            sample_drug_data,
+            {**sample_drug_data, "sku": "PART-002", "expiration_date": "2020-01-01"},
+        ]
+
+        response = client.post(
+            "/api/v1/drugs/batch", params={"partial": "true"}, json=batch_data
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert len(data["created_ids"]) == 1
+        assert data["errors"] == [
+            {"row": 2, "field": "sku", "message": "SKU 'TEST-001' already exists"},
+            {
+                "row": 3,
+                "field": "expiration_date",
+                "message": "Expiration date cannot be in the past",
+            },
+        ]
+
+        response = client.post(
+            "/api/v1/drugs/batch",
+            params={"partial": "true"},
+            json=[{**sample_drug_data, "sku": "PART-002"}],
+        )
+        assert response.json()["errors"] == []
+        assert len(client.get("/api/v1/drugs/").json()["items"]) == 3
+
+        response = client.post(
+            "/api/v1/drugs/batch",
+            params={"partial": "true", "mode": "upsert"},
+            json=batch_data,
+        )
+        assert response.status_code == 400
+
+    def test_batch_create_drugs_partial_schema_errors(self, client, sample_drug_data):
+        """Test that rows failing schema validation are reported, not rejected."""
+        missing_sku = {k: v for k, v in sample_drug_data.items() if k != "sku"}
+        batch_data = [
+            {**sample_drug_data, "sku": "PART-001"},
+            missing_sku,
+            {**sample_drug_data, "sku": "PART-002", "quantity": -1},
+            {**sample_drug_data, "sku": "PART-003"},
+        ]
+
+        response = client.post(
+            "/api/v1/drugs/batch", params={"partial": "true"}, json=batch_data
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert len(data["created_ids"]) == 2
+        assert data["errors"] == [
+            {"row": 2, "field": "sku", "message": "SKU is required"},
+            {"row": 3, "field": "quantity", "message": "Quantity must be at least 1"},
+        ]
+
+        response = client.post("/api/v1/drugs/batch", json=batch_data)
+        assert response.status_code == 422
+        assert response.json()["detail"] == [
+            "SKU is required",
+            "Quantity must be at least 1",
+        ]
+
+    def test_batch_body_is_documented(self, client):
+        """Test that the batch body is documented as a list of drugs."""
+        operation = client.get("/openapi.json").json()["paths"]["/api/v1/drugs/batch"]
+        schema = operation["post"]["requestBody"]["content"]["application/json"]
+        assert schema["schema"]["type"] == "array"
+        assert schema["schema"]["items"] == {"$ref": "#/components/schemas/DrugCreate"}
+
+    def test_conditional_get_with_etag(self, client, sample_drug_data):
+        """Test that unchanged data is revalidated with 304 until a write."""
+        created = client.post("/api/v1/drugs/", json=sample_drug_data).json()
+
+        response = client.get("/api/v1/drugs/categories")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+
+        response = client.get(
+            "/api/v1/drugs/categories", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        response = client.get(
+            f"/api/v1/drugs/{created['id']}", headers={"If-None-Match": f"W/{etag}"}
+        )
+        assert response.status_code == 304
+
+        client.put(f"/api/v1/drugs/{created['id']}", json={"category": "Vitamins"})
+        response = client.get(
+            "/api/v1/drugs/categories", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json() == ["Vitamins"]
+        assert response.headers["etag"] != etag
+
+    def test_conditional_get_skips_errors_and_writes(self, client, sample_drug_data):
+        """Test that only successful GETs carry an ETag."""
+        response = client.post("/api/v1/drugs/", json=sample_drug_data)
+        assert "etag" not in response.headers
+
+        response = client.get("/api/v1/drugs/999")
+        assert response.status_code == 404
+        assert "etag" not in response.headers
+
+    def test_export_drugs_ndjson(self, client, sample_drug_data):
+        """Test streaming the catalog as newline-delimited JSON."""
+        created = client.post("/api/v1/drugs/", json=sample_drug_data).json()
+        client.post("/api/v1/drugs/", json={**sample_drug_data, "sku": "TEST-002"})
+
+        response = client.get("/api/v1/drugs/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert 'filename="drugs.ndjson"' in response.headers["content-disposition"]
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["sku"] for line in lines] == ["TEST-001", "TEST-002"]
+        assert lines[0]["id"] == created["id"]
+        assert lines[0]["expiration_date"] == sample_drug_data["expiration_date"]
+        assert lines[0]["updated_at"] is None
+
+    def test_export_drugs_csv_gzip(self, client, sample_drug_data):
+        """Test that a gzipped CSV export can be imported again."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+
+        response = client.get(
+            "/api/v1/drugs/export", params={"format": "csv", "gzip": "true"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+        rows = list(csv.reader(io.StringIO(gzip.decompress(response.content).decode())))
+        assert rows[0][:3] == ["id", "name", "sku"]
+        assert rows[1][2] == "TEST-001"
+        assert len(rows) == 2
+
+        client.delete(f"/api/v1/drugs/{rows[1][0]}")
+        response = client.post(
+            "/api/v1/drugs/import.csv",
+            files={"file": ("drugs.csv", gzip.decompress(response.content))},
+        )
+        assert response.json() == {"imported": 1}
+
+    def test_export_drugs_empty_csv(self, client):
+        """Test that an empty catalog exports just the header."""
+        response = client.get("/api/v1/drugs/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.text.strip().startswith("id,name,sku")
+        assert len(response.text.splitlines()) == 1
+
+    def test_import_drugs_csv_upsert(self, client, sample_drug_data):
+        """Test refreshing existing drugs from a CSV upload."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        csv_data = (
+            "sku,name,generic_name,dosage,quantity,expiration_date,"
+            "manufacturer,price,category\n"
+            "TEST-001,Test Medication,test_medication,10mg,42,2031-01-01,"
+            "Test Pharma,29.99,Pain Relief\n"
+            "CSV-002,New Drug,new,10mg,100,2031-01-01,Csv Pharma,9.99,Other\n"
+        )
+
+        response = client.post(
+            "/api/v1/drugs/import.csv",
+            params={"mode": "upsert"},
+            files={"file": ("drugs.csv", csv_data, "text/csv")},
+        )
+        assert response.status_code == 201
+        assert response.json() == {"inserted": 1, "updated": 1, "unchanged": 0}
+
+        items = client.get("/api/v1/drugs/", params={"search": "Test Medication"})
+        assert items.json()["items"][0]["quantity"] == 42
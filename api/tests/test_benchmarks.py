@@ -0,0 +1,128 @@
+"""Smoke tests for the repository benchmarks and the load generator."""
+
+import httpx
+from benchmarks.load import (
+    LoadRun,
+    parse_access_log,
+    percentile,
+    route_label,
+    run_mix,
+    run_replay,
+    server_routes,
+)
+from benchmarks.repository import build_cases, compare, run_benchmarks
+from app.repositories.drug_interface import DrugRepositoryInterface
+from main import app
+
+
+class TestRepositoryBenchmarks:
+    """Test cases for the repository benchmarks."""
+
+    def test_every_interface_method_is_benchmarked(self):
+        """Test that no repository method is left out of the suite."""
+        methods = {case.method for case in build_cases(1000)}
+        assert methods == DrugRepositoryInterface.__abstractmethods__
+
+    async def test_results(self, tmp_path):
+        """Test that a small run times every case and can be compared."""
+        results = await run_benchmarks([100], repeat=1, sqlite_dir=str(tmp_path))
+
+        assert results["postgresql"] is False
+        [run] = results["runs"]
+        assert run["database"] == "sqlite"
+        assert run["size"] == 100
+        cases = {case["name"]: case for case in run["cases"]}
+        assert cases["get_all"]["rows"] == 100
+        assert cases["get_paginated first page"]["rows"] == 50
+        assert all(case["seconds"]["min"] > 0 for case in cases.values())
+        assert len(compare(results, results)) == len(cases)
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestLoadGenerator:
+    """Test cases for the load generator."""
+
+    async def run(self, scenario, *args):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://pharmatrack"
+        ) as http:
+            load = LoadRun(http, app.routes)
+            await scenario(load, *args)
+            return load.report()
+
+    async def test_traffic_mix(self, client, sample_drug):
+        """Test that the mix reaches the web app's routes and reports them."""
+        report = await self.run(run_mix, 3, 1.0, 0, 1)
+
+        assert report["errors"] == 0
+        assert {
+            "GET /api/v1/drugs/",
+            "GET /api/v1/drugs/?search",
+            "GET /api/v1/drugs/stats",
+        } <= set(report["routes"])
+        route = report["routes"]["GET /api/v1/drugs/"]
+        assert route["seconds"]["p50"] <= route["seconds"]["p99"]
+        assert "queries_per_request" in route
+
+    async def test_replay(self, client, sample_drug):
+        """Test that logged reads are replayed and writes are skipped."""
+        entries = parse_access_log(
+            [
+                'INFO:     127.0.0.1:5234 - "GET /api/v1/drugs/stats HTTP/1.1" 200 OK',
+                f'INFO:     127.0.0.1:5234 - "GET /api/v1/drugs/{sample_drug.id} '
+                'HTTP/1.1" 200 OK',
+                'INFO:     127.0.0.1:5234 - "DELETE /api/v1/drugs/1 HTTP/1.1" 200 OK',
+                "INFO:     Application startup complete.",
+            ]
+        )
+        report = await self.run(run_replay, entries, 2)
+
+        assert report["requests"] == 2
+        assert report["skipped"] == 1
+        assert set(report["routes"]) == {
+            "GET /api/v1/drugs/stats",
+            "GET /api/v1/drugs/{drug_id}",
+        }
+
+    def test_logged_times(self):
+        """Test that combined log timestamps become replay offsets."""
+        entries = parse_access_log(
+            [
+                '1.2.3.4 - - [10/Oct/2025:13:55:36 +0000] "GET /health HTTP/1.1" 200 2',
+                '1.2.3.4 - - [10/Oct/2025:13:55:39 +0000] "GET /health HTTP/1.1" 200 2',
+            ]
+        )
+
+        assert [entry.offset for entry in entries] == [0, 3]
+
+    def test_route_label(self):
+        """Test that requests are named by route, and list workloads apart."""
+        assert route_label(app.routes, "PUT", "/api/v1/drugs/7") == (
+            "PUT /api/v1/drugs/{drug_id}"
+        )
+        assert route_label(app.routes, "GET", "/api/v1/drugs/?search=am") == (
+            "GET /api/v1/drugs/?search"
+        )
+        assert route_label(app.routes, "GET", "/nowhere") == "GET /nowhere"
+
+    async def test_server_routes(self):
+        """Test that a server's documented routes label requests like the app's."""
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://pharmatrack"
+        ) as http:
+            routes = await server_routes(http)
+        assert route_label(routes, "PUT", "/api/v1/drugs/7") == (
+            "PUT /api/v1/drugs/{drug_id}"
+        )
+        assert route_label(routes, "GET", "/api/v1/drugs/?category=x") == (
+            "GET /api/v1/drugs/?category"
+        )
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [float(n) for n in range(1, 101)]
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([3.0], 95) == 3
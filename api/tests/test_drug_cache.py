@@ -0,0 +1,350 @@
+"""Tests for the cache backends and the drug read-through cache."""
+
+import asyncio
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from app.cache.backend import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    create_cache_backend,
+)
+from app.models.drug import Drug
+from app.repositories.drug_cache import (
+    CachedDrugRepository,
+    DrugCache,
+    drug_to_row,
+)
+from app.repositories.drug_repository import DrugRepository
+from app.repositories.table_version import (
+    TableVersion,
+    bump_drug_table_version,
+    drug_table_version,
+)
+from app.schemas.drug import DrugCreate, DrugFilters, DrugUpdate
+
+ADMIN = {"X-Admin-Token": "test-admin-token"}
+
+
+@pytest.fixture
+def redis_server():
+    """A Redis-protocol server kept in memory for one test."""
+    return FakeServer()
+
+
+def redis_backend(server):
+    """A client of its own on a shared fake server, as each worker has."""
+    return RedisCacheBackend(FakeAsyncRedis(server=server))
+
+
+class TestCacheBackends:
+    """Test cases shared by the memory and Redis backends."""
+
+    @pytest.fixture(params=["memory", "redis"])
+    def backend(self, request, redis_server):
+        """Each test runs against both backends."""
+        if request.param == "memory":
+            return MemoryCacheBackend(max_entries=2)
+        return redis_backend(redis_server)
+
+    async def test_set_get_delete(self, backend):
+        """Test storing, reading and removing a value."""
+        assert await backend.get("key") is None
+        await backend.set("key", b"value")
+        assert await backend.get("key") == b"value"
+
+        await backend.delete("key")
+        assert await backend.get("key") is None
+
+    async def test_add_only_when_missing(self, backend):
+        """Test that add keeps an existing value."""
+        assert await backend.add("key", b"first")
+        assert not await backend.add("key", b"second")
+        assert await backend.get("key") == b"first"
+
+    async def test_get_many(self, backend):
+        """Test reading several keys at once, missing ones as None."""
+        await backend.set("a", b"1")
+        await backend.set("b", b"2")
+        assert await backend.get_many(["b", "missing", "a"]) == [b"2", None, b"1"]
+
+    async def test_expiry(self, backend):
+        """Test that entries are not returned after their time to live."""
+        await backend.set("key", b"value", ttl_seconds=0.001)
+        await backend.set("other", b"value", ttl_seconds=60)
+
+        await asyncio.sleep(0.01)
+        assert await backend.get("key") is None
+        assert await backend.get("other") == b"value"
+
+    def test_create_from_url(self):
+        """Test choosing a backend from CACHE_URL."""
+        assert isinstance(create_cache_backend(""), MemoryCacheBackend)
+        assert isinstance(
+            create_cache_backend("redis://localhost:6379/0"), RedisCacheBackend
+        )
+        with pytest.raises(ValueError):
+            create_cache_backend("memcached://localhost")
+
+
+class TestMemoryCacheBackend:
+    """Test cases for the in-process backend."""
+
+    async def test_least_recently_used_is_evicted(self):
+        """Test that the LRU entry makes room once the backend is full."""
+        backend = MemoryCacheBackend(max_entries=2)
+        await backend.set("a", b"1")
+        await backend.set("b", b"2")
+        await backend.get("a")
+        await backend.set("c", b"3")
+
+        assert await backend.get("b") is None
+        assert await backend.get("a") == b"1"
+        assert await backend.stats() == {"size": 2, "evictions": 1}
+
+
+class TestCachedDrugRepository:
+    """Test cases for CachedDrugRepository."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, db_session):
+        """Wrap a repository in a private in-memory cache for each test."""
+        backend = MemoryCacheBackend()
+        self.version = TableVersion("drugs", backend)
+        self.cache = DrugCache(
+            backend, self.version, 60, TableVersion("drug_rows", backend)
+        )
+        self.repository = CachedDrugRepository(
+            DrugRepository(db_session, self.version), self.cache
+        )
+
+    async def test_get_by_id_reads_through(self, sample_drug):
+        """Test that a second lookup is served from the cache."""
+        first = await self.repository.get_by_id(sample_drug.id)
+        second = await self.repository.get_by_id(sample_drug.id)
+
+        assert second is not first
+        assert second.sku == first.sku == sample_drug.sku
+        assert second.expiration_date == sample_drug.expiration_date
+        assert second.created_at == sample_drug.created_at
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+
+    async def test_missing_drug_is_not_cached(self):
+        """Test that lookups of unknown ids always reach the database."""
+        assert await self.repository.get_by_id(999) is None
+        assert await self.repository.get_by_id(999) is None
+        assert (self.cache.hits, self.cache.misses) == (0, 2)
+
+    async def test_update_refreshes_entry(self, sample_drug):
+        """Test that an updated drug is cached with its new values."""
+        await self.repository.get_by_id(sample_drug.id)
+        await self.repository.update(sample_drug.id, DrugUpdate(quantity=3))
+
+        cached = await self.repository.get_by_id(sample_drug.id)
+        assert cached.quantity == 3
+        assert cached.updated_at is not None
+        assert self.cache.hits == 1
+
+    async def test_writes_invalidate_cached_reads(
+        self, sample_drug, sample_drug_create
+    ):
+        """Test that lists and counts are reloaded after any write."""
+        filters = DrugFilters()
+        await self.repository.find_rows(filters, limit=10)
+        assert await self.repository.get_category_counts() == [("Pain Relief", 1)]
+        await self.repository.get_category_counts()
+        assert self.cache.hits == 1
+
+        await self.repository.batch_create(
+            [sample_drug_create.model_copy(update={"sku": "TEST-002"})]
+        )
+        rows, _ = await self.repository.find_rows(filters, limit=10)
+        assert len(rows) == 2
+        assert await self.repository.get_category_counts() == [("Pain Relief", 2)]
+        assert self.cache.hits == 1
+
+    async def test_drugs_outlive_other_writes(self, sample_drug, sample_drug_create):
+        """Test that cached drugs are only dropped by writes that touch them."""
+        await self.repository.get_by_id(sample_drug.id)
+        await self.repository.create(
+            sample_drug_create.model_copy(update={"sku": "TEST-002"})
+        )
+        await self.repository.get_by_id(sample_drug.id)
+        assert self.cache.hits == 1
+
+        await self.repository.upsert(
+            [sample_drug_create.model_copy(update={"quantity": 5})]
+        )
+        await self.repository.get_by_id(sample_drug.id)
+        assert self.cache.hits == 1
+
+        await self.repository.delete(sample_drug.id)
+        assert await self.repository.get_by_id(sample_drug.id) is None
+        assert self.cache.hits == 1
+
+    async def test_cached_rows_keep_their_types(self, sample_drug):
+        """Test that list rows from the cache match rows from the database."""
+        rows, cursor = await self.repository.find_rows(DrugFilters(), limit=1)
+        cached_rows, cached_cursor = await self.repository.find_rows(
+            DrugFilters(), limit=1
+        )
+
+        assert self.cache.hits == 1
+        assert cached_rows == [dict(row) for row in rows]
+        assert cached_cursor == cursor
+
+    async def test_read_racing_a_write_is_never_served(self, sample_drug):
+        """Test that a read finishing after a write cannot replace its row."""
+        stale = await self.repository.repository.get_by_id(sample_drug.id)
+        stale_row = {"id": stale.id, "quantity": stale.quantity}
+        _, rows_token = await self.cache.get_drug(sample_drug.id)
+        await self.repository.update(sample_drug.id, DrugUpdate(quantity=7))
+        await self.cache.fill_drug(sample_drug.id, stale_row, rows_token)
+
+        assert (await self.repository.get_by_id(sample_drug.id)).quantity == 7
+
+    async def test_read_racing_a_delete_is_never_served(self, sample_drug, monkeypatch):
+        """Test that a read finishing after a delete cannot bring it back."""
+        load = self.repository.repository.get_by_id
+
+        async def slow_load(drug_id):
+            drug = Drug(**drug_to_row(await load(drug_id)))
+            # The delete commits while the read is still on its way back
+            monkeypatch.setattr(self.repository.repository, "get_by_id", load)
+            assert await self.repository.delete(drug_id)
+            return drug
+
+        monkeypatch.setattr(self.repository.repository, "get_by_id", slow_load)
+        assert (await self.repository.get_by_id(sample_drug.id)) is not None
+
+        assert await self.repository.get_by_id(sample_drug.id) is None
+        assert self.cache.hits == 0
+
+
+class TestSharedDrugCache:
+    """Test cases for workers sharing a Redis-protocol backend."""
+
+    def worker(self, db_session, server):
+        """One API worker: its own backend client and counters."""
+        backend = redis_backend(server)
+        version = TableVersion("drugs", backend)
+        cache = DrugCache(backend, version, 60, TableVersion("drug_rows", backend))
+        return CachedDrugRepository(DrugRepository(db_session, version), cache)
+
+    async def test_entries_are_shared(self, db_session, redis_server, sample_drug):
+        """Test that one worker's reads warm the cache for another."""
+        first = self.worker(db_session, redis_server)
+        second = self.worker(db_session, redis_server)
+
+        await first.get_by_id(sample_drug.id)
+        assert (await second.get_by_id(sample_drug.id)).sku == sample_drug.sku
+        assert second.cache.hits == 1
+
+    async def test_write_invalidates_other_workers(
+        self, db_session, redis_server, sample_drug, sample_drug_create
+    ):
+        """Test that a write through one worker is seen by the others."""
+        first = self.worker(db_session, redis_server)
+        second = self.worker(db_session, redis_server)
+        assert await first.get_category_counts() == [("Pain Relief", 1)]
+
+        await second.create(
+            DrugCreate(
+                **{
+                    **sample_drug_create.model_dump(),
+                    "sku": "VIT-001",
+                    "category": "Vitamins",
+                }
+            )
+        )
+
+        assert await first.get_category_counts() == [
+            ("Pain Relief", 1),
+            ("Vitamins", 1),
+        ]
+        assert first.cache.hits == 0
+
+    async def test_cached_drug_takes_one_round_trip(
+        self, db_session, redis_server, sample_drug
+    ):
+        """Test that a hit reads the rows version and the drug together."""
+        worker = self.worker(db_session, redis_server)
+        await worker.get_by_id(sample_drug.id)
+        await worker.get_by_id(sample_drug.id)
+
+        commands = []
+        client = worker.cache.backend.client
+        execute_command = client.execute_command
+
+        async def record(*args, **options):
+            commands.append(args[0])
+            return await execute_command(*args, **options)
+
+        client.execute_command = record
+        assert (await worker.get_by_id(sample_drug.id)).sku == sample_drug.sku
+        assert commands == ["MGET"]
+
+    async def test_rows_version_change_is_seen(
+        self, db_session, redis_server, sample_drug
+    ):
+        """Test that a worker stops serving drugs once another bumps the rows version."""
+        first = self.worker(db_session, redis_server)
+        second = self.worker(db_session, redis_server)
+        await first.get_by_id(sample_drug.id)
+        await first.get_by_id(sample_drug.id)
+
+        await second.cache.rows_version.bump()
+
+        await first.get_by_id(sample_drug.id)
+        assert (first.cache.hits, first.cache.misses) == (1, 2)
+        await first.get_by_id(sample_drug.id)
+        assert first.cache.hits == 2
+
+    async def test_stats(self, db_session, redis_server, sample_drug):
+        """Test that Redis reports its size alongside the worker's counters."""
+        worker = self.worker(db_session, redis_server)
+        await worker.get_by_id(sample_drug.id)
+
+        stats = await worker.cache.stats()
+        assert stats["backend"] == "redis"
+        assert stats["misses"] == 1
+        assert stats["size"] == 2
+
+
+class TestExternalWrites:
+    """Test cases for writes made outside the repository."""
+
+    def test_script_bump(self, client, sample_drug_data):
+        """Test that a seed or migration bump drops cached pages and ETags."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        response = client.get("/api/v1/drugs/categories")
+        etag = response.headers["etag"]
+        version = asyncio.run(drug_table_version.get())
+
+        bump_drug_table_version()
+
+        assert asyncio.run(drug_table_version.get()) != version
+        response = client.get(
+            "/api/v1/drugs/categories", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+
+
+class TestCacheDiagnostics:
+    """Test cases for the cache diagnostics endpoint."""
+
+    def test_cache_stats(self, client, sample_drug_data):
+        """Test that drug detail reads are counted as hits and misses."""
+        created = client.post("/api/v1/drugs/", json=sample_drug_data).json()
+        client.get(f"/api/v1/drugs/{created['id']}")
+        client.get(f"/api/v1/drugs/{created['id']}")
+
+        response = client.get("/api/v1/diagnostics/cache", headers=ADMIN)
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["backend"] == "memory"
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_cache_stats_need_admin_token(self, client):
+        """Test that cache stats are only shown with the admin token."""
+        assert client.get("/api/v1/diagnostics/cache").status_code == 403
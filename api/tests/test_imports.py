@@ -0,0 +1,166 @@
+"""Tests for background import jobs."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.api.v1.endpoints.imports import get_import_job_manager
+from app.cache.backend import MemoryCacheBackend
+from app.schemas.drug import DrugCreate, ImportJobState
+from app.services.import_jobs import (
+    ImportJob,
+    ImportJobManager,
+    _job_key,
+    import_job_manager,
+)
+from main import app
+
+
+def make_drug(index, **overrides):
+    return {
+        "sku": f"JOB-{index:03d}",
+        "name": f"Job Drug {index}",
+        "generic_name": f"job_drug_{index}",
+        "dosage": "10mg",
+        "quantity": 10,
+        "expiration_date": "2031-12-31",
+        "manufacturer": "Job Pharma",
+        "price": 4.99,
+        "category": "Other",
+        **overrides,
+    }
+
+
+def wait_for_job(client, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/v1/imports/{job_id}").json()
+        if job["status"] == "completed":
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Import job {job_id} did not finish")
+
+
+class TestImportJobs:
+    """Test cases for the import job endpoints."""
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, monkeypatch):
+        """Split test batches into several chunks."""
+        monkeypatch.setattr(import_job_manager, "chunk_size", 2)
+
+    def test_import_job_reports_progress(self, client, sample_drug_data):
+        """Test that a job imports valid rows and reports rejected ones."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        batch = [
+            make_drug(1),
+            make_drug(2, sku="TEST-001"),
+            make_drug(3),
+            make_drug(4, expiration_date="2020-01-01"),
+            make_drug(5),
+        ]
+
+        response = client.post("/api/v1/imports/", json=batch)
+        assert response.status_code == 202
+        submitted = response.json()
+        assert submitted["total"] == 5
+        assert submitted["processed"] + submitted["remaining"] <= 5
+
+        job = wait_for_job(client, submitted["id"])
+        assert job["processed"] == 3
+        assert job["failed"] == 2
+        assert job["remaining"] == 0
+        assert job["finished_at"] is not None
+        assert [(e["row"], e["field"]) for e in job["errors"]] == [
+            (2, "sku"),
+            (4, "expiration_date"),
+        ]
+
+        skus = {item["sku"] for item in client.get("/api/v1/drugs/").json()["items"]}
+        assert skus == {"TEST-001", "JOB-001", "JOB-003", "JOB-005"}
+
+    def test_import_job_idempotency_key(self, client):
+        """Test that resubmitting with the same key returns the same job."""
+        headers = {"Idempotency-Key": "nightly-refresh"}
+        first = client.post("/api/v1/imports/", json=[make_drug(1)], headers=headers)
+        wait_for_job(client, first.json()["id"])
+
+        retry = client.post("/api/v1/imports/", json=[make_drug(1)], headers=headers)
+        assert retry.status_code == 202
+        assert retry.json()["id"] == first.json()["id"]
+        assert retry.json()["failed"] == 0
+
+    def test_import_job_seen_by_other_workers(self, client):
+        """Test that another worker's manager reports the job and recognises
+        its idempotency key through the shared backend."""
+        headers = {"Idempotency-Key": "shared-refresh"}
+        first = client.post("/api/v1/imports/", json=[make_drug(1)], headers=headers)
+
+        other_worker = ImportJobManager()
+        app.dependency_overrides[get_import_job_manager] = lambda: other_worker
+        try:
+            job = wait_for_job(client, first.json()["id"])
+            assert job["processed"] == 1
+
+            retry = client.post(
+                "/api/v1/imports/", json=[make_drug(1)], headers=headers
+            )
+            assert retry.json()["id"] == first.json()["id"]
+        finally:
+            del app.dependency_overrides[get_import_job_manager]
+
+    def test_import_job_rejects_duplicate_skus(self, client):
+        """Test that a batch repeating a SKU is rejected up front."""
+        response = client.post("/api/v1/imports/", json=[make_drug(1), make_drug(1)])
+        assert response.status_code == 400
+        assert "Duplicate SKU" in response.json()["detail"]
+
+    def test_import_job_not_found(self, client):
+        """Test polling an unknown job."""
+        response = client.get("/api/v1/imports/unknown")
+        assert response.status_code == 404
+
+
+class StalledSession:
+    """Session that never opens, holding its chunk in progress."""
+
+    async def __aenter__(self):
+        await asyncio.Event().wait()
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class TestImportJobFailures:
+    """Test cases for jobs that cannot finish."""
+
+    async def test_stop_fails_unfinished_jobs(self):
+        """Test that jobs left unfinished by stop are reported failed."""
+        manager = ImportJobManager(
+            workers=1, session_factory=StalledSession, backend=MemoryCacheBackend()
+        )
+        job = await manager.submit([DrugCreate(**make_drug(1))])
+        await asyncio.sleep(0)
+
+        await manager.stop()
+
+        stopped = await manager.get(job.id)
+        assert stopped.status == ImportJobState.FAILED
+        assert stopped.remaining == 1
+        assert stopped.finished_at is not None
+
+    async def test_silent_jobs_are_failed(self):
+        """Test that a job whose process stopped saving it is reported failed."""
+        backend = MemoryCacheBackend()
+        manager = ImportJobManager(backend=backend, heartbeat_seconds=1)
+        job = ImportJob(total=2, chunks=1)
+        job.status = ImportJobState.RUNNING
+        last_saved = job.to_status().model_copy(
+            update={"updated_at": datetime.now(timezone.utc) - timedelta(seconds=5)}
+        )
+        await backend.set(_job_key(job.id), last_saved.model_dump_json().encode())
+
+        reported = await manager.get(job.id)
+        assert reported.status == ImportJobState.FAILED
+        assert reported.error is not None
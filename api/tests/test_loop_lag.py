@@ -0,0 +1,97 @@
+"""Tests for event loop lag measurement and blocking handler reports."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from app.monitoring.loop_lag import LoopBlock, LoopLagMonitor, loop_lag_monitor
+
+
+def block_loop(seconds):
+    """Stand-in for blocking work done directly in an async handler."""
+    time.sleep(seconds)
+
+
+class TestLoopLagMonitor:
+    """Test cases for LoopLagMonitor."""
+
+    @pytest.fixture
+    async def monitor(self):
+        monitor = LoopLagMonitor(threshold=0.05, interval=0.01)
+        monitor.start()
+        yield monitor
+        await monitor.stop()
+
+    async def test_block_is_reported_with_route_and_stack(self, monitor):
+        """Test that a request holding the loop is reported once."""
+        scope = {"route": SimpleNamespace(path="/api/v1/drugs/{drug_id}")}
+        with monitor.serving(scope):
+            block_loop(0.2)
+        await asyncio.sleep(0.05)
+
+        stats = monitor.stats()
+        assert len(stats["blocks"]) == 1
+        block = stats["blocks"][0]
+        assert block["route"] == "/api/v1/drugs/{drug_id}"
+        assert block["blocked_seconds"] >= 0.15
+        assert "block_loop" in "".join(block["stack"])
+        assert stats["lag_seconds"]["buckets"]["0.1"] < stats["lag_seconds"]["count"]
+
+    async def test_unattributed_block(self, monitor):
+        """Test that blocking outside a request is reported as unknown."""
+        block_loop(0.2)
+        await asyncio.sleep(0.05)
+
+        assert monitor.stats()["blocks"][0]["route"] == "unknown"
+
+    async def test_short_pauses_are_not_reported(self, monitor):
+        """Test that lag under the threshold is only measured."""
+        block_loop(0.01)
+        await asyncio.sleep(0.05)
+
+        stats = monitor.stats()
+        assert stats["blocks"] == []
+        assert stats["lag_seconds"]["count"] > 0
+
+    async def test_disabled(self):
+        """Test that a zero threshold starts nothing."""
+        monitor = LoopLagMonitor(threshold=0)
+        monitor.start()
+        with monitor.serving({}):
+            pass
+        await monitor.stop()
+
+        assert monitor.stats()["lag_seconds"]["count"] == 0
+
+
+class TestLoopDiagnostics:
+    """Test cases for the event loop diagnostics endpoint."""
+
+    def test_loop_stats(self, client):
+        """Test that the running monitor reports its lag histogram."""
+        response = client.get("/api/v1/diagnostics/loop")
+
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["threshold_seconds"] == 0.1
+        assert "+Inf" in stats["lag_seconds"]["buckets"]
+        assert isinstance(stats["blocks"], list)
+
+    def test_stacks_need_admin_token(self, client):
+        """Test that stacks of blocking handlers are only shown to admins."""
+        loop_lag_monitor.blocks.append(LoopBlock("/api/v1/drugs/", ["frame\n"]))
+        try:
+            response = client.get("/api/v1/diagnostics/loop")
+            assert response.json()["blocks"][0]["stack"] == []
+
+            response = client.get(
+                "/api/v1/diagnostics/loop",
+                headers={"X-Admin-Token": "test-admin-token"},
+            )
+            assert response.json()["blocks"][0]["stack"] == ["frame\n"]
+        finally:
+            loop_lag_monitor.reset()
+
+    def test_lag_is_exported(self, client):
+        """Test that the lag histogram is among the Prometheus metrics."""
+        assert "event_loop_lag_seconds_bucket" in client.get("/metrics").text
@@ -0,0 +1,132 @@
+"""Tests for Prometheus metrics and per-request query accounting."""
+
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from app.monitoring.queries import current_queries, track_queries
+
+DRUG_ROUTE = "/api/v1/drugs/{drug_id}"
+
+
+def sample(name, **labels):
+    """Current value of a sample in the default registry, 0 if unset."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestQueryTracking:
+    """Test cases for track_queries."""
+
+    async def test_statements_are_counted(self, db_session, sample_drug):
+        """Test that statements run inside the block are recorded."""
+        with track_queries() as queries:
+            await db_session.execute(text("SELECT count(*) FROM drugs"))
+            await db_session.execute(text("SELECT 1"))
+
+        assert queries.count == 2
+        assert queries.seconds >= queries.slowest_seconds > 0
+        assert queries.slowest_statement in ("SELECT count(*) FROM drugs", "SELECT 1")
+
+    async def test_statements_outside_are_not_counted(self, db_session):
+        """Test that nothing is recorded outside a tracked block."""
+        with track_queries() as queries:
+            pass
+        await db_session.execute(text("SELECT 1"))
+
+        assert queries.count == 0
+        assert current_queries() is None
+
+
+class TestMetrics:
+    """Test cases for the /metrics endpoint and the metrics behind it."""
+
+    def test_metrics_endpoint(self, client):
+        """Test that metrics are exposed in the Prometheus text format."""
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "http_request_duration_seconds_bucket" in response.text
+        assert "http_requests_in_flight" in response.text
+
+    def test_requests_are_labelled_by_route(self, client, sample_drug_data):
+        """Test that latency is recorded per route template and status."""
+        ok = sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route=DRUG_ROUTE,
+            status="200",
+        )
+        missing = sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route=DRUG_ROUTE,
+            status="404",
+        )
+        unmatched = sample(
+            "http_request_duration_seconds_count",
+            method="GET",
+            route="unmatched",
+            status="404",
+        )
+
+        created = client.post("/api/v1/drugs/", json=sample_drug_data).json()
+        client.get(f"/api/v1/drugs/{created['id']}")
+        client.get("/api/v1/drugs/999")
+        client.get("/no-such-page")
+
+        labels = {"method": "GET", "route": DRUG_ROUTE}
+        assert (
+            sample("http_request_duration_seconds_count", **labels, status="200")
+            == ok + 1
+        )
+        assert (
+            sample("http_request_duration_seconds_count", **labels, status="404")
+            == missing + 1
+        )
+        assert (
+            sample(
+                "http_request_duration_seconds_count",
+                method="GET",
+                route="unmatched",
+                status="404",
+            )
+            == unmatched + 1
+        )
+        assert sample("http_requests_in_flight") == 0
+
+    def test_database_use_per_request(self, client):
+        """Test that each request's statements are counted against its route."""
+        requests = sample("http_request_db_queries_count", route="/api/v1/drugs/")
+        queries = sample("http_request_db_queries_sum", route="/api/v1/drugs/")
+
+        client.get("/api/v1/drugs/")
+
+        assert (
+            sample("http_request_db_queries_count", route="/api/v1/drugs/")
+            == requests + 1
+        )
+        assert sample("http_request_db_queries_sum", route="/api/v1/drugs/") > queries
+        assert sample("http_request_db_seconds_sum", route="/api/v1/drugs/") > 0
+
+    def test_import_rows(self, client, sample_drug_data):
+        """Test that batch requests count the rows they create and reject."""
+        created = sample("drug_import_rows_total", source="batch", outcome="created")
+        rejected = sample("drug_import_rows_total", source="batch", outcome="rejected")
+        batches = sample("drug_import_write_seconds_count", source="batch")
+
+        rows = [
+            {**sample_drug_data, "sku": "METRIC-001"},
+            {**sample_drug_data, "sku": "METRIC-002", "expiration_date": "2020-01-01"},
+        ]
+        response = client.post("/api/v1/drugs/batch?partial=true", json=rows)
+        assert response.status_code == 201
+
+        assert (
+            sample("drug_import_rows_total", source="batch", outcome="created")
+            == created + 1
+        )
+        assert (
+            sample("drug_import_rows_total", source="batch", outcome="rejected")
+            == rejected + 1
+        )
+        assert sample("drug_import_write_seconds_count", source="batch") == batches + 1
@@ -0,0 +1,77 @@
+"""Tests for Alembic database migrations."""
+
+from datetime import date
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, select, text
+
+from app.database import Base, run_migrations
+from app.models.drug import Drug
+
+
+class TestMigrations:
+    """Test cases for the migration history."""
+
+    def test_upgrade_matches_models(self, tmp_path):
+        """Test that migrating an empty database yields the model schema."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+
+        with engine.begin() as connection:
+            run_migrations(connection)
+
+        with engine.connect() as connection:
+            context = MigrationContext.configure(
+                connection,
+                opts={
+                    # FTS5 tables are SQLite-only; trigram indexes PostgreSQL-only
+                    "include_object": lambda obj, name, type_, *_: not (
+                        (type_ == "table" and name.startswith("drugs_fts"))
+                        or (type_ == "index" and name.endswith("_trgm"))
+                    )
+                },
+            )
+            assert compare_metadata(context, Base.metadata) == []
+
+        engine.dispose()
+
+    def test_upgrade_converts_legacy_database(self, tmp_path):
+        """Test that a pre-migration database is adopted and converted."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE drugs ("
+                    "id INTEGER PRIMARY KEY, sku VARCHAR(100), "
+                    "name VARCHAR(100) NOT NULL, generic_name VARCHAR(100) NOT NULL, "
+                    "dosage VARCHAR(50) NOT NULL, quantity INTEGER NOT NULL, "
+                    "expiration_date VARCHAR(10) NOT NULL, "
+                    "manufacturer VARCHAR(100) NOT NULL, price FLOAT NOT NULL, "
+                    "category VARCHAR(50) NOT NULL, description VARCHAR(500), "
+                    "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), "
+                    "updated_at DATETIME)"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO drugs (sku, name, generic_name, dosage, quantity, "
+                    "expiration_date, manufacturer, price, category) VALUES "
+                    "('LEG-001', 'Legacy Drug', 'legacy', '5mg', 10, '2031-03-04', "
+                    "'Old Pharma', 1.5, 'Other')"
+                )
+            )
+
+        with engine.begin() as connection:
+            run_migrations(connection)
+
+        with engine.connect() as connection:
+            expiration_date = connection.scalar(select(Drug.expiration_date))
+            assert expiration_date == date(2031, 3, 4)
+
+            matches = connection.execute(
+                text("SELECT rowid FROM drugs_fts WHERE drugs_fts MATCH '\"egac\"'")
+            ).all()
+            assert len(matches) == 1
+
+        engine.dispose()
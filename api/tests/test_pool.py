@@ -0,0 +1,137 @@
+"""Tests for connection pool settings and instrumentation."""
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api.v1.endpoints import diagnostics
+from app.database import get_async_pool_options, get_pool_options
+from app.monitoring.histogram import Histogram
+from app.monitoring.pool import InstrumentedAsyncPool, pool_stats
+
+ADMIN = {"X-Admin-Token": "test-admin-token"}
+
+
+class TestHistogram:
+    """Test cases for Histogram."""
+
+    def test_snapshot_is_cumulative(self):
+        """Test that each bucket counts every value at or under its bound."""
+        histogram = Histogram([0.1, 1.0])
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        assert histogram.snapshot() == {
+            "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4},
+            "count": 4,
+            "sum": pytest.approx(3.65),
+        }
+
+        histogram.reset()
+        assert histogram.snapshot()["count"] == 0
+
+
+class TestPoolOptions:
+    """Test cases for the DB_POOL_* engine options."""
+
+    def test_server_database_is_sized(self):
+        """Test that a database server gets a sized, pre-pinged pool."""
+        options = get_pool_options("postgresql://user:pass@db:5432/pharmatrack")
+
+        assert options == {
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_timeout": 30.0,
+        }
+
+    def test_memory_database_keeps_its_pool(self):
+        """Test that in-memory SQLite is not given queue pool sizing."""
+        options = get_async_pool_options("sqlite:///:memory:")
+
+        assert "pool_size" not in options
+        assert "poolclass" not in options
+
+    def test_async_engine_is_instrumented(self):
+        """Test that the async engine's pool times checkouts."""
+        options = get_async_pool_options("sqlite:///pharmatrack.db")
+        assert options["poolclass"] is InstrumentedAsyncPool
+
+
+class TestInstrumentedAsyncPool:
+    """Test cases for InstrumentedAsyncPool."""
+
+    @pytest.fixture
+    async def engine(self, tmp_path):
+        """A file database with room for a single connection."""
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedAsyncPool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        yield engine
+        await engine.dispose()
+
+    async def test_checkouts_are_counted(self, engine):
+        """Test occupancy, waits and timeouts once the pool is exhausted."""
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            stats = pool_stats(engine.pool)
+            assert stats["checked_out"] == 1
+            assert stats["overflow"] == 0
+
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+        stats = pool_stats(engine.pool)
+        assert stats["pool"] == "InstrumentedAsyncPool"
+        assert stats["size"] == 1
+        assert stats["checked_out"] == 0
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds"]["count"] == 2
+        assert stats["wait_seconds"]["sum"] >= 0.05
+
+    async def test_metrics_survive_dispose(self, engine):
+        """Test that disposing the engine keeps the pool's history."""
+        async with engine.connect():
+            pass
+        await engine.dispose()
+
+        assert pool_stats(engine.pool)["wait_seconds"]["count"] == 1
+
+
+class TestPoolDiagnostics:
+    """Test cases for the pool diagnostics endpoint."""
+
+    def test_pool_stats_need_admin_token(self, client):
+        """Test that database hosts and names are not shown to anyone."""
+        assert client.get("/api/v1/diagnostics/pool").status_code == 403
+
+    def test_pool_stats(self, client):
+        """Test that the in-memory test database reports its static pool."""
+        response = client.get("/api/v1/diagnostics/pool", headers=ADMIN)
+
+        assert response.status_code == 200
+        assert response.json()["primary"]["pool"] == "StaticPool"
+        assert response.json()["primary"]["checked_out"] is None
+        assert response.json()["replicas"] == []
+
+    def test_replica_pool_stats(self, client, monkeypatch, tmp_path):
+        """Test that each read replica's pool is reported with the primary's."""
+        replica = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+            poolclass=InstrumentedAsyncPool,
+            pool_size=2,
+        )
+        monkeypatch.setattr(diagnostics, "read_engines", [replica])
+
+        response = client.get("/api/v1/diagnostics/pool", headers=ADMIN)
+
+        assert response.status_code == 200
+        [stats] = response.json()["replicas"]
+        assert stats["database"].endswith("replica.db")
+        assert stats["pool"] == "InstrumentedAsyncPool"
+        assert stats["size"] == 2
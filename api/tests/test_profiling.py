@@ -0,0 +1,70 @@
+"""Tests for opt-in request profiling."""
+
+import pstats
+from app.monitoring.profiling import is_admin_token
+
+ADMIN = {"X-Admin-Token": "test-admin-token"}
+
+
+class TestProfiling:
+    """Test cases for profiling requests and fetching their profiles."""
+
+    def test_profile_by_header(self, client, sample_drug):
+        """Test that a profiled request's profile can be fetched as text."""
+        response = client.get(
+            "/api/v1/drugs/",
+            params={"search": "test"},
+            headers={**ADMIN, "X-Profile": "true"},
+        )
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+
+        response = client.get(
+            f"/api/v1/diagnostics/profiles/{profile_id}", headers=ADMIN
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "function calls" in response.text
+        assert "list_drugs" in response.text
+
+    def test_profile_by_query_flag(self, client, tmp_path):
+        """Test that the query flag works too and pstats files can be loaded."""
+        response = client.get(
+            "/api/v1/drugs/stats", params={"profile": "true"}, headers=ADMIN
+        )
+        profile_id = response.headers["x-profile-id"]
+
+        response = client.get(
+            f"/api/v1/diagnostics/profiles/{profile_id}",
+            params={"format": "pstats"},
+            headers=ADMIN,
+        )
+        assert response.status_code == 200
+        path = tmp_path / "profile.pstats"
+        path.write_bytes(response.content)
+        assert pstats.Stats(str(path)).total_calls > 0
+
+    def test_requests_are_not_profiled_by_default(self, client):
+        """Test that only requests asking with the admin token are profiled."""
+        assert "x-profile-id" not in client.get("/api/v1/drugs/").headers
+        assert "x-profile-id" not in client.get("/api/v1/drugs/", headers=ADMIN).headers
+        response = client.get(
+            "/api/v1/drugs/",
+            headers={"X-Admin-Token": "wrong", "X-Profile": "true"},
+        )
+        assert "x-profile-id" not in response.headers
+
+    def test_profiles_need_admin_token(self, client):
+        """Test that profiles are only served to admins."""
+        response = client.get("/api/v1/diagnostics/profiles/abc")
+        assert response.status_code == 403
+
+        response = client.get("/api/v1/diagnostics/profiles/abc", headers=ADMIN)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Profile not found"
+
+    def test_no_admin_token_configured(self):
+        """Test that no token is accepted when ADMIN_TOKEN is unset."""
+        assert not is_admin_token("", "")
+        assert not is_admin_token("anything", "")
+        assert is_admin_token("secret", "secret")
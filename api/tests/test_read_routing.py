@@ -0,0 +1,116 @@
+"""Tests for routing drug reads to read replicas."""
+
+import time
+import pytest
+from app.cache.backend import cache_backend
+from app.database import get_read_session_factory, get_session_factory
+from app.repositories.table_version import drug_table_version
+from main import app
+
+ADMIN = {"X-Admin-Token": "test-admin-token"}
+
+
+class ReplicaSessionFactory:
+    """Session factory standing in for a replica, counting its sessions."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.sessions = 0
+
+    def __call__(self):
+        self.sessions += 1
+        return self.session_factory()
+
+
+class TestReadRouting:
+    """Test cases for read replica routing on /drugs routes."""
+
+    @pytest.fixture(autouse=True)
+    def replica(self, client, monkeypatch):
+        """Route reads to a replica on the test database."""
+        monkeypatch.setattr(drug_table_version, "write_window_seconds", 0.05)
+        # Close the write window opened by the bump on startup
+        cache_backend.clear()
+        # The replica shares the test database with the primary
+        self.replica = ReplicaSessionFactory(
+            app.dependency_overrides[get_session_factory]()
+        )
+        app.dependency_overrides[get_read_session_factory] = lambda: self.replica
+
+    def test_reads_use_replica(self, client):
+        """Test that GET routes read from the replica."""
+        assert client.get("/api/v1/drugs/").status_code == 200
+        assert client.get("/api/v1/drugs/low-stock").status_code == 200
+        assert client.get("/api/v1/drugs/export").status_code == 200
+
+        assert self.replica.sessions == 3
+
+    def test_writes_use_primary(self, client, sample_drug_data):
+        """Test that writes never reach the replica."""
+        response = client.post("/api/v1/drugs/", json=sample_drug_data)
+        assert response.status_code == 201
+
+        response = client.delete(f"/api/v1/drugs/{response.json()['id']}")
+        assert response.status_code == 200
+        assert self.replica.sessions == 0
+
+    def test_reads_follow_writes_to_primary(self, client, sample_drug_data):
+        """Test that the writer's reads see its write while other clients
+        keep reading from the replica."""
+        response = client.post("/api/v1/drugs/", json=sample_drug_data)
+        assert response.cookies["last_write"] == response.headers["X-Last-Write"]
+        created = response.json()
+
+        response = client.get(f"/api/v1/drugs/{created['id']}")
+        assert response.status_code == 200
+        assert self.replica.sessions == 0
+
+        client.cookies.clear()
+        client.get(f"/api/v1/drugs/{created['id']}")
+        assert self.replica.sessions == 1
+
+    def test_rejected_writes_leave_reads_on_replica(self, client, sample_drug_data):
+        """Test that only writes that went through pin the client's reads."""
+        response = client.delete("/api/v1/drugs/999")
+        assert response.status_code == 404
+        assert "X-Last-Write" not in response.headers
+
+        response = client.post("/api/v1/drugs/", json={"sku": "BAD"})
+        assert response.status_code == 422
+        assert "last_write" not in response.cookies
+
+        client.get("/api/v1/drugs/")
+        assert self.replica.sessions == 1
+
+    def test_last_write_header(self, client):
+        """Test that clients without cookies can send the write time back."""
+        client.get("/api/v1/drugs/", headers={"X-Last-Write": f"{time.time()}"})
+        assert self.replica.sessions == 0
+
+        client.get("/api/v1/drugs/", headers={"X-Last-Write": f"{time.time() - 60}"})
+        client.get("/api/v1/drugs/", headers={"X-Last-Write": "yesterday"})
+        assert self.replica.sessions == 2
+
+    def test_replica_reads_after_writes_are_not_kept(self, client, sample_drug_data):
+        """Test that replica reads that may predate a write are neither cached
+        nor given an ETag until the write window has passed."""
+        client.post("/api/v1/drugs/", json=sample_drug_data)
+        client.cookies.clear()
+        hits = client.get("/api/v1/diagnostics/cache", headers=ADMIN).json()["hits"]
+
+        for _ in range(2):
+            response = client.get("/api/v1/drugs/")
+            assert response.status_code == 200
+            assert "ETag" not in response.headers
+        assert (
+            client.get("/api/v1/diagnostics/cache", headers=ADMIN).json()["hits"]
+            == hits
+        )
+
+        time.sleep(0.1)
+        assert "ETag" in client.get("/api/v1/drugs/").headers
+        client.get("/api/v1/drugs/")
+        assert (
+            client.get("/api/v1/diagnostics/cache", headers=ADMIN).json()["hits"]
+            == hits + 1
+        )
@@ -1,9 +1,17 @@
 """Tests for drug repository."""
 
+import asyncio
+from datetime import date
+
 import pytest
+from sqlalchemy import event
+from app.cache.backend import MemoryCacheBackend
+from app.repositories import drug_repository
+from app.repositories.drug_import import DrugImportError
 from app.repositories.drug_repository import DrugRepository
 from app.repositories.drug_interface import DrugRepositoryInterface
-from app.schemas.drug import DrugCreate, DrugUpdate
+from app.repositories.table_version import TableVersion
+from app.schemas.drug import DrugCreate, DrugFilters, DrugSort, DrugUpdate
 
 
 class TestDrugRepository:
@@ -12,51 +20,52 @@ class TestDrugRepository:
     @pytest.fixture(autouse=True)
     def setup(self, db_session):
         """Set up repository for each test."""
+        self.db_session = db_session
         self.repository: DrugRepositoryInterface = DrugRepository(db_session)
 
     @pytest.fixture
-    def sample_drug(self, sample_drug_create):
+    async def sample_drug(self, sample_drug_create):
         """Create a sample drug in the repository."""
-        return self.repository.create(sample_drug_create)
+        return await self.repository.create(sample_drug_create)
 
-    def test_repository_implements_interface(self):
+    async def test_repository_implements_interface(self):
         """Test that DrugRepository implements DrugRepositoryInterface."""
         assert isinstance(self.repository, DrugRepositoryInterface)
 
-    def test_create_drug(self, sample_drug_create):
+    async def test_create_drug(self, sample_drug_create):
         """Test creating a drug."""
-        drug = self.repository.create(sample_drug_create)
+        drug = await self.repository.create(sample_drug_create)
 
         assert drug.id is not None
         assert drug.sku == sample_drug_create.sku
         assert drug.name == sample_drug_create.name
 
-    def test_get_drug_by_id(self, sample_drug):
+    async def test_get_drug_by_id(self, sample_drug):
         """Test retrieving a drug by ID."""
-        retrieved_drug = self.repository.get_by_id(sample_drug.id)
+        retrieved_drug = await self.repository.get_by_id(sample_drug.id)
 
         assert retrieved_drug is not None
         assert retrieved_drug.id == sample_drug.id
         assert retrieved_drug.name == sample_drug.name
 
-    def test_get_drug_by_id_not_found(self):
+    async def test_get_drug_by_id_not_found(self):
         """Test retrieving a non-existent drug."""
-        drug = self.repository.get_by_id(999)
+        drug = await self.repository.get_by_id(999)
         assert drug is None
 
-    def test_get_drug_by_sku(self, sample_drug):
+    async def test_get_drug_by_sku(self, sample_drug):
         """Test retrieving a drug by SKU."""
-        retrieved_drug = self.repository.get_by_sku(sample_drug.sku)
+        retrieved_drug = await self.repository.get_by_sku(sample_drug.sku)
 
         assert retrieved_drug is not None
         assert retrieved_drug.sku == sample_drug.sku
 
-    def test_get_drug_by_sku_not_found(self):
+    async def test_get_drug_by_sku_not_found(self):
         """Test retrieving a drug by non-existent SKU."""
-        drug = self.repository.get_by_sku("NON-EXISTENT")
+        drug = await self.repository.get_by_sku("NON-EXISTENT")
         assert drug is None
 
-    def test_get_all_drugs(self, sample_drug):
+    async def test_get_all_drugs(self, sample_drug):
         """Test retrieving all drugs."""
         drug_data_2 = DrugCreate(
             sku="TEST-002",
@@ -69,18 +78,18 @@ class TestDrugRepository:
             price=15.99,
             category="Vitamins",
         )
-        self.repository.create(drug_data_2)
+        await self.repository.create(drug_data_2)
 
-        drugs = self.repository.get_all()
+        drugs = await self.repository.get_all()
         assert len(drugs) == 2
 
-    def test_update_drug(self, sample_drug):
+    async def test_update_drug(self, sample_drug):
         """Test updating a drug."""
         update_data = DrugUpdate(
             name="Updated Test Medication", quantity=150, price=35.99
         )
 
-        updated_drug = self.repository.update(sample_drug.id, update_data)
+        updated_drug = await self.repository.update(sample_drug.id, update_data)
 
         assert updated_drug is not None
         assert updated_drug.name == "Updated Test Medication"
@@ -88,26 +97,26 @@ class TestDrugRepository:
         assert updated_drug.price == 35.99
         assert updated_drug.sku == sample_drug.sku
 
-    def test_update_drug_not_found(self):
+    async def test_update_drug_not_found(self):
         """Test updating a non-existent drug."""
         update_data = DrugUpdate(name="Won't work")
-        updated_drug = self.repository.update(999, update_data)
+        updated_drug = await self.repository.update(999, update_data)
         assert updated_drug is None
 
-    def test_delete_drug(self, sample_drug):
+    async def test_delete_drug(self, sample_drug):
         """Test deleting a drug."""
-        success = self.repository.delete(sample_drug.id)
+        success = await self.repository.delete(sample_drug.id)
         assert success is True
 
-        deleted_drug = self.repository.get_by_id(sample_drug.id)
+        deleted_drug = await self.repository.get_by_id(sample_drug.id)
         assert deleted_drug is None
 
-    def test_delete_drug_not_found(self):
+    async def test_delete_drug_not_found(self):
         """Test deleting a non-existent drug."""
-        success = self.repository.delete(999)
+        success = await self.repository.delete(999)
         assert success is False
 
-    def test_search_by_name(self, sample_drug):
+    async def test_search_by_name(self, sample_drug):
         """Test searching drugs by name."""
         drug_data_2 = DrugCreate(
             sku="TEST-002",
@@ -120,17 +129,72 @@ class TestDrugRepository:
             price=12.50,
             category="Pain Relief",
         )
-        self.repository.create(drug_data_2)
+        await self.repository.create(drug_data_2)
 
-        results = self.repository.search("Test")
+        results = await self.repository.search("Test")
         assert len(results) == 1
         assert results[0].name == sample_drug.name
 
-        results = self.repository.search("Pain")
+        results = await self.repository.search("Pain")
         assert len(results) == 1
         assert results[0].name == "Pain Reliever"
 
-    def test_filter_by_category(self, sample_drug):
+    async def test_search_matches_substring_case_insensitively(self, sample_drug):
+        """Test that search finds infix matches regardless of case."""
+        results = await self.repository.search("EDICAT")
+        assert [drug.id for drug in results] == [sample_drug.id]
+
+        results = await self.repository.search("te")
+        assert [drug.id for drug in results] == [sample_drug.id]
+
+    async def test_search_ranks_closest_match_first(self, sample_drug):
+        """Test that search results are ordered by relevance."""
+        await self.repository.create(
+            DrugCreate(
+                sku="AMOX-001",
+                name="Amoxicillin",
+                generic_name="amoxicillin",
+                dosage="500mg",
+                quantity=75,
+                expiration_date="2025-08-15",
+                manufacturer="Pharma Labs",
+                price=12.50,
+                category="Antibiotic",
+            )
+        )
+        await self.repository.create(
+            DrugCreate(
+                sku="AMOX-002",
+                name="Amoxicillin Clavulanate Extended Release",
+                generic_name="amoxicillin_clavulanate",
+                dosage="875mg",
+                quantity=75,
+                expiration_date="2025-08-15",
+                manufacturer="Amoxicillin Generics",
+                price=22.50,
+                category="Antibiotic",
+            )
+        )
+
+        results = await self.repository.search("amoxicillin")
+        assert [drug.sku for drug in results] == ["AMOX-001", "AMOX-002"]
+
+        # Newest first would put AMOX-002 ahead
+        results, total = await self.repository.search_paginated("amoxicillin")
+        assert [drug.sku for drug in results] == ["AMOX-001", "AMOX-002"]
+        assert total == 2
+
+    async def test_search_reflects_updates_and_deletes(self, sample_drug):
+        """Test that the search index follows writes to the drugs table."""
+        await self.repository.update(sample_drug.id, DrugUpdate(name="Renamed Drug"))
+
+        assert await self.repository.search("Test Medication") == []
+        assert len(await self.repository.search("Renamed")) == 1
+
+        await self.repository.delete(sample_drug.id)
+        assert await self.repository.search("Renamed") == []
+
+    async def test_filter_by_category(self, sample_drug):
         """Test filtering drugs by category."""
         vitamin_data = DrugCreate(
             sku="VIT-001",
@@ -143,17 +207,17 @@ class TestDrugRepository:
             price=8.99,
             category="Vitamins",
         )
-        self.repository.create(vitamin_data)
+        await self.repository.create(vitamin_data)
 
-        pain_drugs = self.repository.filter_by_category("Pain Relief")
+        pain_drugs = await self.repository.filter_by_category("Pain Relief")
         assert len(pain_drugs) == 1
         assert pain_drugs[0].category == "Pain Relief"
 
-        vitamin_drugs = self.repository.filter_by_category("Vitamins")
+        vitamin_drugs = await self.repository.filter_by_category("Vitamins")
         assert len(vitamin_drugs) == 1
         assert vitamin_drugs[0].category == "Vitamins"
 
-    def test_search_with_combined_filters(self, sample_drug):
+    async def test_search_with_combined_filters(self, sample_drug):
         """Test searching with both name and category filters."""
         drugs_data = [
             DrugCreate(
@@ -181,22 +245,47 @@ class TestDrugRepository:
         ]
 
         for drug_data in drugs_data:
-            self.repository.create(drug_data)
+            await self.repository.create(drug_data)
 
-        results = self.repository.search("Test")
+        results = await self.repository.search("Test")
         assert len(results) == 3
 
-    def test_search_no_results(self):
+    async def test_search_no_results(self):
         """Test search with no matching results."""
-        results = self.repository.search("NonExistent")
+        results = await self.repository.search("NonExistent")
         assert len(results) == 0
 
-    def test_exists_method(self, sample_drug):
+    async def test_get_expiring(self, sample_drug):
+        """Test selecting drugs by an expiration date window."""
+        for sku, expiration_date in [
+            ("EXP-001", "2031-01-10"),
+            ("EXP-002", "2031-02-20"),
+            ("EXP-003", "2031-06-01"),
+        ]:
+            await self.repository.create(
+                DrugCreate(
+                    sku=sku,
+                    name=f"Expiring {sku}",
+                    generic_name="expiring",
+                    dosage="10mg",
+                    quantity=10,
+                    expiration_date=expiration_date,
+                    manufacturer="Test Pharma",
+                    price=1.99,
+                    category="Other",
+                )
+            )
+
+        drugs = await self.repository.get_expiring(date(2031, 1, 10), date(2031, 3, 1))
+        assert [drug.sku for drug in drugs] == ["EXP-001", "EXP-002"]
+        assert drugs[0].expiration_date == date(2031, 1, 10)
+
+    async def test_exists_method(self, sample_drug):
         """Test that exists method correctly identifies existing drugs."""
-        assert self.repository.exists(sample_drug.sku) is True
-        assert self.repository.exists("NON-EXISTENT") is False
+        assert await self.repository.exists(sample_drug.sku) is True
+        assert await self.repository.exists("NON-EXISTENT") is False
 
-    def test_batch_create_drugs(self):
+    async def test_batch_create_drugs(self):
         """Test batch creation of multiple drugs."""
         drugs_data = [
             DrugCreate(
@@ -223,22 +312,186 @@ class TestDrugRepository:
             ),
         ]
 
-        created_drugs = self.repository.batch_create(drugs_data)
+        created_drugs = await self.repository.batch_create(drugs_data)
 
         assert len(created_drugs) == 2
         assert created_drugs[0].sku == "BATCH-001"
         assert created_drugs[1].sku == "BATCH-002"
         assert all(drug.id is not None for drug in created_drugs)
 
-        all_drugs = self.repository.get_all()
+        all_drugs = await self.repository.get_all()
         assert len(all_drugs) == 2
 
-    def test_batch_create_empty_list(self):
+    async def test_batch_create_chunks_without_refreshing(
+        self, db_session, monkeypatch
+    ):
+        """Test that large batches are split into INSERT ... RETURNING chunks."""
+        monkeypatch.setattr(drug_repository, "BATCH_INSERT_CHUNK_SIZE", 2)
+        drugs_data = [
+            DrugCreate(
+                sku=f"BATCH-{i:03d}",
+                name=f"Batch Drug {i}",
+                generic_name=f"batch_drug_{i}",
+                dosage="10mg",
+                quantity=i + 1,
+                expiration_date="2031-12-31",
+                manufacturer="Batch Pharma",
+                price=9.99,
+                category="Antibiotic",
+            )
+            for i in range(5)
+        ]
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sync_engine = db_session.bind.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", record)
+        try:
+            created_drugs = await self.repository.batch_create(drugs_data)
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", record)
+
+        assert [drug.sku for drug in created_drugs] == [d.sku for d in drugs_data]
+        assert all(drug.created_at is not None for drug in created_drugs)
+        inserts = [s for s in statements if s.startswith("INSERT INTO drugs ")]
+        assert len(inserts) == 3
+        assert not any(s.startswith("SELECT") for s in statements)
+
+    async def test_import_drugs(self, sample_drug):
+        """Test staging streamed chunks and merging them into drugs."""
+
+        def drug(i, sku=None):
+            return DrugCreate(
+                sku=sku or f"IMP-{i:03d}",
+                name=f"Imported Drug {i}",
+                generic_name=f"imported_{i}",
+                dosage="10mg",
+                quantity=10,
+                expiration_date="2031-12-31",
+                manufacturer="Import Pharma",
+                price=1.5,
+                category="Other",
+            )
+
+        async def chunks(*batches):
+            for batch in batches:
+                yield batch
+
+        counts = await self.repository.import_drugs(
+            chunks([(1, drug(1)), (2, drug(2))], [(3, drug(3))])
+        )
+        assert counts == (3, 0)
+        assert len(await self.repository.get_all()) == 4
+        assert (await self.repository.get_by_sku("IMP-003")).name == "Imported Drug 3"
+
+        with pytest.raises(DrugImportError) as exc_info:
+            await self.repository.import_drugs(
+                chunks([(1, drug(4)), (2, drug(5, sku="TEST-001"))])
+            )
+        assert [(e.row, e.field) for e in exc_info.value.errors] == [(2, "sku")]
+        assert not await self.repository.exists("IMP-004")
+
+        renamed = drug(1).model_copy(update={"name": "Renamed Drug"})
+        counts = await self.repository.import_drugs(
+            chunks([(1, renamed), (2, drug(2)), (3, drug(4))]), upsert=True
+        )
+        assert counts == (1, 1)
+        assert (await self.repository.get_by_sku("IMP-001")).name == "Renamed Drug"
+
+    async def test_upsert(self, sample_drug, sample_drug_create):
+        """Test inserting new SKUs and updating changed existing ones."""
+        unchanged = sample_drug_create.model_copy(update={"sku": "TEST-002"})
+        await self.repository.create(unchanged)
+        changed = sample_drug_create.model_copy(update={"quantity": 5})
+        new = sample_drug_create.model_copy(update={"sku": "TEST-003"})
+
+        counts = await self.repository.upsert([changed, unchanged, new])
+        assert counts == (1, 1)
+
+        await self.db_session.refresh(sample_drug)
+        assert sample_drug.quantity == 5
+        assert sample_drug.updated_at is not None
+        assert (await self.repository.get_by_sku("TEST-002")).updated_at is None
+        assert await self.repository.exists("TEST-003")
+
+    async def test_batch_create_partial_skips_rejected_rows(
+        self, sample_drug, sample_drug_create, monkeypatch
+    ):
+        """Test that a constraint violation only loses the offending row."""
+        monkeypatch.setattr(drug_repository, "BATCH_INSERT_CHUNK_SIZE", 2)
+        first = sample_drug_create.model_copy(update={"sku": "TEST-002"})
+        third = sample_drug_create.model_copy(update={"sku": "TEST-003"})
+
+        created = await self.repository.batch_create_partial(
+            [first, sample_drug_create, third]
+        )
+
+        assert [drug and drug.sku for drug in created] == ["TEST-002", None, "TEST-003"]
+        assert await self.repository.exists("TEST-002")
+        assert await self.repository.exists("TEST-003")
+        assert len(await self.repository.get_all()) == 3
+
+    async def test_stream_all_in_batches(self, sample_drug, sample_drug_create):
+        """Test that all drugs are streamed as plain rows, a batch at a time."""
+        for sku in ("TEST-002", "TEST-003"):
+            await self.repository.create(
+                sample_drug_create.model_copy(update={"sku": sku})
+            )
+
+        batches = [rows async for rows in self.repository.stream_all(2)]
+
+        assert [len(rows) for rows in batches] == [2, 1]
+        assert [row["sku"] for rows in batches for row in rows] == [
+            "TEST-001",
+            "TEST-002",
+            "TEST-003",
+        ]
+        assert batches[0][0]["id"] == sample_drug.id
+
+    async def test_writes_bump_table_version(self, sample_drug_create):
+        """Test that every committed write changes the table version token."""
+        version = TableVersion("drugs", MemoryCacheBackend())
+        repository = DrugRepository(self.db_session, version)
+        tokens = [await version.get()]
+
+        drug = await repository.create(sample_drug_create)
+        tokens.append(await version.get())
+        await repository.get_by_id(drug.id)
+        assert await version.get() == tokens[-1]
+
+        await repository.update(drug.id, DrugUpdate(quantity=1))
+        tokens.append(await version.get())
+        await repository.delete(drug.id)
+        tokens.append(await version.get())
+        assert len(set(tokens)) == 4
+
+    async def test_writes_open_write_window(self, sample_drug_create):
+        """Test that a write marks the table as recently written."""
+        version = TableVersion("drugs", MemoryCacheBackend(), write_window_seconds=60)
+        repository = DrugRepository(self.db_session, version)
+        assert not await version.written_recently()
+
+        await repository.create(sample_drug_create)
+        assert await version.written_recently()
+
+    async def test_table_version_expires(self):
+        """Test that the token is redrawn once its TTL runs out."""
+        version = TableVersion("drugs", MemoryCacheBackend(), ttl_seconds=0.05)
+        token = await version.get()
+        assert await version.get() == token
+
+        await asyncio.sleep(0.1)
+        assert await version.get() != token
+
+    async def test_batch_create_empty_list(self):
         """Test batch creation with empty list."""
-        result = self.repository.batch_create([])
+        result = await self.repository.batch_create([])
         assert result == []
 
-    def test_check_existing_skus(self, sample_drug):
+    async def test_check_existing_skus(self, sample_drug):
         """Test batch SKU existence checking."""
         drug_data_2 = DrugCreate(
             sku="TEST-002",
@@ -251,10 +504,10 @@ class TestDrugRepository:
             price=15.99,
             category="Vitamins",
         )
-        self.repository.create(drug_data_2)
+        await self.repository.create(drug_data_2)
 
         skus_to_check = ["TEST-001", "TEST-002", "NON-EXISTENT", "ALSO-MISSING"]
-        existing_skus = self.repository.check_existing_skus(skus_to_check)
+        existing_skus = await self.repository.check_existing_skus(skus_to_check)
 
         assert len(existing_skus) == 2
         assert "TEST-001" in existing_skus
@@ -262,12 +515,66 @@ class TestDrugRepository:
         assert "NON-EXISTENT" not in existing_skus
         assert "ALSO-MISSING" not in existing_skus
 
-    def test_check_existing_skus_empty_list(self):
+    async def test_check_existing_skus_empty_list(self):
         """Test checking existing SKUs with empty list."""
-        result = self.repository.check_existing_skus([])
+        result = await self.repository.check_existing_skus([])
         assert result == []
 
-    def test_get_paginated(self, sample_drug):
+    async def test_get_category_counts(self, sample_drug):
+        """Test counting drugs per distinct category."""
+        for i, category in enumerate(["Vitamins", "Antibiotic", "Vitamins"], start=2):
+            await self.repository.create(
+                DrugCreate(
+                    sku=f"TEST-{i:03d}",
+                    name=f"Test Drug {i}",
+                    generic_name=f"test_drug_{i}",
+                    dosage="10mg",
+                    quantity=100,
+                    expiration_date="2031-12-31",
+                    manufacturer="Test Pharma",
+                    price=29.99,
+                    category=category,
+                )
+            )
+
+        counts = await self.repository.get_category_counts()
+        assert counts == [("Antibiotic", 1), ("Pain Relief", 1), ("Vitamins", 2)]
+
+    async def test_get_stats(self, sample_drug):
+        """Test aggregating inventory totals with thresholds."""
+        await self.repository.create(
+            DrugCreate(
+                sku="TEST-002",
+                name="Test Drug 2",
+                generic_name="test_drug_2",
+                dosage="10mg",
+                quantity=20,
+                expiration_date="2031-01-10",
+                manufacturer="Test Pharma",
+                price=2.5,
+                category="Vitamins",
+            )
+        )
+
+        stats = await self.repository.get_stats(50, date(2031, 1, 1), date(2031, 1, 31))
+        assert stats["total_drugs"] == 2
+        assert stats["total_stock"] == 120
+        assert stats["low_stock_count"] == 1
+        assert stats["expiring_soon_count"] == 1
+        assert stats["inventory_value"] == pytest.approx(100 * 29.99 + 20 * 2.5)
+
+    async def test_get_stats_empty(self):
+        """Test that totals over an empty table are zero."""
+        stats = await self.repository.get_stats(50, date(2031, 1, 1), date(2031, 1, 31))
+        assert stats == {
+            "total_drugs": 0,
+            "total_stock": 0,
+            "low_stock_count": 0,
+            "expiring_soon_count": 0,
+            "inventory_value": 0,
+        }
+
+    async def test_get_paginated(self, sample_drug):
         """Test paginated drug retrieval."""
         for i in range(2, 6):
             drug_data = DrugCreate(
@@ -281,17 +588,134 @@ class TestDrugRepository:
                 price=29.99,
                 category="Test Category",
             )
-            self.repository.create(drug_data)
+            await self.repository.create(drug_data)
 
-        drugs, total = self.repository.get_paginated(page=1, page_size=3)
+        drugs, total = await self.repository.get_paginated(page=1, page_size=3)
         assert len(drugs) == 3
         assert total == 5
 
-        drugs, total = self.repository.get_paginated(page=2, page_size=3)
+        drugs, total = await self.repository.get_paginated(page=2, page_size=3)
         assert len(drugs) == 2
         assert total == 5
 
-    def test_search_paginated(self, sample_drug):
+    async def test_find_paginates_with_cursor(self, sample_drug):
+        """Test keyset pagination continues after the last row of a page."""
+        for i in range(2, 6):
+            drug_data = DrugCreate(
+                sku=f"TEST-{i:03d}",
+                name=f"Test Drug {i}",
+                generic_name=f"test_drug_{i}",
+                dosage="10mg",
+                quantity=100,
+                expiration_date="2025-12-31",
+                manufacturer="Test Pharma",
+                price=29.99,
+                category="Test Category",
+            )
+            await self.repository.create(drug_data)
+
+        first_page, cursor = await self.repository.find(DrugFilters(), limit=3)
+        assert len(first_page) == 3
+        assert cursor is not None
+
+        second_page, cursor = await self.repository.find(
+            DrugFilters(), limit=3, cursor=cursor
+        )
+        assert len(second_page) == 2
+        assert cursor is None
+
+        ids = [drug.id for drug in first_page + second_page]
+        assert ids == sorted(ids, reverse=True)
+        assert len(set(ids)) == 5
+
+    async def test_find_rows_returns_plain_mappings(self, sample_drug):
+        """Test that find_rows pages like find without loading ORM objects."""
+        await self.repository.create(
+            DrugCreate(
+                sku="TEST-002",
+                name="Test Drug 2",
+                generic_name="test_drug_2",
+                dosage="10mg",
+                quantity=100,
+                expiration_date="2025-12-31",
+                manufacturer="Test Pharma",
+                price=29.99,
+                category="Test Category",
+            )
+        )
+        filters = DrugFilters(sort=DrugSort.NAME)
+
+        rows, cursor = await self.repository.find_rows(filters, limit=1)
+        drugs, expected_cursor = await self.repository.find(filters, limit=1)
+
+        assert cursor == expected_cursor
+        assert rows == [
+            {column: getattr(drugs[0], column) for column in rows[0].keys()}
+        ]
+        assert "sort_value" not in rows[0]
+
+        rows, cursor = await self.repository.find_rows(filters, cursor=cursor)
+        assert [row["sku"] for row in rows] == ["TEST-001"]
+        assert cursor is None
+
+    async def test_find_combines_filters_and_sort(self, sample_drug):
+        """Test that filters and sort order are applied together in SQL."""
+        for i, (quantity, category) in enumerate(
+            [
+                (10, "Pain Relief"),
+                (40, "Pain Relief"),
+                (70, "Vitamins"),
+                (90, "Pain Relief"),
+            ]
+        ):
+            await self.repository.create(
+                DrugCreate(
+                    sku=f"FIND-{i:03d}",
+                    name=f"Find Drug {i}",
+                    generic_name=f"find_drug_{i}",
+                    dosage="10mg",
+                    quantity=quantity,
+                    expiration_date="2025-12-31",
+                    manufacturer="Find Pharma",
+                    price=9.99,
+                    category=category,
+                )
+            )
+
+        drugs, _ = await self.repository.find(
+            DrugFilters(
+                category="Pain Relief",
+                manufacturer="Find Pharma",
+                min_quantity=20,
+                max_quantity=95,
+                sort=DrugSort.QUANTITY_DESC,
+            )
+        )
+        assert [drug.quantity for drug in drugs] == [90, 40]
+
+    async def test_find_rejects_cursor_for_other_sort(self, sample_drug):
+        """Test that a cursor cannot be reused with a different sort order."""
+        await self.repository.create(
+            DrugCreate(
+                sku="TEST-002",
+                name="Another Test Drug",
+                generic_name="another_test",
+                dosage="20mg",
+                quantity=50,
+                expiration_date="2025-06-30",
+                manufacturer="Another Pharma",
+                price=15.99,
+                category="Vitamins",
+            )
+        )
+        _, cursor = await self.repository.find(DrugFilters(), limit=1)
+
+        with pytest.raises(ValueError):
+            await self.repository.find(
+                DrugFilters(sort=DrugSort.NAME), limit=1, cursor=cursor
+            )
+
+    async def test_search_paginated(self, sample_drug):
         """Test paginated search."""
         for i in range(2, 6):
             drug_data = DrugCreate(
@@ -305,7 +729,7 @@ class TestDrugRepository:
                 price=29.99,
                 category="Test Category",
             )
-            self.repository.create(drug_data)
+            await self.repository.create(drug_data)
 
         other_drug = DrugCreate(
             sku="OTHER-001",
@@ -318,12 +742,16 @@ class TestDrugRepository:
             price=29.99,
             category="Other Category",
         )
-        self.repository.create(other_drug)
+        await self.repository.create(other_drug)
 
-        drugs, total = self.repository.search_paginated("Test", page=1, page_size=3)
+        drugs, total = await self.repository.search_paginated(
+            "Test", page=1, page_size=3
+        )
         assert len(drugs) == 3
         assert total == 5
 
-        drugs, total = self.repository.search_paginated("Test", page=2, page_size=3)
+        drugs, total = await self.repository.search_paginated(
+            "Test", page=2, page_size=3
+        )
         assert len(drugs) == 2
         assert total == 5
@@ -0,0 +1,94 @@
+"""Tests for the Server-Timing header and endpoint query budgets."""
+
+import pytest
+from app.monitoring.queries import QueryStats
+from app.monitoring.server_timing import (
+    format_server_timing,
+    parse_server_timing,
+    query_count,
+)
+
+
+class TestServerTimingHeader:
+    """Test cases for formatting and parsing Server-Timing."""
+
+    def test_round_trip(self):
+        """Test that the statement count and slowest statement survive."""
+        stats = QueryStats()
+        stats.record('SELECT "name"\n  FROM drugs', 0.002)
+        stats.record("SELECT 1", 0.001)
+
+        header = format_server_timing(stats)
+        metrics = parse_server_timing(header)
+
+        assert query_count(header) == 2
+        assert metrics["db"] == {"dur": "3.000", "desc": "2 queries"}
+        assert metrics["db-slowest"] == {
+            "dur": "2.000",
+            "desc": 'SELECT "name" FROM drugs',
+        }
+
+    def test_no_statements(self):
+        """Test the header of a request that did not touch the database."""
+        header = format_server_timing(QueryStats())
+
+        assert header == 'db;dur=0.000;desc="0 queries"'
+        assert query_count(header) == 0
+
+    def test_long_statements_are_shortened(self):
+        """Test that statements are cut to keep the header small."""
+        stats = QueryStats()
+        stats.record("SELECT " + ", ".join(["column"] * 100), 0.001)
+
+        desc = parse_server_timing(format_server_timing(stats))["db-slowest"]["desc"]
+        assert len(desc) == 200
+        assert desc.endswith("...")
+
+    def test_foreign_header(self):
+        """Test that a header without database metrics has no query count."""
+        assert query_count("cache;desc=hit, app;dur=12") is None
+        assert parse_server_timing("cache;desc=hit, app;dur=12") == {
+            "cache": {"desc": "hit"},
+            "app": {"dur": "12"},
+        }
+
+    def test_responses_carry_header(self, client):
+        """Test that API responses report their database use."""
+        response = client.get("/api/v1/drugs/stats")
+
+        assert response.status_code == 200
+        assert query_count(response.headers["server-timing"]) == 1
+
+
+class TestQueryBudgets:
+    """Round trips allowed per request on the main drug endpoints."""
+
+    @pytest.mark.query_budget(1)
+    def test_reads(self, client, sample_drug):
+        """Test that each read is answered in a single statement."""
+        client.get("/api/v1/drugs/")
+        client.get("/api/v1/drugs/", params={"search": "test", "sort": "name"})
+        client.get(f"/api/v1/drugs/{sample_drug.id}")
+        client.get("/api/v1/drugs/low-stock")
+        client.get("/api/v1/drugs/expiring-soon")
+        client.get("/api/v1/drugs/stats")
+        client.get("/api/v1/drugs/categories")
+
+    @pytest.mark.query_budget(4)
+    def test_writes(self, client, sample_drug_data):
+        """Test the statements of creating, updating and deleting a drug."""
+        created = client.post("/api/v1/drugs/", json=sample_drug_data).json()
+        client.put(f"/api/v1/drugs/{created['id']}", json={"sku": "NEW-001"})
+        client.delete(f"/api/v1/drugs/{created['id']}")
+
+    @pytest.mark.query_budget(2)
+    def test_batch_create(self, client, sample_drug_data):
+        """Test that a batch is checked and inserted in two statements."""
+        rows = [{**sample_drug_data, "sku": f"BUDGET-{n}"} for n in range(20)]
+        assert client.post("/api/v1/drugs/batch", json=rows).status_code == 201
+
+    @pytest.mark.query_budget(0)
+    def test_over_budget_fails(self, client):
+        """Test that a request over its budget fails the test."""
+        with pytest.raises(AssertionError, match="over its budget of 0"):
+            client.get("/api/v1/drugs/stats")
@@ -12,17 +12,20 @@ import { DeleteConfirmationModal } from "@/components/DeleteConfirmationModal";
 import { BatchImportDrawer } from "@/components/BatchImportDrawer";
 import {
   useDrugs,
+  useDrugStats,
   useCreateDrug,
   useUpdateDrug,
   useDeleteDrug,
 } from "@/hooks/useDrugs";
 import { Drug } from "@/types/drug";
+import { DrugSort } from "@/types/api";
 import { toast } from "sonner";
 import { extractValidationErrors } from "@/lib/utils";
 
 export default function PharmacyInventory() {
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedCategory, setSelectedCategory] = useState("All");
+  const [sort, setSort] = useState<DrugSort | undefined>(undefined);
   const [isAddDrawerOpen, setIsAddDrawerOpen] = useState(false);
   const [isEditDrawerOpen, setIsEditDrawerOpen] = useState(false);
   const [isDeleteModalOpen, setIsDeleteModalOpen] = useState(false);
@@ -37,11 +40,17 @@ export default function PharmacyInventory() {
     data: drugs = [],
     isLoading,
     error,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage,
   } = useDrugs(
     searchTerm || undefined,
-    selectedCategory !== "All" ? selectedCategory : undefined
+    selectedCategory !== "All" ? selectedCategory : undefined,
+    sort
   );
 
+  const { data: stats } = useDrugStats();
+
   const createDrugMutation = useCreateDrug();
   const updateDrugMutation = useUpdateDrug();
   const deleteDrugMutation = useDeleteDrug();
@@ -209,14 +218,19 @@ export default function PharmacyInventory() {
             setSearchTerm={setSearchTerm}
             selectedCategory={selectedCategory}
             setSelectedCategory={setSelectedCategory}
+            sort={sort}
+            setSort={setSort}
             onAddDrug={handleAddDrugClick}
             onBatchImport={handleBatchImportClick}
           />
-          <StatsCards drugs={drugs} />
+          <StatsCards stats={stats} />
           <InventoryTable
             drugs={drugs}
             onEditDrug={openEditDrawer}
             onDeleteDrug={openDeleteModal}
+            hasMore={hasNextPage}
+            isLoadingMore={isFetchingNextPage}
+            onLoadMore={() => fetchNextPage()}
           />
         </div>
       </main>
@@ -22,7 +22,7 @@ import {
 import { Badge } from "@/components/ui/badge";
 import { Alert, AlertDescription } from "@/components/ui/alert";
 import { Progress } from "@/components/ui/progress";
-import { useBatchCreateDrugs } from "@/hooks/useDrugs";
+import { useImportDrugsCsv } from "@/hooks/useDrugs";
 import { Upload, FileText, AlertTriangle, CheckCircle2, X } from "lucide-react";
 import { toast } from "sonner";
 import { extractValidationErrors } from "@/lib/utils";
@@ -62,6 +62,10 @@ const REQUIRED_FIELDS = [
   "category",
 ];
 
+// Only the first rows are parsed in the browser for the preview; the server
+// streams and validates the whole file on import.
+const PREVIEW_ROWS = 100;
+
 const CATEGORIES = [
   "Antibiotic",
   "Pain Relief",
@@ -83,10 +87,10 @@ export function BatchImportDrawer({
   const [validationErrors, setValidationErrors] = useState<ValidationError[]>(
     []
   );
-  const [fileName, setFileName] = useState<string>("");
+  const [file, setFile] = useState<File | null>(null);
   const [isUploading, setIsUploading] = useState(false);
 
-  const batchCreateMutation = useBatchCreateDrugs();
+  const importMutation = useImportDrugsCsv();
 
   const downloadTemplate = () => {
     const headers = REQUIRED_FIELDS.join(",");
@@ -185,14 +189,15 @@ export function BatchImportDrawer({
 
   const handleFileUpload = useCallback(
     (event: React.ChangeEvent<HTMLInputElement>) => {
-      const file = event.target.files?.[0];
-      if (!file) return;
+      const selectedFile = event.target.files?.[0];
+      if (!selectedFile) return;
 
-      setFileName(file.name);
+      setFile(selectedFile);
       setIsUploading(true);
 
-      Papa.parse(file, {
+      Papa.parse(selectedFile, {
         header: true,
+        preview: PREVIEW_ROWS,
         skipEmptyLines: true,
         transformHeader: (header) => header.toLowerCase().replace(/\s+/g, "_"),
         complete: (results) => {
@@ -222,7 +227,7 @@ export function BatchImportDrawer({
           setValidationErrors(allErrors);
 
           if (allErrors.length === 0) {
-            toast.success(`${processedData.length} rows loaded successfully`);
+            toast.success(`${processedData.length} rows previewed successfully`);
           } else {
             toast.error(`${allErrors.length} validation errors found`);
           }
@@ -242,18 +247,17 @@ export function BatchImportDrawer({
       return;
     }
 
-    if (parsedData.length === 0) {
+    if (!file || parsedData.length === 0) {
       toast.error("No data to import");
       return;
     }
 
     try {
-      await batchCreateMutation.mutateAsync(parsedData);
+      await importMutation.mutateAsync(file);
       setParsedData([]);
       setValidationErrors([]);
-      setFileName("");
+      setFile(null);
       onOpenChange(false);
-      toast.success("Drugs imported successfully!");
     } catch (error) {
       const backendErrors = extractValidationErrors(error);
       if (backendErrors.length > 0) {
@@ -269,7 +273,7 @@ export function BatchImportDrawer({
   const handleReset = () => {
     setParsedData([]);
     setValidationErrors([]);
-    setFileName("");
+    setFile(null);
   };
 
   const getRowError = (rowIndex: number) => {
@@ -308,7 +312,7 @@ export function BatchImportDrawer({
                 <div className="space-y-1">
                   <p className="text-sm font-medium">Upload CSV File</p>
                   <p className="text-xs text-muted-foreground">
-                    Maximum file size: 10MB. Supported format: CSV
+                    Supported format: CSV
                   </p>
                 </div>
                 <input
@@ -323,9 +327,9 @@ export function BatchImportDrawer({
                     <span>Choose File</span>
                   </Button>
                 </label>
-                {fileName && (
+                {file && (
                   <p className="text-sm text-muted-foreground">
-                    Selected: {fileName}
+                    Selected: {file.name}
                   </p>
                 )}
               </div>
@@ -352,8 +356,8 @@ export function BatchImportDrawer({
               <Alert>
                 <CheckCircle2 className="h-4 w-4" />
                 <AlertDescription>
-                  {parsedData.length} rows ready for import. All validation
-                  checks passed.
+                  Previewed rows passed validation. The full file is checked
+                  again on import.
                 </AlertDescription>
               </Alert>
             )}
@@ -362,7 +366,7 @@ export function BatchImportDrawer({
               <div className="space-y-2">
                 <div className="flex items-center justify-between">
                   <h3 className="text-lg font-medium">
-                    Data Preview ({parsedData.length} rows)
+                    Data Preview (first {parsedData.length} rows)
                   </h3>
                   <Button variant="outline" size="sm" onClick={handleReset}>
                     <X className="h-4 w-4 mr-2" />
@@ -453,13 +457,11 @@ export function BatchImportDrawer({
                 disabled={
                   parsedData.length === 0 ||
                   validationErrors.length > 0 ||
-                  batchCreateMutation.isPending
+                  importMutation.isPending
                 }
                 className="flex-1"
               >
-                {batchCreateMutation.isPending
-                  ? "Importing..."
-                  : `Import ${parsedData.length} Drugs`}
+                {importMutation.isPending ? "Importing..." : "Import Drugs"}
               </Button>
               <DrawerClose asChild>
                 <Button variant="outline">Cancel</Button>
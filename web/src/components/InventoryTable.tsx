@@ -10,6 +10,7 @@ import {
   TableRow,
 } from "@/components/ui/table";
 import { Edit, Trash2 } from "lucide-react";
+import { useEffect, useRef } from "react";
 import { Drug } from "@/types/drug";
 import { cn } from "@/lib/utils";
 
@@ -17,13 +18,34 @@ interface InventoryTableProps {
   drugs: Drug[];
   onEditDrug: (drug: Drug) => void;
   onDeleteDrug: (drug: Drug) => void;
+  hasMore?: boolean;
+  isLoadingMore?: boolean;
+  onLoadMore?: () => void;
 }
 
 export function InventoryTable({
   drugs,
   onEditDrug,
   onDeleteDrug,
+  hasMore = false,
+  isLoadingMore = false,
+  onLoadMore,
 }: InventoryTableProps) {
+  const loadMoreRef = useRef<HTMLDivElement>(null);
+
+  // Load the next page once the end of the table scrolls into view
+  useEffect(() => {
+    const sentinel = loadMoreRef.current;
+    if (!sentinel || !hasMore || isLoadingMore || !onLoadMore) return;
+    if (typeof IntersectionObserver === "undefined") return;
+
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some((entry) => entry.isIntersecting)) onLoadMore();
+    });
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [hasMore, isLoadingMore, onLoadMore]);
+
   const getCategoryBadgeClass = (category: string) => {
     const colorMap: { [key: string]: string } = {
       Antibiotic: "bg-red-100 text-red-800 border-red-200 hover:bg-red-100",
@@ -44,7 +66,9 @@ export function InventoryTable({
   return (
     <Card>
       <CardHeader>
-        <CardTitle>Inventory ({drugs.length} items)</CardTitle>
+        <CardTitle>
+          {`Inventory (${drugs.length}${hasMore ? "+" : ""} items)`}
+        </CardTitle>
       </CardHeader>
       <CardContent>
         <div className="overflow-x-auto">
@@ -131,6 +155,17 @@ export function InventoryTable({
             </TableBody>
           </Table>
         </div>
+        {hasMore && onLoadMore && (
+          <div ref={loadMoreRef} className="flex justify-center pt-4">
+            <Button
+              onClick={onLoadMore}
+              variant="outline"
+              disabled={isLoadingMore}
+            >
+              {isLoadingMore ? "Loading..." : "Load more"}
+            </Button>
+          </div>
+        )}
       </CardContent>
     </Card>
   );
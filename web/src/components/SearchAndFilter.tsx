@@ -7,14 +7,33 @@ import {
   SelectTrigger,
   SelectValue,
 } from "@/components/ui/select";
-import { Search, Filter, Plus, Upload } from "lucide-react";
+import { Search, Filter, Plus, Upload, ArrowUpDown } from "lucide-react";
 import { categories } from "@/types/drug";
+import { DrugSort } from "@/types/api";
+
+// The list's default order is chosen by the API: relevance while searching,
+// otherwise newest first
+const DEFAULT_SORT = "default";
+
+const sortOptions: { value: DrugSort | typeof DEFAULT_SORT; label: string }[] =
+  [
+    { value: DEFAULT_SORT, label: "Default order" },
+    { value: "name", label: "Name (A-Z)" },
+    { value: "-name", label: "Name (Z-A)" },
+    { value: "quantity", label: "Lowest stock" },
+    { value: "-quantity", label: "Highest stock" },
+    { value: "expiration_date", label: "Expiring first" },
+    { value: "-price", label: "Highest price" },
+    { value: "price", label: "Lowest price" },
+  ];
 
 interface SearchAndFilterProps {
   searchTerm: string;
   setSearchTerm: (term: string) => void;
   selectedCategory: string;
   setSelectedCategory: (category: string) => void;
+  sort?: DrugSort;
+  setSort?: (sort: DrugSort | undefined) => void;
   onAddDrug: () => void;
   onBatchImport: () => void;
 }
@@ -24,6 +43,8 @@ export function SearchAndFilter({
   setSearchTerm,
   selectedCategory,
   setSelectedCategory,
+  sort,
+  setSort,
   onAddDrug,
   onBatchImport,
 }: SearchAndFilterProps) {
@@ -52,6 +73,26 @@ export function SearchAndFilter({
             ))}
           </SelectContent>
         </Select>
+        {setSort && (
+          <Select
+            value={sort ?? DEFAULT_SORT}
+            onValueChange={(value) =>
+              setSort(value === DEFAULT_SORT ? undefined : (value as DrugSort))
+            }
+          >
+            <SelectTrigger className="w-full md:w-48" aria-label="Sort by">
+              <ArrowUpDown className="mr-2 h-4 w-4" />
+              <SelectValue />
+            </SelectTrigger>
+            <SelectContent>
+              {sortOptions.map((option) => (
+                <SelectItem key={option.value} value={option.value}>
+                  {option.label}
+                </SelectItem>
+              ))}
+            </SelectContent>
+          </Select>
+        )}
       </div>
       <div className="flex gap-2">
         <Button onClick={onBatchImport} variant="outline">
@@ -1,29 +1,33 @@
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
-import { Drug } from "@/types/drug";
-import { Package, Pill, AlertTriangle, CalendarOff } from "lucide-react";
+import { DrugStats } from "@/types/api";
+import {
+  Package,
+  Pill,
+  AlertTriangle,
+  CalendarOff,
+  DollarSign,
+} from "lucide-react";
 
 interface StatsCardsProps {
-  drugs: Drug[];
+  stats?: DrugStats;
 }
 
-export function StatsCards({ drugs }: StatsCardsProps) {
-  const totalStock = drugs.reduce((sum, drug) => sum + drug.quantity, 0);
-  const lowStockCount = drugs.filter((drug) => drug.quantity < 100).length;
-  const expiringSoonCount = drugs.filter(
-    (drug) =>
-      new Date(drug.expiration_date) <
-      new Date(Date.now() + 90 * 24 * 60 * 60 * 1000)
-  ).length;
+export function StatsCards({ stats }: StatsCardsProps) {
+  const totalDrugs = stats?.total_drugs ?? 0;
+  const totalStock = stats?.total_stock ?? 0;
+  const lowStockCount = stats?.low_stock_count ?? 0;
+  const expiringSoonCount = stats?.expiring_soon_count ?? 0;
+  const inventoryValue = stats?.inventory_value ?? 0;
 
   return (
-    <div className="grid grid-cols-1 gap-4 md:grid-cols-4">
+    <div className="grid grid-cols-1 gap-4 md:grid-cols-5">
       <Card>
         <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
           <CardTitle className="text-sm font-medium">Total Drugs</CardTitle>
           <Pill className="h-4 w-4 text-muted-foreground" />
         </CardHeader>
         <CardContent>
-          <div className="text-2xl font-bold">{drugs.length}</div>
+          <div className="text-2xl font-bold">{totalDrugs}</div>
         </CardContent>
       </Card>
       <Card>
@@ -35,6 +39,15 @@ export function StatsCards({ drugs }: StatsCardsProps) {
           <div className="text-2xl font-bold">{totalStock}</div>
         </CardContent>
       </Card>
+      <Card>
+        <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
+          <CardTitle className="text-sm font-medium">Inventory Value</CardTitle>
+          <DollarSign className="h-4 w-4 text-muted-foreground" />
+        </CardHeader>
+        <CardContent>
+          <div className="text-2xl font-bold">${inventoryValue.toFixed(2)}</div>
+        </CardContent>
+      </Card>
       <Card className="border-yellow-500/50 bg-yellow-500/10">
         <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
           <CardTitle className="text-sm font-medium">Low Stock</CardTitle>
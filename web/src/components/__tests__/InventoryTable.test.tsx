@@ -75,6 +75,38 @@ describe("InventoryTable", () => {
     expect(screen.getByText("No drugs found.")).toBeInTheDocument();
   });
 
+  it("loads more drugs when more pages are available", async () => {
+    const user = userEvent.setup();
+    const mockOnLoadMore = vi.fn();
+
+    renderWithProviders(
+      <InventoryTable
+        {...defaultProps}
+        drugs={[createMockDrug()]}
+        hasMore
+        onLoadMore={mockOnLoadMore}
+      />
+    );
+
+    expect(screen.getByText("Inventory (1+ items)")).toBeInTheDocument();
+    await user.click(screen.getByRole("button", { name: "Load more" }));
+    expect(mockOnLoadMore).toHaveBeenCalled();
+  });
+
+  it("hides load more on the last page", () => {
+    renderWithProviders(
+      <InventoryTable
+        {...defaultProps}
+        drugs={[createMockDrug()]}
+        onLoadMore={vi.fn()}
+      />
+    );
+
+    expect(
+      screen.queryByRole("button", { name: "Load more" })
+    ).not.toBeInTheDocument();
+  });
+
   it("calls onEditDrug when edit button is clicked", async () => {
     const user = userEvent.setup();
     const mockDrugs = [createMockDrug()];
@@ -1,17 +1,30 @@
 import { describe, it, expect } from "vitest";
-import { renderWithProviders, createMockDrug } from "@/test/utils";
+import { renderWithProviders } from "@/test/utils";
 import { StatsCards } from "../StatsCards";
-import { Drug } from "@/types/drug";
+import { DrugStats } from "@/types/api";
+
+const createMockStats = (overrides: Partial<DrugStats> = {}): DrugStats => ({
+  total_drugs: 0,
+  total_stock: 0,
+  low_stock_count: 0,
+  expiring_soon_count: 0,
+  inventory_value: 0,
+  low_stock_threshold: 100,
+  expiring_within_days: 90,
+  ...overrides,
+});
 
 describe("StatsCards", () => {
-  it("displays correct statistics for drugs", () => {
-    const mockDrugs: Drug[] = [
-      createMockDrug({ quantity: 100 }),
-      createMockDrug({ id: 2, quantity: 50 }),
-      createMockDrug({ id: 3, quantity: 200 }),
-    ];
+  it("displays statistics from the server", () => {
+    const stats = createMockStats({
+      total_drugs: 3,
+      total_stock: 350,
+      low_stock_count: 1,
+      expiring_soon_count: 2,
+      inventory_value: 1234.5,
+    });
 
-    const { getByText } = renderWithProviders(<StatsCards drugs={mockDrugs} />);
+    const { getByText } = renderWithProviders(<StatsCards stats={stats} />);
 
     expect(getByText("3")).toBeInTheDocument();
     expect(getByText("Total Drugs")).toBeInTheDocument();
@@ -19,58 +32,35 @@ describe("StatsCards", () => {
     expect(getByText("350")).toBeInTheDocument();
     expect(getByText("Total Stock")).toBeInTheDocument();
 
+    expect(getByText("$1234.50")).toBeInTheDocument();
+    expect(getByText("Inventory Value")).toBeInTheDocument();
+
     expect(getByText("1")).toBeInTheDocument();
     expect(getByText("Low Stock")).toBeInTheDocument();
+
+    expect(getByText("2")).toBeInTheDocument();
+    expect(getByText("Expiring Soon")).toBeInTheDocument();
   });
 
-  it("handles empty drugs array", () => {
-    const { getAllByText, getByText } = renderWithProviders(
-      <StatsCards drugs={[]} />
-    );
+  it("shows zeros while statistics are loading", () => {
+    const { getAllByText, getByText } = renderWithProviders(<StatsCards />);
 
     const zeros = getAllByText("0");
     expect(zeros).toHaveLength(4);
+    expect(getByText("$0.00")).toBeInTheDocument();
 
     expect(getByText("Total Drugs")).toBeInTheDocument();
     expect(getByText("Total Stock")).toBeInTheDocument();
   });
 
-  it("calculates low stock correctly", () => {
-    const mockDrugs: Drug[] = [
-      createMockDrug({ quantity: 50 }),
-      createMockDrug({ id: 2, quantity: 25 }),
-      createMockDrug({ id: 3, quantity: 100 }),
-      createMockDrug({ id: 4, quantity: 150 }),
-    ];
-
-    const { getByText } = renderWithProviders(<StatsCards drugs={mockDrugs} />);
-
-    expect(getByText("2")).toBeInTheDocument();
-    expect(getByText("Low Stock")).toBeInTheDocument();
-  });
-
-  it("calculates expiring soon correctly", () => {
-    const now = new Date();
-    const futureDate = new Date(now.getTime() + 30 * 24 * 60 * 60 * 1000);
-    const farFutureDate = new Date(now.getTime() + 365 * 24 * 60 * 60 * 1000);
-
-    const mockDrugs: Drug[] = [
-      createMockDrug({
-        expiration_date: futureDate.toISOString().split("T")[0],
-      }),
-      createMockDrug({
-        id: 2,
-        expiration_date: farFutureDate.toISOString().split("T")[0],
-      }),
-    ];
-
+  it("highlights the expiring soon card", () => {
     const { container, getByText } = renderWithProviders(
-      <StatsCards drugs={mockDrugs} />
+      <StatsCards stats={createMockStats({ expiring_soon_count: 7 })} />
     );
 
     const expiringSoonCard = container.querySelector(".bg-destructive\\/10");
     expect(expiringSoonCard).toBeTruthy();
-    expect(getByText("1")).toBeInTheDocument();
+    expect(expiringSoonCard).toHaveTextContent("7");
     expect(getByText("Expiring Soon")).toBeInTheDocument();
   });
 });
@@ -3,6 +3,7 @@ import { renderHook, waitFor } from "@testing-library/react";
 import { QueryClient, QueryClientProvider } from "@tanstack/react-query";
 import {
   useDrugs,
+  useDrugStats,
   useCreateDrug,
   useUpdateDrug,
   useDeleteDrug,
@@ -40,7 +41,10 @@ describe("useDrugs hooks", () => {
   describe("useDrugs", () => {
     it("fetches drugs successfully", async () => {
       const mockDrugs = [createMockDrug(), createMockDrug({ id: 2 })];
-      mockDrugApi.getAllDrugs.mockResolvedValue(mockDrugs);
+      mockDrugApi.getDrugs.mockResolvedValue({
+        items: mockDrugs,
+        next_cursor: null,
+      });
 
       const { result } = renderHook(() => useDrugs(), {
         wrapper: createWrapper(),
@@ -51,33 +55,71 @@ describe("useDrugs hooks", () => {
       });
 
       expect(result.current.data).toEqual(mockDrugs);
-      expect(mockDrugApi.getAllDrugs).toHaveBeenCalledWith(
-        undefined,
-        undefined
+      expect(result.current.hasNextPage).toBe(false);
+      expect(mockDrugApi.getDrugs).toHaveBeenCalledWith({
+        search: undefined,
+        category: undefined,
+        sort: undefined,
+        cursor: null,
+      });
+    });
+
+    it("passes search, category and sort to API", async () => {
+      mockDrugApi.getDrugs.mockResolvedValue({
+        items: [createMockDrug()],
+        next_cursor: null,
+      });
+
+      const { result } = renderHook(
+        () => useDrugs("aspirin", "Pain Relief", "name"),
+        { wrapper: createWrapper() }
       );
+
+      await waitFor(() => {
+        expect(result.current.isSuccess).toBe(true);
+      });
+
+      expect(mockDrugApi.getDrugs).toHaveBeenCalledWith({
+        search: "aspirin",
+        category: "Pain Relief",
+        sort: "name",
+        cursor: null,
+      });
     });
 
-    it("passes search parameters to API", async () => {
-      const mockDrugs = [createMockDrug()];
-      mockDrugApi.getAllDrugs.mockResolvedValue(mockDrugs);
+    it("fetches the next page only when asked", async () => {
+      mockDrugApi.getDrugs
+        .mockResolvedValueOnce({ items: [createMockDrug()], next_cursor: "abc" })
+        .mockResolvedValueOnce({
+          items: [createMockDrug({ id: 2 })],
+          next_cursor: null,
+        });
 
-      const { result } = renderHook(() => useDrugs("aspirin", "Pain Relief"), {
+      const { result } = renderHook(() => useDrugs(), {
         wrapper: createWrapper(),
       });
 
       await waitFor(() => {
         expect(result.current.isSuccess).toBe(true);
       });
+      expect(result.current.data).toHaveLength(1);
+      expect(result.current.hasNextPage).toBe(true);
+      expect(mockDrugApi.getDrugs).toHaveBeenCalledTimes(1);
+
+      await result.current.fetchNextPage();
 
-      expect(mockDrugApi.getAllDrugs).toHaveBeenCalledWith(
-        "aspirin",
-        "Pain Relief"
+      await waitFor(() => {
+        expect(result.current.data).toHaveLength(2);
+      });
+      expect(result.current.hasNextPage).toBe(false);
+      expect(mockDrugApi.getDrugs).toHaveBeenLastCalledWith(
+        expect.objectContaining({ cursor: "abc" })
       );
     });
 
     it("handles fetch errors", async () => {
       const mockError = new Error("Network error");
-      mockDrugApi.getAllDrugs.mockRejectedValue(mockError);
+      mockDrugApi.getDrugs.mockRejectedValue(mockError);
 
       const { result } = renderHook(() => useDrugs(), {
         wrapper: createWrapper(),
@@ -91,6 +133,32 @@ describe("useDrugs hooks", () => {
     });
   });
 
+  describe("useDrugStats", () => {
+    it("fetches stats with thresholds", async () => {
+      const mockStats = {
+        total_drugs: 2,
+        total_stock: 150,
+        low_stock_count: 1,
+        expiring_soon_count: 0,
+        inventory_value: 99.5,
+        low_stock_threshold: 50,
+        expiring_within_days: 30,
+      };
+      mockDrugApi.getStats.mockResolvedValue(mockStats);
+
+      const { result } = renderHook(() => useDrugStats(50, 30), {
+        wrapper: createWrapper(),
+      });
+
+      await waitFor(() => {
+        expect(result.current.isSuccess).toBe(true);
+      });
+
+      expect(result.current.data).toEqual(mockStats);
+      expect(mockDrugApi.getStats).toHaveBeenCalledWith(50, 30);
+    });
+  });
+
   describe("useCreateDrug", () => {
     it("creates drug successfully", async () => {
       const newDrug = createMockDrug();
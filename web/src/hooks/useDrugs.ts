@@ -1,6 +1,11 @@
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import {
+  useInfiniteQuery,
+  useMutation,
+  useQuery,
+  useQueryClient,
+} from "@tanstack/react-query";
 import { drugApi } from "@/services/api";
-import { CreateDrugRequest, UpdateDrugRequest } from "@/types/api";
+import { CreateDrugRequest, DrugSort, UpdateDrugRequest } from "@/types/api";
 import { toast } from "sonner";
 
 interface DrugCreate {
@@ -24,13 +29,28 @@ export const drugQueryKeys = {
   detail: (id: number) => [...drugQueryKeys.details(), id] as const,
   lowStock: () => [...drugQueryKeys.all, "lowStock"] as const,
   expiringSoon: () => [...drugQueryKeys.all, "expiringSoon"] as const,
+  stats: () => [...drugQueryKeys.all, "stats"] as const,
   categories: () => [...drugQueryKeys.all, "categories"] as const,
 };
 
-export function useDrugs(searchQuery?: string, category?: string) {
-  return useQuery({
-    queryKey: drugQueryKeys.list({ search: searchQuery, category }),
-    queryFn: () => drugApi.getAllDrugs(searchQuery, category),
+// Pages are fetched one at a time; call fetchNextPage to load the next one
+export function useDrugs(
+  searchQuery?: string,
+  category?: string,
+  sort?: DrugSort
+) {
+  return useInfiniteQuery({
+    queryKey: drugQueryKeys.list({ search: searchQuery, category, sort }),
+    queryFn: ({ pageParam }) =>
+      drugApi.getDrugs({
+        search: searchQuery,
+        category,
+        sort,
+        cursor: pageParam,
+      }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    select: (data) => data.pages.flatMap((page) => page.items),
     staleTime: 5 * 60 * 1000, // 5 minutes
   });
 }
@@ -59,6 +79,20 @@ export function useExpiringSoonDrugs(days = 90) {
   });
 }
 
+export function useDrugStats(
+  lowStockThreshold?: number,
+  expiringWithinDays?: number
+) {
+  return useQuery({
+    queryKey: [
+      ...drugQueryKeys.stats(),
+      { lowStockThreshold, expiringWithinDays },
+    ],
+    queryFn: () => drugApi.getStats(lowStockThreshold, expiringWithinDays),
+    staleTime: 2 * 60 * 1000, // 2 minutes
+  });
+}
+
 export function useCategories() {
   return useQuery({
     queryKey: drugQueryKeys.categories(),
@@ -76,6 +110,7 @@ export function useCreateDrug() {
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.lists() });
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.lowStock() });
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.expiringSoon() });
+      queryClient.invalidateQueries({ queryKey: drugQueryKeys.stats() });
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.categories() });
     },
   });
@@ -101,6 +136,7 @@ export function useUpdateDrug() {
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.lists() });
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.lowStock() });
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.expiringSoon() });
+      queryClient.invalidateQueries({ queryKey: drugQueryKeys.stats() });
     },
   });
 }
@@ -116,6 +152,7 @@ export function useDeleteDrug() {
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.lists() });
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.lowStock() });
       queryClient.invalidateQueries({ queryKey: drugQueryKeys.expiringSoon() });
+      queryClient.invalidateQueries({ queryKey: drugQueryKeys.stats() });
     },
   });
 }
@@ -148,3 +185,15 @@ export function useBatchCreateDrugs() {
     },
   });
 }
+
+export function useImportDrugsCsv() {
+  const queryClient = useQueryClient();
+
+  return useMutation({
+    mutationFn: (file: File) => drugApi.importDrugsCsv(file),
+    onSuccess: (data) => {
+      queryClient.invalidateQueries({ queryKey: ["drugs"] });
+      toast.success(`Successfully imported ${data.imported} drugs`);
+    },
+  });
+}
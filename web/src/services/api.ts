@@ -1,27 +1,43 @@
 import axios from "axios";
 import { Drug } from "@/types/drug";
-import { CreateDrugRequest, UpdateDrugRequest } from "@/types/api";
+import {
+  CreateDrugRequest,
+  DrugImportResult,
+  DrugListParams,
+  DrugPage,
+  DrugStats,
+  UpdateDrugRequest,
+} from "@/types/api";
 import { ValidationErrorResponse } from "@/types/validation";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+export const DRUG_PAGE_SIZE = 50;
 
 const api = axios.create({
   baseURL: `${API_BASE_URL}/api/v1`,
   headers: {
     "Content-Type": "application/json",
   },
+  // Sends the API's last-write cookie back, so reads after an edit see it
+  withCredentials: true,
 });
 
 export const drugApi = {
-  getAllDrugs: async (
-    searchQuery?: string,
-    category?: string
-  ): Promise<Drug[]> => {
-    const params = new URLSearchParams();
-    if (searchQuery) params.append("search", searchQuery);
-    if (category && category !== "All") params.append("category", category);
-
-    const response = await api.get(`/drugs?${params.toString()}`);
+  getDrugs: async ({
+    search,
+    category,
+    sort,
+    cursor,
+  }: DrugListParams = {}): Promise<DrugPage> => {
+    const response = await api.get<DrugPage>("/drugs", {
+      params: {
+        search: search || undefined,
+        category: category && category !== "All" ? category : undefined,
+        sort,
+        cursor: cursor || undefined,
+        limit: DRUG_PAGE_SIZE,
+      },
+    });
     return response.data;
   },
 
@@ -52,6 +68,17 @@ export const drugApi = {
     return response.data;
   },
 
+  importDrugsCsv: async (file: File): Promise<DrugImportResult> => {
+    const formData = new FormData();
+    formData.append("file", file);
+    const response = await api.post<DrugImportResult>(
+      "/drugs/import.csv",
+      formData,
+      { headers: { "Content-Type": "multipart/form-data" } }
+    );
+    return response.data;
+  },
+
   getLowStockDrugs: async (threshold = 100): Promise<Drug[]> => {
     const response = await api.get(`/drugs/low-stock?threshold=${threshold}`);
     return response.data;
@@ -62,6 +89,19 @@ export const drugApi = {
     return response.data;
   },
 
+  getStats: async (
+    lowStockThreshold?: number,
+    expiringWithinDays?: number
+  ): Promise<DrugStats> => {
+    const response = await api.get<DrugStats>("/drugs/stats", {
+      params: {
+        low_stock_threshold: lowStockThreshold,
+        expiring_within_days: expiringWithinDays,
+      },
+    });
+    return response.data;
+  },
+
   getCategories: async (): Promise<string[]> => {
     const response = await api.get("/drugs/categories");
     return response.data;
@@ -27,3 +27,42 @@ export interface UpdateDrugRequest {
 }
 
 export type DrugResponse = Drug;
+
+export interface DrugPage {
+  items: Drug[];
+  next_cursor: string | null;
+}
+
+export type DrugSort =
+  | "-created_at"
+  | "created_at"
+  | "name"
+  | "-name"
+  | "quantity"
+  | "-quantity"
+  | "expiration_date"
+  | "-expiration_date"
+  | "price"
+  | "-price"
+  | "relevance";
+
+export interface DrugListParams {
+  search?: string;
+  category?: string;
+  sort?: DrugSort;
+  cursor?: string | null;
+}
+
+export interface DrugStats {
+  total_drugs: number;
+  total_stock: number;
+  low_stock_count: number;
+  expiring_soon_count: number;
+  inventory_value: number;
+  low_stock_threshold: number;
+  expiring_within_days: number;
+}
+
+export interface DrugImportResult {
+  imported: number;
+}